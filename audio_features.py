@@ -0,0 +1,226 @@
+"""
+============================================
+AUDIO FEATURE MODULE
+============================================
+NumPy audio front end: PCM/WAV decoding, strided framing, windowed FFT
+features for all frames at once, and energy-based event segmentation
+"""
+
+import io
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SAMPLE_RATE = 16000
+FRAME_MS = 25
+HOP_MS = 10
+
+# Cough event constraints
+MIN_EVENT_SECONDS = 0.1
+MAX_EVENT_SECONDS = 1.0
+MERGE_GAP_SECONDS = 0.05
+NOISE_PERCENTILE = 20
+THRESHOLD_RATIO = 4.0  # Event energy must exceed the noise floor by this factor
+MIN_RMS = 0.01
+
+_window_cache: Dict[int, np.ndarray] = {}
+
+
+def compressed_format(data: bytes) -> Optional[str]:
+    """Container name if data is compressed audio decode_audio cannot read, else None"""
+    if data[:4] == b'\x1aE\xdf\xa3':
+        return 'webm'
+    if data[:4] == b'OggS':
+        return 'ogg'
+    if data[4:8] == b'ftyp':
+        return 'mp4'
+    return None
+
+
+def decode_audio(data: bytes, sample_rate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """
+    Decode WAV or raw little-endian 16-bit PCM into mono float32 samples
+
+    Args:
+        data: WAV file bytes (RIFF header) or headerless PCM
+        sample_rate: Sample rate of headerless PCM (default 16 kHz)
+
+    Returns:
+        (samples in [-1, 1], sample_rate)
+    """
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            frames = wav.readframes(wav.getnframes())
+        if width == 1:
+            samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif width == 2:
+            samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+        elif width == 4:
+            samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples, sample_rate
+
+    container = compressed_format(data)
+    if container:
+        raise ValueError(f"Compressed audio ({container}) is not supported; send WAV or 16-bit PCM")
+    if len(data) % 2:
+        raise ValueError("Raw PCM must be 16-bit samples")
+    samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+    return samples, sample_rate or DEFAULT_SAMPLE_RATE
+
+
+def frame_signal(samples: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """
+    Split a signal into overlapping frames without copying
+
+    Returns:
+        Read-only (n_frames, frame_length) strided view of samples
+    """
+    if len(samples) < frame_length:
+        return np.empty((0, frame_length), dtype=samples.dtype)
+    return np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop_length]
+
+
+def _hann(frame_length: int) -> np.ndarray:
+    window = _window_cache.get(frame_length)
+    if window is None:
+        window = _window_cache[frame_length] = np.hanning(frame_length).astype(np.float32)
+    return window
+
+
+def frame_features(frames: np.ndarray, sample_rate: int) -> Dict[str, np.ndarray]:
+    """
+    Per-frame features computed for all frames at once
+
+    Returns:
+        Dict of 1-D arrays (one value per frame): rms, zcr,
+        spectral_centroid and dominant_frequency (Hz)
+    """
+    frame_length = frames.shape[1]
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_length)
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+
+    magnitude = np.abs(np.fft.rfft(frames * _hann(frame_length), axis=1))
+    freqs = np.fft.rfftfreq(frame_length, d=1.0 / sample_rate)
+    total = magnitude.sum(axis=1)
+    centroid = np.divide(magnitude @ freqs, total, out=np.zeros_like(total), where=total > 0)
+    dominant = freqs[np.argmax(magnitude, axis=1)]
+
+    return {
+        'rms': rms,
+        'zcr': zcr,
+        'spectral_centroid': centroid,
+        'dominant_frequency': dominant
+    }
+
+
+def detect_active_runs(rms: np.ndarray, threshold: float, merge_gap: int) -> np.ndarray:
+    """
+    Start/end frame indices of runs where rms exceeds threshold
+
+    Runs separated by fewer than merge_gap quiet frames are merged.
+
+    Returns:
+        (n_runs, 2) array of [start, end) frame indices
+    """
+    active = np.concatenate(([False], rms > threshold, [False]))
+    edges = np.flatnonzero(active[1:] != active[:-1])
+    runs = edges.reshape(-1, 2)
+    if len(runs) > 1 and merge_gap > 0:
+        first = np.flatnonzero(np.concatenate(([True], runs[1:, 0] - runs[:-1, 1] >= merge_gap)))
+        # A merged run ends where the last run before the next group start ends
+        last = np.append(first[1:] - 1, len(runs) - 1)
+        runs = np.stack((runs[first, 0], runs[last, 1]), axis=1)
+    return runs
+
+
+def noise_threshold(rms: np.ndarray) -> float:
+    """Adaptive energy threshold from the recording's noise floor"""
+    if len(rms) == 0:
+        return MIN_RMS
+    return max(float(np.percentile(rms, NOISE_PERCENTILE)) * THRESHOLD_RATIO, MIN_RMS)
+
+
+def segment_events(features: Dict[str, np.ndarray], samples: np.ndarray, sample_rate: int,
+                   hop_length: int, frame_length: int, threshold: Optional[float] = None,
+                   frame_offset: int = 0) -> List[Dict]:
+    """
+    Group loud frames into events and describe each one
+
+    Args:
+        features: Output of frame_features
+        samples: The signal the frames came from (for peak amplitude)
+        threshold: RMS threshold; defaults to the adaptive noise threshold
+        frame_offset: Frame index of features[0] in the whole stream,
+            used to report absolute start times
+
+    Returns:
+        List of events with start, duration, dominant frequency,
+        spectral centroid, zero-crossing rate and peak amplitude
+    """
+    rms = features['rms']
+    if threshold is None:
+        threshold = noise_threshold(rms)
+    runs = detect_active_runs(rms, threshold, merge_gap_frames(sample_rate, hop_length))
+    return describe_runs(runs, features, samples, sample_rate, hop_length, frame_length, frame_offset)
+
+
+def merge_gap_frames(sample_rate: int, hop_length: int) -> int:
+    """Quiet frames that still count as the same event"""
+    return max(1, int(round(MERGE_GAP_SECONDS * sample_rate / hop_length)))
+
+
+def describe_runs(runs: np.ndarray, features: Dict[str, np.ndarray], samples: np.ndarray,
+                  sample_rate: int, hop_length: int, frame_length: int,
+                  frame_offset: int = 0) -> List[Dict]:
+    """Describe [start, end) frame runs, dropping runs too short or long to be coughs"""
+    rms = features['rms']
+    events = []
+    for start, end in runs.tolist():
+        duration = ((end - start - 1) * hop_length + frame_length) / sample_rate
+        if not MIN_EVENT_SECONDS <= duration <= MAX_EVENT_SECONDS:
+            continue
+        weights = rms[start:end] ** 2
+        weight_sum = float(weights.sum()) or 1.0
+        segment = samples[start * hop_length:(end - 1) * hop_length + frame_length]
+        events.append({
+            'start': (start + frame_offset) * hop_length / sample_rate,
+            'duration': duration,
+            'frequency': float(weights @ features['dominant_frequency'][start:end] / weight_sum),
+            'spectral_centroid': float(weights @ features['spectral_centroid'][start:end] / weight_sum),
+            'zcr': float(features['zcr'][start:end].mean()),
+            'amplitude': float(np.abs(segment).max()) if len(segment) else 0.0
+        })
+    return events
+
+
+def analyze_audio(samples: np.ndarray, sample_rate: int,
+                  frame_ms: int = FRAME_MS, hop_ms: int = HOP_MS) -> Dict:
+    """
+    Run the full front end over a clip
+
+    Returns:
+        Dict with duration, frame count and the segmented events
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    hop_length = int(sample_rate * hop_ms / 1000)
+    frames = frame_signal(samples, frame_length, hop_length)
+    if len(frames) == 0:
+        return {'duration': len(samples) / sample_rate, 'frames': 0, 'events': []}
+
+    features = frame_features(frames, sample_rate)
+    events = segment_events(features, samples, sample_rate, hop_length, frame_length)
+    return {
+        'duration': len(samples) / sample_rate,
+        'frames': len(frames),
+        'events': events
+    }
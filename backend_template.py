@@ -1,16 +1,23 @@
 # Flask Backend Template for Virtual Nurse AI
 # This is a starter template - expand based on your needs
 
-from flask import Flask, request, jsonify, session, send_from_directory, redirect, send_file
+from flask import Flask, request, jsonify, session, send_from_directory, redirect, send_file, Response, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import uuid
 import os
 import json
+import time
 import random
+import threading
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from auth import Auth
+from text_matcher import keyword_matcher
+from inference_cache import inference_cache
+from voice_router import voice_router
+from context_snapshots import context_snapshots
 
 # Load environment variables from .env file
 load_dotenv()
@@ -40,74 +47,32 @@ import random
 import json
 import os
 
-# Import model manager and fall detection models
-MODELS_AVAILABLE = False
+# Import model manager; the fall detection models are looked up through
+# it on every call, as the model registry can swap in a new version
 model_manager = None
-rf_model = None
-cnn_model = None
-scaler = None
+
+def fall_model_parts():
+    """(label, loaded model or None) for each part of the active fall model"""
+    model = model_manager.get_model('fall_detection') if model_manager else None
+    return (('Random Forest model', getattr(model, 'rf_model', None)),
+            ('CNN model', getattr(model, 'cnn_model', None)),
+            ('Scaler', getattr(model, 'scaler', None)))
+
+def models_available():
+    """Whether the model manager is loaded and the active fall model is complete"""
+    return model_manager is not None and all(part is not None for _, part in fall_model_parts())
 
 try:
     from models import model_manager
-    import joblib
-    # Reduce TF noise
-    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
-    os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
-    from tensorflow import keras
-    import os
     import numpy as np
-
-    # Load fall detection models (prefer models/fall/, fallback to models/)
-    models_root = os.path.join(os.path.dirname(__file__), 'models')
-    model_path_candidates = [
-        os.path.join(models_root, 'fall'),
-        models_root,
-    ]
-    # Resolve first existing directory
-    model_path = next((p for p in model_path_candidates if os.path.isdir(p)), models_root)
-    
-    # Check if model files exist before loading
-    rf_model_path = os.path.join(model_path, 'rf_fall_detector.joblib')
-    cnn_model_path = os.path.join(model_path, 'cnn_fall_detector.h5')
-    scaler_path = os.path.join(model_path, 'scaler.joblib')
-    
-    models_loaded = True
-    
-    if os.path.exists(rf_model_path):
-        try:
-            rf_model = joblib.load(rf_model_path)
-            print("✅ Random Forest model loaded successfully!")
-        except Exception as e:
-            print(f"⚠️  Error loading Random Forest model: {e}")
-            models_loaded = False
-    else:
-        print("⚠️  Random Forest model file not found")
-        models_loaded = False
     
-    if os.path.exists(cnn_model_path):
-        try:
-            cnn_model = keras.models.load_model(cnn_model_path)
-            print("✅ CNN model loaded successfully!")
-        except Exception as e:
-            print(f"⚠️  Error loading CNN model: {e}")
-            models_loaded = False
-    else:
-        print("⚠️  CNN model file not found")
-        models_loaded = False
-    
-    if os.path.exists(scaler_path):
-        try:
-            scaler = joblib.load(scaler_path)
-            print("✅ Scaler loaded successfully!")
-        except Exception as e:
-            print(f"⚠️  Error loading scaler: {e}")
-            models_loaded = False
-    else:
-        print("⚠️  Scaler file not found")
-        models_loaded = False
+    for label, loaded in fall_model_parts():
+        if loaded is not None:
+            print(f"✅ {label} loaded successfully!")
+        else:
+            print(f"⚠️  {label} file not found")
     
-    MODELS_AVAILABLE = models_loaded and model_manager is not None
-    if MODELS_AVAILABLE:
+    if models_available():
         print("✅ All AI Models loaded successfully!")
     else:
         print("⚠️  Some models failed to load, fall detection will use fallback mode")
@@ -229,6 +194,349 @@ except Exception as e:
 # VOICE ENDPOINTS
 # ============================================
 
+# Independent remote calls of a voice turn (response, mood analysis)
+# run concurrently on this pool under one deadline
+VOICE_POOL_SIZE = int(os.getenv('VOICE_POOL_SIZE', '8'))
+VOICE_DEADLINE_SECONDS = float(os.getenv('VOICE_DEADLINE_SECONDS', '8'))
+voice_pool = ThreadPoolExecutor(max_workers=VOICE_POOL_SIZE, thread_name_prefix='voice')
+# Conversation history older than ContextMemory.max_age stays in a
+# voice context snapshot at most this long
+CONVERSATION_SNAPSHOT_SECONDS = float(os.getenv('CONVERSATION_SNAPSHOT_SECONDS', '60'))
+# Google Health wellness metrics are kept per user and fetched again on
+# a Gemini turn once they are this old; the turn waits for the fetch at
+# most WELLNESS_WAIT_SECONDS (within its deadline) before building the
+# prompt, and a late fetch still fills the metrics for the next turn
+WELLNESS_METRICS_SECONDS = float(os.getenv('WELLNESS_METRICS_SECONDS', '300'))
+WELLNESS_WAIT_SECONDS = float(os.getenv('WELLNESS_WAIT_SECONDS', '2'))
+wellness_metrics = {}  # user_id -> (metrics, time.monotonic() when fetched)
+wellness_fetching = {}  # user_id -> future of the fetch in flight
+wellness_lock = threading.Lock()
+
+def result_by(future, deadline, label):
+    """
+    Result of a voice pool task if it finishes by deadline (time.monotonic())
+    
+    Returns None if there is no task, it failed, or it ran late; a late
+    task keeps its pool thread until it finishes but is not waited for.
+    """
+    if future is None:
+        return None
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FuturesTimeout:
+        print(f"⏱️ {label} missed the voice deadline")
+    except Exception as e:
+        print(f"⚠️ {label} error: {e}")
+    return None
+
+def submit_mood_analysis(text, deadline):
+    """Start Gemini mood analysis of a turn, or None if Gemini is unavailable"""
+    if GEMINI_AVAILABLE and gemini_api:
+        return voice_pool.submit(gemini_api.analyze_user_state, text, deadline)
+    return None
+
+def submit_wellness_fetch(user_id):
+    """
+    Start a Google Health fetch if sync is enabled and the user's
+    metrics are missing or older than WELLNESS_METRICS_SECONDS
+    
+    Returns:
+        The user's fetch in flight (possibly started by another turn),
+        or None if no fetch is needed
+    """
+    if not (MODULES_AVAILABLE and google_health and google_health.is_authenticated):
+        return None
+    with wellness_lock:
+        cached = wellness_metrics.get(user_id)
+        if cached and time.monotonic() - cached[1] < WELLNESS_METRICS_SECONDS:
+            return None
+        if user_id not in wellness_fetching:
+            wellness_fetching[user_id] = voice_pool.submit(fetch_wellness_metrics, user_id)
+        return wellness_fetching[user_id]
+
+def join_wellness_fetch(user_id, deadline):
+    """Wait for a fetch of the user's metrics, if one is needed, before the prompt is built"""
+    result_by(submit_wellness_fetch(user_id), min(deadline, time.monotonic() + WELLNESS_WAIT_SECONDS),
+              'Google Health metrics')
+
+def fetch_wellness_metrics(user_id):
+    """Fetch a user's last 7 days of metrics into their voice context snapshot"""
+    try:
+        metrics = google_health.retrieve_wellness_metrics(user_id, days=7)
+        if metrics is not None:
+            with wellness_lock:
+                wellness_metrics[user_id] = (metrics, time.monotonic())
+            context_snapshots.refresh(user_id, 'metrics')
+    except Exception as e:
+        print(f"⚠️ Google Health metrics error: {e}")
+    finally:
+        with wellness_lock:
+            wellness_fetching.pop(user_id, None)
+
+def voice_session_id(data):
+    """Device or conversation id used for sticky speaker identification"""
+    return (data or {}).get('session_id') or (data or {}).get('device_id') or request.headers.get('X-Device-Id')
+
+def identify_voice_speaker(data):
+    """
+    User a voice turn belongs to
+    
+    Returns:
+        (user_id, speaker_info); speaker_info is None unless audio identified the speaker
+    """
+    user_id = data.get('user_id', '1')  # Default user
+    speaker_info = None
+    if MODULES_AVAILABLE and speaker_identifier and data.get('audio'):
+        speaker_info = speaker_identifier.identify_speaker(data['audio'], voice_session_id(data))
+        if speaker_info:
+            user_id = speaker_info['user_id']
+    return user_id, speaker_info
+
+def active_reminders(user_id):
+    return [r for r in reminders_db if r.get('patientId') == user_id and r.get('active', True)]
+
+def route_voice_turn(text, user_id):
+    """Templated answer for simple vitals/medication questions, or None"""
+    return voice_router.route(text, patients_db.get(user_id, {}).get('vitals'),
+                              context_snapshots.get(user_id)['reminders'])
+
+def snapshot_vitals(user_id):
+    """Vitals section of a user's voice context"""
+    patient = patients_db.get(user_id, {})
+    if patient and 'vitals' in patient:
+        vitals = patient['vitals']
+    else:
+        vitals = {
+            'heartRate': 72,
+            'systolic': 120,
+            'diastolic': 80,
+            'temperature': 98.6,
+            'oxygen': 97
+        }
+    
+    if not vitals:
+        return {}
+    return {'vitals': {
+        'heartRate': vitals.get('heartRate', 72),
+        'systolic': vitals.get('systolic', 120),
+        'diastolic': vitals.get('diastolic', 80),
+        'temperature': vitals.get('temperature', 98.6),
+        'oxygen': vitals.get('oxygen', 97)
+    }}
+
+def snapshot_reminders(user_id):
+    """Active reminders section of a user's voice context"""
+    return {'reminders': [{
+        'medicine': r.get('medicine', ''),
+        'dosage': r.get('dosage', ''),
+        'time': r.get('time', ''),
+        'frequency': r.get('frequency', ''),
+        'lastTaken': r.get('lastTaken', None)
+    } for r in active_reminders(user_id)]}
+
+def snapshot_alerts(user_id):
+    """Unacknowledged alerts section of a user's voice context"""
+    active_alerts = [a for a in alerts_db if not a.get('acknowledged', False) and a.get('patientId') == user_id]
+    return {'activeAlerts': [{
+        'type': a.get('type', ''),
+        'severity': a.get('severity', ''),
+        'message': a.get('message', ''),
+        'timestamp': a.get('timestamp', '')
+    } for a in active_alerts]}
+
+def snapshot_conversation(user_id):
+    """Mood, recent exchanges and profile section of a user's voice context"""
+    if not (MODULES_AVAILABLE and context_memory):
+        return {}
+    user_context = context_memory.get_context(user_id)
+    return {
+        'mood': user_context.get('emotional_state') or 'neutral',
+        # Patient/Nurse pairs, as the prompt shows them
+        'recentHistory': [{
+            'user': h['user_input'],
+            'assistant': h['assistant_response'],
+            'timestamp': h['timestamp']
+        } for h in context_memory.get_recent_history(user_id, n=5)],
+        'patientProfile': {
+            'emotionalTrends': user_context.get('emotional_trends', []),
+            'preferences': user_context.get('preferences', {}),
+            'recentConcerns': user_context.get('recent_concerns', [])
+        }
+    }
+
+def snapshot_metrics(user_id):
+    """Last fetched Google Health metrics section of a user's voice context"""
+    with wellness_lock:
+        cached = wellness_metrics.get(user_id)
+    return {'healthMetrics': cached[0]} if cached else {}
+
+# Voice context snapshots; whatever changes a user's vitals, reminders,
+# alerts, conversation or wellness metrics refreshes that section
+# (history also expires)
+context_snapshots.register('vitals', snapshot_vitals)
+context_snapshots.register('reminders', snapshot_reminders)
+context_snapshots.register('alerts', snapshot_alerts)
+context_snapshots.register('conversation', snapshot_conversation, max_age=CONVERSATION_SNAPSHOT_SECONDS)
+context_snapshots.register('metrics', snapshot_metrics)
+
+def voice_context(user_id):
+    """
+    Health context for a Gemini voice turn: vitals, reminders, alerts,
+    mood, history and the last fetched Google Health metrics (see
+    join_wellness_fetch)
+    """
+    # Shared with other turns of the user; read only
+    return context_snapshots.get(user_id)
+
+def local_voice_response(text, audio_data, user_id):
+    """
+    Response without Gemini: the NLP model if loaded, else rule-based
+    
+    Returns:
+        (text, response); text is the transcript when audio was sent
+    """
+    if models_available():
+        # If audio data is provided, transcribe it first
+        if audio_data:
+            text = model_manager.transcribe_audio(audio_data)
+        
+        # Generate AI response using NLP model with conversation context
+        context = context_memory.get_context(user_id) if MODULES_AVAILABLE and context_memory else None
+        return text, model_manager.generate_response(text, context)
+    return text, generate_ai_response(text)
+
+def track_mood(user_id, text, mood_analysis):
+    """
+    Record a turn's Gemini mood analysis (analytics, emotional state)
+    and raise a stress alert on confident high stress
+    
+    Returns:
+        Mood info, or None without a mood analysis
+    """
+    mood_info = None
+    if mood_analysis:
+        try:
+            mood_info = {
+                'mood': mood_analysis.get('mood', 'neutral'),
+                'sentiment': mood_analysis.get('sentiment', 0),
+                'stressLevel': mood_analysis.get('stress_level', 'normal'),
+                'emotionalTags': mood_analysis.get('emotional_tags', []),
+                'confidence': mood_analysis.get('confidence', 0.5)
+            }
+            
+            # Store mood data in analytics
+            if MODULES_AVAILABLE and analytics_engine and mood_info:
+                analytics_engine.add_data_point(user_id, 'mood_score', mood_info['sentiment'])
+                analytics_engine.add_data_point(user_id, 'stress_level', 
+                    1.0 if mood_info['stressLevel'] == 'high' else 
+                    0.5 if mood_info['stressLevel'] == 'moderate' else 0.0
+                )
+            
+            # Update context memory with emotional state
+            if MODULES_AVAILABLE and context_memory:
+                context_memory.update_emotional_state(user_id, {
+                    'mood': mood_info['mood'],
+                    'stress_level': mood_info['stressLevel'],
+                    'emotional_tags': mood_info['emotionalTags']
+                })
+            
+        except Exception as e:
+            print(f"⚠️ Mood analysis error: {e}")
+    context_snapshots.refresh(user_id, 'conversation')
+    
+    # An emergency turn raises its own alert instead
+    if (mood_info and mood_info['stressLevel'] == 'high' and mood_info['confidence'] > 0.7
+            and detect_intent(text) != 'emergency'):
+        if MODULES_AVAILABLE and emergency_alert_system:
+            emergency_alert_system.create_alert(
+                user_id=user_id,
+                alert_type='stress_detected',
+                message='High stress levels detected in patient conversation',
+                severity='medium'
+            )
+    
+    return mood_info
+
+def track_mood_later(user_id, text, deadline):
+    """Track a turn's mood once its analysis finishes, without the answer waiting for it"""
+    mood_future = submit_mood_analysis(text, deadline)
+    if mood_future is not None:
+        mood_future.add_done_callback(
+            lambda future: track_mood(user_id, text, None if future.exception() else future.result()))
+
+def complete_voice_turn(user_id, text, response, speaker_info, mood_analysis=None):
+    """
+    Bookkeeping after a voice turn is answered: conversation memory,
+    mood tracking, and emergency or stress alerts
+    
+    Args:
+        mood_analysis: Result of gemini_api.analyze_user_state, if it ran
+    
+    Returns:
+        Mood info, or None without a mood analysis
+    """
+    # Store conversation in memory
+    if MODULES_AVAILABLE and context_memory:
+        context_memory.add_exchange(user_id, text, response, metadata={
+            'intent': detect_intent(text),
+            'speaker': speaker_info
+        })
+    
+    # Track mood and user sentiment from the Gemini analysis
+    mood_info = track_mood(user_id, text, mood_analysis)
+    
+    # Check for emergency help calls
+    if detect_intent(text) == 'emergency':
+        # Trigger emergency alert with voice as source
+        alert = {
+            'id': len(alerts_db) + 1,
+            'patientId': user_id,
+            'type': 'emergency',
+            'source': 'voice',
+            'severity': 'high',
+            'message': 'Emergency help requested through voice',
+            'timestamp': datetime.now().isoformat(),
+            'acknowledged': False,
+            'requiresConfirmation': True,
+            'confirmed': False
+        }
+        alerts_db.append(alert)
+        save_json_file(ALERTS_FILE, alerts_db)
+        context_snapshots.refresh(user_id, 'alerts')
+        
+        if MODULES_AVAILABLE and emergency_alert_system:
+            emergency_alert_system.create_alert(
+                user_id=user_id,
+                alert_type='emergency',
+                message='Emergency help requested through voice',
+                severity='high',
+                metadata={'source': 'voice', 'requiresConfirmation': True}
+            )
+    
+    return mood_info
+
+def voice_result(text, response, speaker_info, mood_info, fast_path, context):
+    """Fields of a voice turn result, shared by /api/voice and its stream"""
+    return {
+        'success': True,
+        'response': response,
+        'text': text,
+        'timestamp': datetime.now().isoformat(),
+        'speaker': speaker_info,
+        'mood': mood_info,
+        'route': fast_path['intent'] if fast_path else 'llm',
+        'context': {
+            'hasActiveMedications': bool(context.get('reminders')),
+            'hasActiveAlerts': bool(context.get('activeAlerts')),
+            'lastConversation': context.get('recentHistory', [None])[0] if context.get('recentHistory') else None,
+            'healthMetricsAvailable': 'healthMetrics' in context
+        }
+    }
+
+def sse_event(event, payload):
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
 @app.route('/api/voice', methods=['POST', 'OPTIONS'])
 def process_voice():
     """
@@ -239,221 +547,153 @@ def process_voice():
         return '', 204
         
     try:
-        data = request.get_json()
-        text = data.get('text', '') if data else ''
+        data = request.get_json() or {}
+        text = data.get('text', '')
         audio_data = data.get('audio')  # For future audio input
-        user_id = data.get('user_id', '1')  # Default user
-        
-        # Speaker identification (if audio provided)
-        speaker_info = None
-        if MODULES_AVAILABLE and speaker_identifier and audio_data:
-            speaker_info = speaker_identifier.identify_speaker(audio_data)
-            if speaker_info:
-                user_id = speaker_info['user_id']
-        
+        user_id, speaker_info = identify_voice_speaker(data)
+        deadline = time.monotonic() + VOICE_DEADLINE_SECONDS
+        context = {}
+        mood_future = None
+        
+        # Simple vitals/medication questions are answered from patient data
+        fast_path = route_voice_turn(text, user_id)
+        if fast_path:
+            response = fast_path['response']
+            print(f"⚡ Answered locally ({fast_path['intent']}): {response}")
+            track_mood_later(user_id, text, deadline)
         # Try Gemini API first if available
-        if GEMINI_AVAILABLE and gemini_api and gemini_api.enabled:
+        elif GEMINI_AVAILABLE and gemini_api and gemini_api.enabled:
             print(f"🎯 Processing voice with Gemini API: {text}")
-            # Get health context for Gemini
-            context = {}
-            try:
-                # Get vitals from patient database
-                patient = patients_db.get(user_id, {})
-                if patient and 'vitals' in patient:
-                    vitals = patient['vitals']
-                else:
-                    vitals = {
-                        'heartRate': 72,
-                        'systolic': 120,
-                        'diastolic': 80,
-                        'temperature': 98.6,
-                        'oxygen': 97
-                    }
-                
-                if vitals:
-                    context['vitals'] = {
-                        'heartRate': vitals.get('heartRate', 72),
-                        'systolic': vitals.get('systolic', 120),
-                        'diastolic': vitals.get('diastolic', 80),
-                        'temperature': vitals.get('temperature', 98.6),
-                        'oxygen': vitals.get('oxygen', 97)
-                    }
-                
-                # Get reminders with full details
-                user_reminders = [r for r in reminders_db if r.get('patientId') == user_id and r.get('active', True)]
-                context['reminders'] = [{
-                    'medicine': r.get('medicine', ''),
-                    'dosage': r.get('dosage', ''),
-                    'time': r.get('time', ''),
-                    'frequency': r.get('frequency', ''),
-                    'lastTaken': r.get('lastTaken', None)
-                } for r in user_reminders]
-                
-                # Get active alerts
-                active_alerts = [a for a in alerts_db if not a.get('acknowledged', False) and a.get('patientId') == user_id]
-                context['activeAlerts'] = [{
-                    'type': a.get('type', ''),
-                    'severity': a.get('severity', ''),
-                    'message': a.get('message', ''),
-                    'timestamp': a.get('timestamp', '')
-                } for a in active_alerts]
-
-                # Get mood and conversation history
-                if MODULES_AVAILABLE and context_memory:
-                    user_context = context_memory.get_context(user_id)
-                    context['mood'] = user_context.get('emotional_state', 'neutral')
-                    context['recentHistory'] = context_memory.get_recent_history(user_id, n=5)
-                    context['patientProfile'] = {
-                        'emotionalTrends': user_context.get('emotional_trends', []),
-                        'preferences': user_context.get('preferences', {}),
-                        'recentConcerns': user_context.get('recent_concerns', [])
-                    }
-
-                # If Google Health sync is enabled, get additional health metrics
-                if MODULES_AVAILABLE and google_health and google_health.is_authenticated:
-                    try:
-                        health_metrics = google_health.retrieve_wellness_metrics(user_id, days=7)
-                        context['healthMetrics'] = health_metrics
-                    except Exception as e:
-                        print(f"⚠️ Error getting Google Health metrics: {e}")
-
-                # Generate response using Gemini with enhanced context
-                print(f"📝 Sending context to Gemini: {context}")
-                response = gemini_api.generate_health_response(text, context)
-                print(f"✨ Gemini response: {response}")
-            except Exception as e:
-                print(f"⚠️ Gemini API error, falling back: {e}")
+            # Mood analysis runs while the metrics are fetched and the
+            # response is generated; the prompt needs the metrics
+            mood_future = submit_mood_analysis(text, deadline)
+            join_wellness_fetch(user_id, deadline)
+            context = voice_context(user_id)
+            llm_started = time.perf_counter()
+            
+            print(f"📝 Gemini context sections: {', '.join(sorted(context))}")
+            # Set only if a model answered (not a cached or fallback response)
+            model_answered = threading.Event()
+            response_future = voice_pool.submit(gemini_api.generate_health_response, text, context, deadline,
+                                                model_answered.set)
+            
+            response = result_by(response_future, deadline, 'Gemini response')
+            if response is None:
                 response = generate_ai_response(text)
-        # Use AI model if available
-        elif MODELS_AVAILABLE and model_manager:
-            # If audio data is provided, transcribe it first
-            if audio_data:
-                text = model_manager.transcribe_audio(audio_data)
-            
-            # Get conversation context
-            context = None
-            if MODULES_AVAILABLE and context_memory:
-                context = context_memory.get_context(user_id)
-                context_hints = context_memory.get_contextual_response_hints(user_id)
-            
-            # Generate AI response using NLP model with context
-            response = model_manager.generate_response(text, context)
+            else:
+                print(f"✨ Gemini response: {response}")
+                if model_answered.is_set():
+                    voice_router.record_llm(time.perf_counter() - llm_started)
         else:
-            # Fallback to rule-based response
-            response = generate_ai_response(text)
-        
-        # Store conversation in memory
-        if MODULES_AVAILABLE and context_memory:
-            context_memory.add_exchange(user_id, text, response, metadata={
-                'intent': detect_intent(text),
-                'speaker': speaker_info
-            })
-        
-        # Analyze mood and user sentiment using Gemini
-        mood_info = None
-        if GEMINI_AVAILABLE and gemini_api:
-            try:
-                # Get comprehensive mood analysis
-                mood_analysis = gemini_api.analyze_user_state(text)
-                mood_info = {
-                    'mood': mood_analysis.get('mood', 'neutral'),
-                    'sentiment': mood_analysis.get('sentiment', 0),
-                    'stressLevel': mood_analysis.get('stress_level', 'normal'),
-                    'emotionalTags': mood_analysis.get('emotional_tags', []),
-                    'confidence': mood_analysis.get('confidence', 0.5)
-                }
-                
-                # Store mood data in analytics
-                if MODULES_AVAILABLE and analytics_engine and mood_info:
-                    analytics_engine.add_data_point(user_id, 'mood_score', mood_info['sentiment'])
-                    analytics_engine.add_data_point(user_id, 'stress_level', 
-                        1.0 if mood_info['stressLevel'] == 'high' else 
-                        0.5 if mood_info['stressLevel'] == 'moderate' else 0.0
-                    )
-                
-                # Update context memory with emotional state
-                if MODULES_AVAILABLE and context_memory:
-                    context_memory.update_emotional_state(user_id, {
-                        'mood': mood_info['mood'],
-                        'stress_level': mood_info['stressLevel'],
-                        'emotional_tags': mood_info['emotionalTags']
-                    })
-                
-            except Exception as e:
-                print(f"⚠️ Mood analysis error: {e}")
-        
-        # Check for emergency help calls or high stress
-        intent = detect_intent(text)
-        if intent == 'emergency':
-            # Trigger emergency alert with voice as source
-            alert = {
-                'id': len(alerts_db) + 1,
-                'patientId': user_id,
-                'type': 'emergency',
-                'source': 'voice',
-                'severity': 'high',
-                'message': 'Emergency help requested through voice',
-                'timestamp': datetime.now().isoformat(),
-                'acknowledged': False,
-                'requiresConfirmation': True,
-                'confirmed': False
-            }
-            alerts_db.append(alert)
-            save_json_file(ALERTS_FILE, alerts_db)
-            
-            if MODULES_AVAILABLE and emergency_alert_system:
-                emergency_alert_system.create_alert(
-                    user_id=user_id,
-                    alert_type='emergency',
-                    message='Emergency help requested through voice',
-                    severity='high',
-                    metadata={'source': 'voice', 'requiresConfirmation': True}
-                )
-        # Check if we need to trigger any alerts based on mood
-        elif mood_info and mood_info['stressLevel'] == 'high' and mood_info['confidence'] > 0.7:
-            if MODULES_AVAILABLE and emergency_alert_system:
-                emergency_alert_system.create_alert(
-                    user_id=user_id,
-                    alert_type='stress_detected',
-                    message='High stress levels detected in patient conversation',
-                    severity='medium'
-                )
+            # NLP model if available, else rule-based response
+            text, response = local_voice_response(text, audio_data, user_id)
+            mood_future = submit_mood_analysis(text, deadline)
         
+        mood_analysis = result_by(mood_future, deadline, 'Mood analysis')
+        mood_info = complete_voice_turn(user_id, text, response, speaker_info, mood_analysis)
+        return jsonify(voice_result(text, response, speaker_info, mood_info, fast_path, context)), 200
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'response': response,
-            'text': text,
-            'timestamp': datetime.now().isoformat(),
-            'speaker': speaker_info,
-            'mood': mood_info,
-            'context': {
-                'hasActiveMedications': bool(context.get('reminders')),
-                'hasActiveAlerts': bool(context.get('activeAlerts')),
-                'lastConversation': context.get('recentHistory', [None])[0] if context.get('recentHistory') else None,
-                'healthMetricsAvailable': 'healthMetrics' in context
-            }
-        }), 200
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/voice/stream', methods=['POST', 'OPTIONS'])
+def process_voice_stream():
+    """
+    Streaming variant of /api/voice
+    
+    Sends server-sent events: a 'sentence' event for each sentence as
+    Gemini produces it, so the client can start speaking early, then a
+    'done' event with the same fields /api/voice returns.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        data = request.get_json() or {}
+        text = data.get('text', '')
+        user_id, speaker_info = identify_voice_speaker(data)
+        deadline = time.monotonic() + VOICE_DEADLINE_SECONDS
+        context = {}
+        mood_future = None
+        llm_started = time.perf_counter()
+        model_answered = threading.Event()
+        
+        fast_path = route_voice_turn(text, user_id)
+        use_gemini = not fast_path and GEMINI_AVAILABLE and gemini_api and gemini_api.enabled
+        if fast_path:
+            sentences = iter([fast_path['response']])
+            track_mood_later(user_id, text, deadline)
+        elif use_gemini:
+            # Mood analysis runs while the metrics are fetched and the
+            # response streams
+            mood_future = submit_mood_analysis(text, deadline)
+            join_wellness_fetch(user_id, deadline)
+            context = voice_context(user_id)
+            llm_started = time.perf_counter()
+            sentences = gemini_api.stream_health_response(text, context, deadline, model_answered.set)
+        else:
+            text, response = local_voice_response(text, data.get('audio'), user_id)
+            sentences = iter([response])
+            mood_future = submit_mood_analysis(text, deadline)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
+    
+    def events():
+        spoken = []
+        try:
+            for sentence in sentences:
+                spoken.append(sentence)
+                yield sse_event('sentence', {'text': sentence})
+        except Exception as e:
+            print(f"⚠️ Voice stream error, falling back: {e}")
+        if model_answered.is_set():
+            voice_router.record_llm(time.perf_counter() - llm_started)
+        
+        # Clients speak 'response' themselves if no sentence arrived
+        response = ' '.join(spoken) or generate_ai_response(text)
+        mood_analysis = result_by(mood_future, deadline, 'Mood analysis')
+        try:
+            mood_info = complete_voice_turn(user_id, text, response, speaker_info, mood_analysis)
+        except Exception as e:
+            print(f"⚠️ Voice turn bookkeeping error: {e}")
+            mood_info = None
+        yield sse_event('done', voice_result(text, response, speaker_info, mood_info, fast_path, context))
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Intents in priority order; the first intent with a keyword in the text wins
+INTENT_KEYWORDS = [
+    ('emergency', frozenset({'help', 'emergency', 'urgent'})),
+    ('medication', frozenset({'medicine', 'medication', 'pill'})),
+    ('pain', frozenset({'pain', 'hurt', 'ache'})),
+    ('appointment', frozenset({'doctor', 'appointment'})),
+    ('vitals', frozenset({'temperature', 'fever', 'vitals'}))
+]
+
+# Canned replies in priority order, used when no model or Gemini is available
+CANNED_RESPONSES = [
+    (frozenset({'help', 'emergency'}), "I'm alerting your caretaker immediately. Help is on the way. Stay calm."),
+    (frozenset({'medicine', 'medication'}), "Your next medication is Aspirin 100mg at 2:00 PM today."),
+    (frozenset({'temperature'}), "Your current temperature is 98.6°F, which is within normal range."),
+    (frozenset({'doctor'}), "Would you like me to schedule an appointment with Dr. Smith?"),
+    (frozenset({'pain'}), "I understand you're experiencing pain. On a scale of 1-10, how would you rate it?")
+]
+
+keyword_matcher.add(k for _, keywords in INTENT_KEYWORDS for k in keywords)
+keyword_matcher.add(k for keywords, _ in CANNED_RESPONSES for k in keywords)
 
 def detect_intent(text: str) -> str:
     """Simple intent detection"""
-    text_lower = text.lower()
-    if any(word in text_lower for word in ['help', 'emergency', 'urgent']):
-        return 'emergency'
-    elif any(word in text_lower for word in ['medicine', 'medication', 'pill']):
-        return 'medication'
-    elif any(word in text_lower for word in ['pain', 'hurt', 'ache']):
-        return 'pain'
-    elif any(word in text_lower for word in ['doctor', 'appointment']):
-        return 'appointment'
-    elif any(word in text_lower for word in ['temperature', 'fever', 'vitals']):
-        return 'vitals'
-    else:
-        return 'general'
+    for intent, keywords in INTENT_KEYWORDS:
+        if keyword_matcher.any(text, keywords):
+            return intent
+    return 'general'
 
 @app.route('/api/respond', methods=['POST', 'OPTIONS'])
 def text_to_speech():
@@ -469,7 +709,7 @@ def text_to_speech():
         
         # Use AI model if available
         audio_path = None
-        if MODELS_AVAILABLE and model_manager:
+        if models_available():
             audio_path = model_manager.synthesize_speech(text)
         
         return jsonify({
@@ -487,20 +727,10 @@ def generate_ai_response(text):
     """
     Generate intelligent response based on input
     """
-    text_lower = text.lower()
-    
-    if 'help' in text_lower or 'emergency' in text_lower:
-        return "I'm alerting your caretaker immediately. Help is on the way. Stay calm."
-    elif 'medicine' in text_lower or 'medication' in text_lower:
-        return "Your next medication is Aspirin 100mg at 2:00 PM today."
-    elif 'temperature' in text_lower:
-        return "Your current temperature is 98.6°F, which is within normal range."
-    elif 'doctor' in text_lower:
-        return "Would you like me to schedule an appointment with Dr. Smith?"
-    elif 'pain' in text_lower:
-        return "I understand you're experiencing pain. On a scale of 1-10, how would you rate it?"
-    else:
-        return f"I heard: '{text}'. How can I assist you with your health today?"
+    for keywords, response in CANNED_RESPONSES:
+        if keyword_matcher.any(text, keywords):
+            return response
+    return f"I heard: '{text}'. How can I assist you with your health today?"
 
 # ============================================
 # VITALS ENDPOINTS
@@ -625,6 +855,7 @@ def update_vitals():
             # Update local database
             patients_db[patient_id]['vitals'].update(vitals_update)
             save_json_file(PATIENTS_FILE, patients_db)
+            context_snapshots.refresh(patient_id, 'vitals')
             
             # If Google Health sync is enabled, update there too
             if MODULES_AVAILABLE and google_health and google_health.is_authenticated:
@@ -712,6 +943,7 @@ def check_critical_vitals(patient_id, vitals):
         }
         alerts_db.append(alert)
         save_json_file(ALERTS_FILE, alerts_db)
+        context_snapshots.refresh(patient_id, 'alerts')
         
         if MODULES_AVAILABLE and emergency_alert_system:
             emergency_alert_system.create_alert(
@@ -1026,6 +1258,7 @@ def acknowledge_alert():
                 alert['acknowledged'] = True
                 alert['acknowledgedAt'] = datetime.now().isoformat()
                 save_json_file(ALERTS_FILE, alerts_db)
+                context_snapshots.refresh(alert.get('patientId'), 'alerts')
                 
                 return jsonify({
                     'success': True,
@@ -1146,23 +1379,23 @@ def trigger_emergency():
         
         alerts_db.append(alert)
         save_json_file(ALERTS_FILE, alerts_db)
+        context_snapshots.refresh(patient_id, 'alerts')
         
         # Trigger emergency alert system
         if MODULES_AVAILABLE and emergency_alert_system:
-            alert = emergency_alert_system.trigger_emergency(user_id, alert_type, message, severity)
+            alert = emergency_alert_system.trigger_emergency(patient_id, 'emergency', alert_message, severity)
             # Also add to alerts_db for compatibility
             alerts_db.append({
                 'id': alert['id'],
-                'patientId': user_id,
-                'type': alert_type,
+                'patientId': patient_id,
+                'type': 'emergency',
                 'severity': severity,
-                'message': message,
+                'message': alert_message,
                 'timestamp': alert['timestamp'],
                 'acknowledged': False
             })
-        else:
-            # Fallback
-            alert = create_alert(user_id, alert_type, message)
+            context_snapshots.refresh(patient_id, 'alerts')
+        # Without the alert system, the alert saved above is the emergency
         
         return jsonify({
             'success': True,
@@ -1186,6 +1419,7 @@ def create_alert(patient_id, alert_type, message):
     }
     alerts_db.append(alert)
     save_json_file(ALERTS_FILE, alerts_db)
+    context_snapshots.refresh(patient_id, 'alerts')
     
     # TODO: Send real-time notification (WebSocket, Firebase, etc.)
 
@@ -1260,6 +1494,7 @@ def create_reminder():
         # Back-compat: also append to reminders_db
         reminders_db.append(reminder)
         save_json_file(REMINDERS_FILE, reminders_db)
+        context_snapshots.refresh(patient_id, 'vitals', 'reminders')
         
         return jsonify({
             'success': True,
@@ -1308,6 +1543,7 @@ def mark_reminder_taken():
                 r['lastTaken'] = datetime.now().isoformat()
                 r['taken'] = True
                 r['status'] = 'completed'
+                context_snapshots.refresh(r.get('patientId'), 'reminders')
                 updated = True
                 break
         if updated:
@@ -1920,6 +2156,7 @@ def register():
             }
             patients_db[user['id']] = patient
             save_json_file(PATIENTS_FILE, patients_db)
+            context_snapshots.refresh(user['id'], 'vitals')
         
         # If Google signup and token provided, try Google Health sync
         if is_google_signup and MODULES_AVAILABLE and google_health:
@@ -2006,105 +2243,55 @@ def google_oauth2_callback():
 # FALL DETECTION ENDPOINTS
 # ============================================
 
+def current_fall_model():
+    """
+    Active fall detection model
+    
+    Looked up per request because the model registry can swap in a new
+    version at any time; a request keeps the model it started with.
+    """
+    return model_manager.get_model('fall_detection') if model_manager else None
+
 @app.route('/api/detect/fall', methods=['POST', 'OPTIONS'])
 @require_auth
 def detect_fall_endpoint():
     """
     Detect falls using sensor data from wearable/mobile device
-    Uses both RF and CNN models for robust detection when available,
-    falls back to rule-based detection otherwise
+    Runs the scaled RF first and the CNN only when the RF is uncertain,
+    falls back to rule-based detection when no model is available.
+    Retries of the same window (same patient and model version) within
+    INFERENCE_CACHE_SECONDS get the cached result without re-running
+    inference or alerting again
     """
     if request.method == 'OPTIONS':
         return '', 204
         
     try:
-        data = request.get_json()
-        sensor_data = data.get('sensor_data')  # Accelerometer and gyroscope data
-        patient_id = data.get('patient_id', '1')
+        try:
+            # Accelerometer and gyroscope data (JSON lists or packed float32)
+            sensor_data, patient_id = read_sensor_payload('patient_id')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        if not sensor_data:
+        if sensor_data is None or len(sensor_data) == 0:
             return jsonify({
                 'success': False,
                 'error': 'Invalid data - sensor data required'
             }), 400
         
-        if not MODELS_AVAILABLE:
-            # Fallback to rule-based detection
-            return rule_based_fall_detection(sensor_data, patient_id)
+        fall_model = current_fall_model()
+        cache_key = inference_cache.key('fall', patient_id, getattr(fall_model, 'version', None), sensor_data)
+        cached = inference_cache.get(cache_key)
+        if cached is not None:
+            # The cached alert belonged to the first upload; a repeat
+            # only alerts once that alert's de-duplication window passed
+            alert_created = bool(cached.get('is_fall')) and raise_fall_alert(patient_id, 'sensor data', cache_key)
+            return jsonify(dict(cached, alert_created=alert_created, cached=True)), 200
         
-        # Preprocess sensor data
-        try:
-            processed_data = preprocess_sensor_data(sensor_data)
-        except Exception as e:
-            print(f"⚠️ Error preprocessing data: {e}")
-            return rule_based_fall_detection(sensor_data, patient_id)
-        
-        # Get predictions from both models
-        try:
-            predictions = []
-            models_used = []
-            
-            # Try Random Forest prediction
-            if rf_model and scaler:
-                try:
-                    # Scale the data
-                    scaled_data = scaler.transform(processed_data.reshape(1, -1))
-                    rf_pred = rf_model.predict_proba(scaled_data)[0]
-                    rf_fall_prob = rf_pred[1]  # Probability of fall
-                    predictions.append(rf_fall_prob)
-                    models_used.append('random_forest')
-                except Exception as e:
-                    print(f"⚠️ Random Forest prediction error: {e}")
-            
-            # Try CNN prediction
-            if cnn_model:
-                try:
-                    # CNN prediction (reshape data for CNN)
-                    cnn_data = processed_data.reshape(1, -1, 1)  # Adjust shape based on your model
-                    cnn_pred = cnn_model.predict(cnn_data)[0]
-                    cnn_fall_prob = cnn_pred[0]
-                    predictions.append(cnn_fall_prob)
-                    models_used.append('cnn')
-                except Exception as e:
-                    print(f"⚠️ CNN prediction error: {e}")
-            
-            # Ensemble decision (weighted average)
-            fall_probability = (0.6 * rf_fall_prob + 0.4 * cnn_fall_prob)
-            is_fall = fall_probability > 0.7  # Threshold for fall detection
-            
-            if is_fall:
-                # Create emergency alert
-                alert = create_alert(
-                    patient_id=patient_id,
-                    alert_type='fall_detected',
-                    message='Potential fall detected! Immediate assistance may be needed.'
-                )
-                
-                # Use emergency alert system if available
-                if MODULES_AVAILABLE and emergency_alert_system:
-                    emergency_alert_system.trigger_emergency(
-                        patient_id,
-                        'fall_detected',
-                        'Fall detected through sensor data',
-                        'high'
-                    )
-            
-            return jsonify({
-                'success': True,
-                'is_fall': bool(is_fall),
-                'probability': float(fall_probability),
-                'alert_created': is_fall,
-                'models_used': ['random_forest', 'cnn'],
-                'timestamp': datetime.now().isoformat()
-            }), 200
-            
-        except Exception as e:
-            print(f"⚠️ Error in fall detection models: {e}")
-            return jsonify({
-                'success': False,
-                'error': 'Model prediction failed',
-                'details': str(e)
-            }), 500
+        response, status = run_fall_detection(fall_model, sensor_data, patient_id, cache_key)
+        if status == 200:
+            inference_cache.put(cache_key, response.get_json())
+        return response, status
             
     except Exception as e:
         return jsonify({
@@ -2112,75 +2299,90 @@ def detect_fall_endpoint():
             'error': str(e)
         }), 500
 
-def rule_based_fall_detection(sensor_data, patient_id):
+def run_fall_detection(fall_model, sensor_data, patient_id, alert_key):
+    """
+    Fall detection on one window with the given model
+    
+    Args:
+        alert_key: inference_cache key of the window, for alert de-duplication
+    
+    Returns:
+        Tuple of (response, status code)
+    """
+    if not (fall_model and fall_model.is_loaded):
+        # Fallback to rule-based detection
+        return rule_based_fall_detection(sensor_data, patient_id, alert_key)
+    
+    # Preprocess sensor data
+    try:
+        processed_data = preprocess_sensor_data(sensor_data)
+    except Exception as e:
+        print(f"⚠️ Error preprocessing data: {e}")
+        return rule_based_fall_detection(sensor_data, patient_id, alert_key)
+    
+    # Cascade: cheap scaled RF first, CNN only for uncertain windows
+    try:
+        cascade = model_manager.fall_probability(processed_data, model=fall_model)
+        if cascade['probability'] is None:
+            return rule_based_fall_detection(sensor_data, patient_id, alert_key)
+        
+        fall_probability = cascade['probability']
+        is_fall = fall_probability > 0.7  # Threshold for fall detection
+        alert_created = bool(is_fall) and raise_fall_alert(patient_id, 'sensor data', alert_key)
+        
+        return jsonify({
+            'success': True,
+            'is_fall': bool(is_fall),
+            'probability': float(fall_probability),
+            'alert_created': alert_created,
+            'models_used': cascade['stages'],
+            'stages': {
+                'ran': cascade['stages'],
+                'skipped': cascade['skipped']
+            },
+            'model_probabilities': {
+                'random_forest': cascade['rf_probability'],
+                'cnn': cascade['cnn_probability']
+            },
+            'model_version': cascade['model_version'],
+            'timestamp': datetime.now().isoformat()
+        }), 200
+        
+    except Exception as e:
+        print(f"⚠️ Error in fall detection models: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Model prediction failed',
+            'details': str(e)
+        }), 500
+
+def rule_based_fall_detection(sensor_data, patient_id, alert_key):
     """
     Fallback method for fall detection when ML models are not available
     Uses simple threshold-based rules on accelerometer data
     """
     try:
-        import numpy as np
+        from fall_features import stack_sensor_data, rule_based_decision
         
-        # Extract accelerometer data
-        acc_x = np.array(sensor_data.get('accelerometer', {}).get('x', []))
-        acc_y = np.array(sensor_data.get('accelerometer', {}).get('y', []))
-        acc_z = np.array(sensor_data.get('accelerometer', {}).get('z', []))
-        
-        if len(acc_x) == 0 or len(acc_y) == 0 or len(acc_z) == 0:
+        try:
+            matrix = stack_sensor_data(sensor_data)
+        except ValueError:
             return jsonify({
                 'success': False,
                 'error': 'Invalid accelerometer data'
             }), 400
         
-        # Calculate total acceleration magnitude
-        acc_magnitude = np.sqrt(acc_x**2 + acc_y**2 + acc_z**2)
-        
-        # Simple fall detection rules:
-        # 1. High impact detected by acceleration spike
-        # 2. Followed by a period of low movement (person lying still)
-        
-        max_acceleration = np.max(acc_magnitude)
-        mean_acceleration = np.mean(acc_magnitude)
-        std_acceleration = np.std(acc_magnitude)
-        
-        # Thresholds (adjust based on your needs)
-        IMPACT_THRESHOLD = 25.0  # m/s^2 (about 2.5g)
-        STILLNESS_THRESHOLD = 2.0  # m/s^2
-        
-        # Check for impact followed by stillness
-        is_fall = (max_acceleration > IMPACT_THRESHOLD and 
-                  mean_acceleration < STILLNESS_THRESHOLD)
-        
-        # Calculate confidence based on how far above threshold
-        confidence = min(0.95, (max_acceleration / IMPACT_THRESHOLD) * 0.8) if is_fall else 0.2
-        
-        if is_fall:
-            # Create emergency alert
-            alert = create_alert(
-                patient_id=patient_id,
-                alert_type='fall_detected',
-                message='Potential fall detected! Immediate assistance may be needed.'
-            )
-            
-            # Use emergency alert system if available
-            if MODULES_AVAILABLE and emergency_alert_system:
-                emergency_alert_system.trigger_emergency(
-                    patient_id,
-                    'fall_detected',
-                    'Fall detected through sensor data',
-                    'high'
-                )
+        # High impact spike followed by a period of low movement
+        is_fall, confidence, analysis = rule_based_decision(matrix)
+        alert_created = bool(is_fall) and raise_fall_alert(patient_id, 'sensor data', alert_key)
         
         return jsonify({
             'success': True,
             'is_fall': bool(is_fall),
             'probability': float(confidence),
-            'alert_created': is_fall,
+            'alert_created': alert_created,
             'detection_method': 'rule_based',
-            'analysis': {
-                'max_acceleration': float(max_acceleration),
-                'mean_acceleration': float(mean_acceleration),
-                'std_acceleration': float(std_acceleration)
-            },
+            'analysis': analysis,
             'timestamp': datetime.now().isoformat()
         }), 200
         
@@ -2191,53 +2393,241 @@ def rule_based_fall_detection(sensor_data, patient_id):
             'error': str(e)
         }), 500
 
+def raise_fall_alert(patient_id, source, alert_key):
+    """
+    Create a fall alert and trigger the emergency system
+    
+    Args:
+        alert_key: inference_cache key of the detected window
+    
+    Returns:
+        False, without alerting, if this same window (a retried upload)
+        already raised an alert within ALERT_DEDUP_SECONDS
+    """
+    if not inference_cache.claim_alert(alert_key):
+        return False
+    
+    # Create emergency alert
+    create_alert(
+        patient_id=patient_id,
+        alert_type='fall_detected',
+        message='Potential fall detected! Immediate assistance may be needed.'
+    )
+    
+    # Use emergency alert system if available
+    if MODULES_AVAILABLE and emergency_alert_system:
+        emergency_alert_system.trigger_emergency(
+            patient_id,
+            'fall_detected',
+            f'Fall detected through {source}',
+            'high'
+        )
+    return True
+
 def preprocess_sensor_data(sensor_data):
     """
     Preprocess raw sensor data for fall detection models
-    Expects accelerometer and gyroscope data
+    Accepts the JSON accelerometer/gyroscope lists or a decoded (6, N)
+    float32 matrix, and extracts all features in one vectorized pass
     """
     try:
-        import numpy as np
+        from fall_features import stack_sensor_data, extract_features
         
-        # Extract features (adjust based on your model's requirements)
-        acc_x = sensor_data.get('accelerometer', {}).get('x', [])
-        acc_y = sensor_data.get('accelerometer', {}).get('y', [])
-        acc_z = sensor_data.get('accelerometer', {}).get('z', [])
-        gyro_x = sensor_data.get('gyroscope', {}).get('x', [])
-        gyro_y = sensor_data.get('gyroscope', {}).get('y', [])
-        gyro_z = sensor_data.get('gyroscope', {}).get('z', [])
-        
-        # Calculate features (example - adjust based on your model)
-        features = []
-        
-        # Acceleration magnitude
-        acc_mag = np.sqrt(np.array(acc_x)**2 + np.array(acc_y)**2 + np.array(acc_z)**2)
-        
-        # Statistical features
-        features.extend([
-            np.mean(acc_mag),
-            np.std(acc_mag),
-            np.max(acc_mag),
-            np.mean(acc_x),
-            np.mean(acc_y),
-            np.mean(acc_z),
-            np.std(acc_x),
-            np.std(acc_y),
-            np.std(acc_z),
-            np.mean(gyro_x),
-            np.mean(gyro_y),
-            np.mean(gyro_z),
-            np.std(gyro_x),
-            np.std(gyro_y),
-            np.std(gyro_z)
-        ])
-        
-        return np.array(features)
+        return extract_features(stack_sensor_data(sensor_data))
         
     except Exception as e:
         print(f"⚠️ Error preprocessing sensor data: {e}")
         raise
 
+def read_sensor_payload(id_field):
+    """
+    Read fall detection input from the request body
+    
+    JSON bodies carry 'sensor_data' lists. Binary bodies
+    (application/octet-stream) carry a packed little-endian float32
+    6xN matrix (acc x/y/z, gyro x/y/z rows) that is decoded without
+    copying; the patient id then comes from the query string.
+    
+    Returns:
+        Tuple of (sensor_data, patient_id)
+    """
+    from fall_features import BINARY_CONTENT_TYPE, decode_sensor_payload
+    
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        payload = request.get_data(cache=False)
+        return decode_sensor_payload(payload), request.args.get(id_field, '1')
+    
+    data = request.get_json() or {}
+    return data.get('sensor_data'), data.get(id_field, '1')
+
+def score_fall_features(features):
+    """
+    Fall probability for one feature vector from the loaded models
+    
+    Returns:
+        Probability in [0, 1], or None when no model is available
+    """
+    fall_model = current_fall_model()
+    if not (fall_model and fall_model.is_loaded):
+        return None
+    return model_manager.fall_probability(features, model=fall_model)['probability']
+
+try:
+    from fall_stream import FallStreamDetector
+    fall_stream_detector = FallStreamDetector(scorer=score_fall_features)
+except ImportError as e:
+    print(f"⚠️ Streaming fall detection not available: {e}")
+    fall_stream_detector = None
+
+@app.route('/api/detect/fall/stream', methods=['POST', 'OPTIONS'])
+@require_auth
+def detect_fall_stream():
+    """
+    Streaming fall detection
+    Devices push small chunks of samples (JSON lists or packed float32);
+    the server keeps a sliding window per patient and raises a single
+    alert as soon as a fall pattern completes
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    if fall_stream_detector is None:
+        return jsonify({'success': False, 'error': 'Streaming fall detection not available'}), 503
+    
+    try:
+        from fall_features import stack_sensor_data
+        
+        try:
+            sensor_data, patient_id = read_sensor_payload('patient_id')
+            chunk = stack_sensor_data(sensor_data if sensor_data is not None else {})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        events = fall_stream_detector.push(patient_id, chunk)
+        is_fall = any(event.get('alert') for event in events)
+        alert_key = inference_cache.key('fall_stream', patient_id, getattr(current_fall_model(), 'version', None), chunk)
+        alert_created = is_fall and raise_fall_alert(patient_id, 'streaming sensor data', alert_key)
+        
+        return jsonify({
+            'success': True,
+            'is_fall': is_fall,
+            'alert_created': alert_created,
+            'events': events,
+            'window': fall_stream_detector.window_stats(patient_id),
+            'model_version': getattr(current_fall_model(), 'version', None),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ============================================
+# MODEL REGISTRY ENDPOINTS
+# ============================================
+
+try:
+    from model_registry import ModelRegistry
+    from models import FallDetectionModel
+    
+    model_registry = ModelRegistry(model_manager) if model_manager else None
+    if model_registry:
+        model_registry.register('fall_detection', FallDetectionModel, 'fall')
+        if os.getenv('MODEL_WATCH', 'false').lower() in ('1', 'true', 'yes'):
+            model_registry.watch()
+except ImportError as e:
+    print(f"⚠️ Model registry not available: {e}")
+    model_registry = None
+
+@app.route('/api/admin/models', methods=['GET', 'OPTIONS'])
+@require_auth
+def get_model_versions():
+    """Active, loading and available versions of hot-swappable models"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        user = session.get('user')
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Permission denied'}), 403
+        if model_registry is None:
+            return jsonify({'success': False, 'error': 'Model registry not available'}), 503
+        
+        return jsonify({'success': True, 'models': model_registry.status()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/models/stats', methods=['GET', 'OPTIONS'])
+@require_auth
+def get_model_stats():
+    """
+    Model call statistics: calls, fallback and error rates, latency
+    histograms per execution path and input sizes, plus the inference
+    result cache and Gemini model availability. ?reset=true clears the
+    model counters after reading
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        user = session.get('user')
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Permission denied'}), 403
+        if not model_manager:
+            return jsonify({'success': False, 'error': 'Models not available'}), 503
+        
+        stats = model_manager.get_stats()
+        if request.args.get('reset', 'false').lower() == 'true':
+            model_manager.metrics.reset()
+        return jsonify({
+            'success': True,
+            'models': stats['models'],
+            'since': datetime.fromtimestamp(stats['since']).isoformat(),
+            'inference_cache': inference_cache.stats(),
+            'llm': dict(gemini_api.client.status(), response_cache=gemini_api.cache_stats(),
+                        prompt=gemini_api.prompt_stats())
+                   if GEMINI_AVAILABLE and gemini_api else None,
+            'voice_router': voice_router.stats(),
+            'context_snapshots': context_snapshots.stats(),
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/models/<model_name>/activate', methods=['POST', 'OPTIONS'])
+@require_auth
+def activate_model_version(model_name):
+    """
+    Load a model version in the background and swap it in once warm
+    Body: {"version": "v2"} (default: newest), {"wait": true} to block
+    until the swap is done
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        user = session.get('user')
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Permission denied'}), 403
+        if model_registry is None:
+            return jsonify({'success': False, 'error': 'Model registry not available'}), 503
+        
+        data = request.get_json(silent=True) or {}
+        wait = bool(data.get('wait'))
+        try:
+            result = model_registry.activate(model_name, data.get('version'), background=not wait)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+        except RuntimeError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        
+        if result['state'] == 'failed':
+            return jsonify({'success': False, **result}), 500
+        return jsonify({'success': True, **result}), 200 if wait else 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============================================
 # COUGH DETECTION ENDPOINTS
 # ============================================
@@ -2262,26 +2652,46 @@ def analyze_cough():
                 'error': 'No audio file provided'
             }), 400
             
-        # Process audio file (placeholder for cough detection model)
-        # In production, you would:
-        # 1. Save the audio temporarily
-        # 2. Process it through your cough detection model
-        # 3. Analyze frequency and characteristics
-        # 4. Generate health insights
+        if not model_manager:
+            return jsonify({
+                'success': False,
+                'error': 'Cough detection model not available'
+            }), 503
+        
+        sample_rate = request.form.get('sample_rate', type=int)
+        result = model_manager.detect_cough(audio_file.read(), sample_rate)
+        if 'error' in result:
+            return jsonify({'success': False, 'error': result['error']}), 400
+        
+        coughs_per_minute = result.get('coughs_per_minute', 0)
+        if coughs_per_minute >= 6:
+            frequency, risk_level = 'high', 'high'
+            recommendation = 'Frequent coughing detected. Please contact your doctor.'
+        elif coughs_per_minute >= 2:
+            frequency, risk_level = 'moderate', 'moderate'
+            recommendation = 'Consider scheduling a check-up if cough persists for more than 3 days'
+        else:
+            frequency, risk_level = 'low', 'low'
+            recommendation = 'No significant coughing detected. Keep monitoring.'
+        
+        if result['detected'] and MODULES_AVAILABLE and analytics_engine:
+            analytics_engine.add_data_point(patient_id, 'cough_frequency', result['frequency'])
         
-        # For now, return a sample response
         return jsonify({
             'success': True,
-            'cough_detected': True,
+            'cough_detected': result['detected'],
             'analysis': {
-                'frequency': 'moderate',  # low, moderate, high
-                'type': 'dry',  # dry or wet
-                'severity': 7,  # scale of 1-10
-                'duration': 2.5  # seconds
+                'frequency': frequency,  # low, moderate, high
+                'count': result['frequency'],
+                'coughs_per_minute': round(coughs_per_minute, 2),
+                'severity': min(10, int(round(coughs_per_minute))),  # scale of 0-10
+                'confidence': result['confidence'],
+                'duration': result['duration'],  # mean cough duration in seconds
+                'events': result['events']
             },
             'health_insights': {
-                'risk_level': 'moderate',
-                'recommendation': 'Consider scheduling a check-up if cough persists for more than 3 days'
+                'risk_level': risk_level,
+                'recommendation': recommendation
             },
             'timestamp': datetime.now().isoformat()
         }), 200
@@ -2292,6 +2702,76 @@ def analyze_cough():
             'error': str(e)
         }), 500
 
+def classify_cough_event(event):
+    """Classify one streamed audio event with the cough model"""
+    model = model_manager.get_model('cough_detection') if model_manager else None
+    if model is None:
+        return False, 0.0
+    return model.classify_event(event)
+
+try:
+    from cough_stream import CoughStreamDetector
+    cough_stream_detector = CoughStreamDetector(classifier=classify_cough_event)
+except ImportError as e:
+    print(f"⚠️ Streaming cough detection not available: {e}")
+    cough_stream_detector = None
+
+COUGH_STREAM_READ_BYTES = 32000  # One second of 16 kHz 16-bit PCM
+
+@app.route('/api/detect/cough/stream', methods=['POST', 'OPTIONS'])
+@require_auth
+def detect_cough_stream():
+    """
+    Streaming cough detection
+    The body is raw little-endian 16-bit mono PCM, sent either as one
+    chunk per request or as a single long chunked upload. Query string:
+    patient_id, session_id, sample_rate and final=1 to close the session.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    if cough_stream_detector is None:
+        return jsonify({'success': False, 'error': 'Streaming cough detection not available'}), 503
+    
+    try:
+        patient_id = request.args.get('patient_id', '1')
+        session_id = request.args.get('session_id', patient_id)
+        sample_rate = request.args.get('sample_rate', type=int)
+        final = request.args.get('final', '').lower() in ('1', 'true', 'yes')
+        
+        # Read the body incrementally so long uploads are never held whole
+        events = []
+        while True:
+            block = request.stream.read(COUGH_STREAM_READ_BYTES)
+            if not block:
+                break
+            events.extend(cough_stream_detector.push_pcm(session_id, patient_id, block, sample_rate))
+        
+        if final:
+            finished = cough_stream_detector.finish(session_id)
+            events.extend(finished['events'])
+            session = finished['summary']
+        else:
+            session = cough_stream_detector.session_stats(session_id)
+        
+        if events and MODULES_AVAILABLE and analytics_engine:
+            analytics_engine.add_data_point(patient_id, 'cough_frequency', len(events),
+                                            {'session_id': session_id, 'source': 'stream'})
+        
+        return jsonify({
+            'success': True,
+            'cough_detected': bool(events),
+            'count': len(events),
+            'events': events,
+            'session': session,
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ============================================
 # HEALTH PREDICTION (Future)
 # ============================================
@@ -2312,7 +2792,7 @@ def predict_health_risk():
         vitals = patients_db.get(patient_id, {}).get('vitals', {})
         
         # Use AI model if available
-        if MODELS_AVAILABLE and model_manager:
+        if models_available():
             prediction = model_manager.assess_health_risk(vitals)
         else:
             # Fallback prediction
@@ -2368,23 +2848,17 @@ def get_patients():
                 }), 200
             return jsonify({'error': 'Patient not found'}), 404
         
-        # Get all patients with summarized info
+        # Get all patients with summarized info (risk scored in one batch)
+        population = assess_population_risk()
         patients_list = []
         for pid, patient in patients_db.items():
-            # Basic info
-            patient_summary = {
+            patients_list.append({
                 'id': pid,
                 'name': patient.get('name', ''),
                 'vitals': patient.get('vitals', {}),
-                'risk': calculate_risk_level(patient)
-            }
-            
-            # Count active alerts
-            active_alerts = len([a for a in alerts_db if a.get('patientId') == pid and not a.get('acknowledged')])
-            patient_summary['activeAlerts'] = active_alerts
-            
-            # Add to list
-            patients_list.append(patient_summary)
+                'risk': population[pid]['risk'],
+                'activeAlerts': population[pid]['activeAlerts']
+            })
             
         return jsonify({
             'success': True,
@@ -2434,6 +2908,7 @@ def add_patient():
         # Add to database
         patients_db[patient_id] = patient
         save_json_file(PATIENTS_FILE, patients_db)
+        context_snapshots.refresh(patient_id, 'vitals')
         
         # Create user account for patient if email provided
         if data.get('email'):
@@ -2636,11 +3111,102 @@ def calculate_risk_level(patient):
     active_alerts = [a for a in alerts_db if a.get('patientId') == patient.get('id') and not a.get('acknowledged')]
     if any(a.get('severity') == 'high' for a in active_alerts):
         risk = 'high'
-    elif len(active_alerts) > 2:
-        risk = max(risk, 'medium')
+    elif len(active_alerts) > 2 and risk == 'low':
+        risk = 'medium'
     
     return risk
 
+def assess_population_risk(patient_ids=None):
+    """
+    Risk assessment for many patients in one vectorized batch
+    
+    Args:
+        patient_ids: Patients to assess (default: all)
+    
+    Returns:
+        Dict of patient id -> riskLevel, confidence, factors (as
+        HealthRiskModel.predict), risk (as calculate_risk_level),
+        healthScore (as calculate_health_score) and activeAlerts
+    """
+    patient_ids = list(patients_db) if patient_ids is None else [pid for pid in patient_ids if pid in patients_db]
+    
+    # One pass over alerts instead of one per patient
+    alert_counts, high_alerts = {}, set()
+    for alert in alerts_db:
+        if alert.get('acknowledged'):
+            continue
+        pid = alert.get('patientId')
+        alert_counts[pid] = alert_counts.get(pid, 0) + 1
+        if alert.get('severity') == 'high':
+            high_alerts.add(pid)
+    
+    batch = None
+    if model_manager:
+        import numpy as np
+        from models import HealthRiskModel
+        
+        vitals = [patients_db[pid].get('vitals', {}) for pid in patient_ids]
+        columns = {
+            field: np.array([v.get(field, np.nan) for v in vitals], dtype=np.float64)
+            for field in HealthRiskModel.VITAL_FIELDS
+        }
+        batch = model_manager.assess_health_risk_batch(columns)
+    
+    if batch is None:
+        # Per-patient fallback without the risk model
+        return {
+            pid: {
+                'riskLevel': 'unknown',
+                'confidence': 0.0,
+                'factors': [],
+                'risk': calculate_risk_level(patients_db[pid]),
+                'healthScore': calculate_health_score(pid),
+                'activeAlerts': alert_counts.get(pid, 0)
+            }
+            for pid in patient_ids
+        }
+    
+    levels = HealthRiskModel.RISK_LEVELS
+    results = {}
+    for i, pid in enumerate(patient_ids):
+        risk = levels[batch['triage_level'][i]]
+        if pid in high_alerts:
+            risk = 'high'
+        elif alert_counts.get(pid, 0) > 2 and risk == 'low':
+            risk = 'medium'
+        results[pid] = {
+            'riskLevel': levels[batch['risk_level'][i]],
+            'confidence': float(batch['confidence'][i]),
+            'factors': HealthRiskModel.factor_labels(int(batch['factors'][i])),
+            'risk': risk,
+            # Patients without a vitals record score 0, as in calculate_health_score
+            'healthScore': float(batch['health_score'][i]) if 'vitals' in patients_db[pid] else 0,
+            'activeAlerts': alert_counts.get(pid, 0)
+        }
+    return results
+
+@app.route('/api/patients/risk', methods=['GET', 'OPTIONS'])
+@require_auth
+def get_population_risk():
+    """Risk level, factors and health score for every patient (or ?patient_ids=1,2)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        user = session.get('user')
+        if not user or user.get('role') != 'doctor':
+            return jsonify({'error': 'Permission denied'}), 403
+        
+        ids = request.args.get('patient_ids')
+        population = assess_population_risk(ids.split(',') if ids else None)
+        return jsonify({
+            'success': True,
+            'patients': [{'id': pid, **info} for pid, info in population.items()],
+            'timestamp': datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============================================
 # DAILY SUMMARY ENDPOINTS
 # ============================================
@@ -2923,6 +3489,30 @@ def register_speaker():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/speaker/<user_id>', methods=['DELETE', 'OPTIONS'])
+@require_auth
+def remove_speaker(user_id):
+    """Remove a registered speaker (doctors only)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        user = session.get('user')
+        if not user or user.get('role') != 'doctor':
+            return jsonify({'error': 'Permission denied'}), 403
+        
+        if MODULES_AVAILABLE and speaker_identifier:
+            success = speaker_identifier.remove_speaker(user_id)
+        else:
+            success = False
+        
+        return jsonify({
+            'success': success,
+            'message': 'Speaker removed' if success else 'Speaker not found'
+        }), 200 if success else 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/speaker/identify', methods=['POST', 'OPTIONS'])
 def identify_speaker():
     """Identify speaker from audio"""
@@ -2934,7 +3524,7 @@ def identify_speaker():
         audio_data = data.get('audio')  # Base64 audio
         
         if MODULES_AVAILABLE and speaker_identifier and audio_data:
-            speaker_info = speaker_identifier.identify_speaker(audio_data)
+            speaker_info = speaker_identifier.identify_speaker(audio_data, voice_session_id(data))
         else:
             speaker_info = None
         
@@ -2990,13 +3580,19 @@ def detect_fall():
         return '', 204
     
     try:
-        data = request.get_json()
-        user_id = data.get('user_id', '1')
-        sensor_data = data.get('sensor_data', {})
+        try:
+            sensor_data, user_id = read_sensor_payload('user_id')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if sensor_data is None:
+            sensor_data = {}
         
         # Use fall detection model if available
         fall_result = None
-        if MODELS_AVAILABLE and model_manager:
+        if models_available():
+            # Windows (JSON lists or binary) are reduced to model features first
+            if hasattr(sensor_data, 'shape') or 'accelerometer' in sensor_data:
+                sensor_data = preprocess_sensor_data(sensor_data)
             fall_result = model_manager.detect_fall(sensor_data)
         else:
             # Fallback detection
@@ -3051,15 +3647,33 @@ def detect_cough():
         user_id = data.get('user_id', '1')
         audio_data = data.get('audio_data')  # Base64 or file path
         
+        # Retried uploads of the same clip get the earlier result
+        cough_model = model_manager.get_model('cough_detection') if model_manager else None
+        cache_key = None
+        if cough_model and audio_data:
+            cache_key = inference_cache.key('cough', user_id, cough_model.version, audio_data,
+                                            data.get('sample_rate'))
+            cached = inference_cache.get(cache_key)
+            if cached is not None:
+                return jsonify(dict(cached, cached=True)), 200
+        
         # Use cough detection model if available
         cough_result = None
-        if MODELS_AVAILABLE and model_manager and audio_data:
+        if model_manager and audio_data:
             # Convert base64 to bytes if needed
             if isinstance(audio_data, str) and audio_data.startswith('data:'):
                 import base64
                 audio_data = base64.b64decode(audio_data.split(',')[1])
             
-            cough_result = model_manager.detect_cough(audio_data)
+            from audio_features import compressed_format
+            container = compressed_format(audio_data) if isinstance(audio_data, bytes) else None
+            if container:
+                return jsonify({
+                    'success': False,
+                    'error': f'Unsupported audio format ({container}); send WAV or 16-bit PCM'
+                }), 415
+            
+            cough_result = model_manager.detect_cough(audio_data, data.get('sample_rate'))
         else:
             cough_result = {
                 'detected': False,
@@ -3073,10 +3687,14 @@ def detect_cough():
             analytics_engine.add_data_point(user_id, 'cough_frequency', 
                                            cough_result.get('frequency', 1))
         
-        return jsonify({
+        result = {
             'success': True,
             'cough_detection': cough_result
-        }), 200
+        }
+        # Failed analyses are not cached, so a retry runs again
+        if cache_key is not None and 'error' not in cough_result:
+            inference_cache.put(cache_key, result)
+        return jsonify(result), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -3108,7 +3726,10 @@ if __name__ == '__main__':
     print("   • GET  /api/reminders - Get medicine reminders")
     print("   • POST /api/auth/login - User authentication")
     print("   • POST /api/detect/fall - Detect fall from sensors")
+    print("   • POST /api/detect/fall/stream - Streaming fall detection")
+    print("   • POST /api/admin/models/<name>/activate - Hot-swap a model version")
     print("   • POST /api/detect/cough - Detect cough from audio")
+    print("   • POST /api/detect/cough/stream - Streaming cough detection")
     print("   • GET  /api/summary/morning - Morning health summary")
     print("   • GET  /api/summary/evening - Evening health summary")
     print("   • GET  /api/analytics/patterns - Health pattern analysis")
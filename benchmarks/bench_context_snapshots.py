@@ -0,0 +1,64 @@
+"""
+Benchmark voice context assembly: rebuilt per turn vs prepared snapshot
+
+Fills the reminder and alert lists for many patients and a few
+conversation exchanges each, then times voice_context() with the
+snapshot rebuilt every turn (as before) and read as prepared.
+
+Usage:
+    python benchmarks/bench_context_snapshots.py [--patients 500] [--per-patient 10] [--turns 2000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')  # gemini_integration builds a global client on import
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Voice context snapshot benchmark')
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--per-patient', type=int, default=10, help='Reminders and alerts per patient')
+    parser.add_argument('--turns', type=int, default=2000)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):  # Module banners
+        import backend_template as backend
+    from context_snapshots import context_snapshots
+
+    # In-memory only; nothing is saved
+    users = [f"bench-{i}" for i in range(args.patients)]
+    backend.reminders_db[:] = [{'patientId': user, 'medicine': f"Med {n}", 'dosage': '10mg', 'time': f"{8 + n % 12:02d}:00",
+                                'active': True} for user in users for n in range(args.per_patient)]
+    backend.alerts_db[:] = [{'patientId': user, 'type': 'vitals', 'severity': 'medium', 'message': f"Alert {n}",
+                             'timestamp': '2026-01-01T08:00:00', 'acknowledged': n % 2 == 0}
+                            for user in users for n in range(args.per_patient)]
+    if backend.MODULES_AVAILABLE and backend.context_memory:
+        for user in users:
+            for n in range(3):
+                backend.context_memory.add_exchange(user, f"Question {n}", f"Answer {n}")
+
+    header = f"{'context':>10} {'turns':>7} {'mean us':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, prepare in (('rebuilt', context_snapshots.clear), ('snapshot', lambda: None)):
+        if name == 'snapshot':
+            for user in users:
+                backend.voice_context(user)  # Built once; later turns read it as prepared
+        start = time.perf_counter()
+        for turn in range(args.turns):
+            prepare()
+            backend.voice_context(users[turn % len(users)])
+        mean_us = (time.perf_counter() - start) / args.turns * 1e6
+        print(f"{name:>10} {args.turns:>7} {mean_us:>9.1f}")
+    print(context_snapshots.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""
+Evaluate the fall detection pipeline on synthetic IMU windows
+
+Generates labelled accelerometer/gyroscope windows (still, walking,
+sitting down, near-falls and falls) at the requested sample rates, runs
+them through preprocessing, the rule-based detector and the model
+strategies of FallDetectionModel.fall_probability (rf, cnn, ensemble,
+cascade), and reports latency percentiles, sensor samples per second and
+precision/recall.
+
+Acceleration is generated gravity-removed (linear acceleration), which
+is what the rule-based thresholds expect; --gravity adds 1 g on z.
+
+Results can be saved as a baseline and later runs (e.g. another model
+version) compared against it; the script exits with status 1 when a
+pipeline got slower than the tolerance or lost recall/precision.
+
+Without model files, --fit-synthetic trains a throwaway Random Forest
+on a separate synthetic set so the model strategies can be exercised.
+Its accuracy says nothing about the real model.
+
+Usage:
+    python benchmarks/bench_fall_eval.py [--sample-rates 50 100] [--windows 400]
+        [--model-dir models/fall] [--model-version v2] [--fit-synthetic 2000]
+        [--save-baseline fall_baseline.json | --baseline fall_baseline.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fall_features import AXES, extract_features, rule_based_decision, stack_sensor_data
+
+GRAVITY = 9.81
+FALL_THRESHOLD = 0.7  # As in /api/detect/fall
+ACTIVITIES = ('still', 'walking', 'sit_down', 'near_fall', 'fall')
+FALL_SHARE = 0.25  # Remaining windows are split evenly across the other activities
+STRATEGY_MODELS = {
+    'rf': ('rf_model',),
+    'cnn': ('cnn_model',),
+    'ensemble': ('rf_model', 'cnn_model'),
+    'cascade': ('rf_model', 'cnn_model'),
+}
+
+
+def _pulse(t: np.ndarray, center: float, width: float) -> np.ndarray:
+    """Gaussian bump of height 1"""
+    return np.exp(-0.5 * ((t - center) / width) ** 2)
+
+
+def _gait(t: np.ndarray, rng, acc: np.ndarray, gyro: np.ndarray, mask=None):
+    """Add periodic walking motion (optionally only where mask is set)"""
+    cadence = rng.uniform(1.6, 2.2)  # Steps per second
+    amplitude = rng.uniform(1.5, 3.5)
+    phase = rng.uniform(0, 2 * np.pi)
+    weight = 1.0 if mask is None else mask
+    acc[2] += weight * amplitude * np.sin(2 * np.pi * cadence * t + phase)
+    acc[0] += weight * 0.5 * amplitude * np.sin(np.pi * cadence * t + phase)
+    gyro[1] += weight * 0.8 * np.sin(np.pi * cadence * t + phase)
+
+
+def synthetic_window(activity: str, seconds: float, sample_rate: int, rng,
+                     gravity: bool = False) -> np.ndarray:
+    """
+    One (6, N) float32 IMU window (acc x/y/z in m/s^2, gyro x/y/z in rad/s)
+
+    Args:
+        activity: One of ACTIVITIES. Falls start with a free-fall phase,
+            peak at a 30-70 m/s^2 impact and end lying still. Near-falls
+            stumble (partial free fall, 12-22 m/s^2 jolt) and keep walking.
+    """
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    acc = rng.normal(0.0, 0.15, size=(3, n))
+    gyro = rng.normal(0.0, 0.05, size=(3, n))
+
+    if activity == 'walking':
+        _gait(t, rng, acc, gyro)
+    elif activity == 'sit_down':
+        center = rng.uniform(0.3, 0.7) * seconds
+        acc[2] += rng.uniform(4.0, 8.0) * _pulse(t, center, 0.15)
+        gyro[0] += rng.uniform(0.5, 1.5) * _pulse(t, center, 0.2)
+    elif activity in ('fall', 'near_fall'):
+        onset = rng.uniform(0.1, 0.35) * seconds
+        falling = activity == 'fall'
+        free_fall = rng.uniform(0.3, 0.5) if falling else rng.uniform(0.08, 0.15)
+        impact = onset + free_fall
+        if falling:
+            # Walking (or standing) before, lying still after the impact
+            if rng.random() < 0.5:
+                _gait(t, rng, acc, gyro, mask=(t < onset).astype(float))
+            acc[:, t > impact + 0.3] *= 0.5
+        else:
+            _gait(t, rng, acc, gyro)
+
+        in_free_fall = (t >= onset) & (t < impact)
+        acc[2, in_free_fall] -= GRAVITY * (1.0 if falling else 0.5)
+        direction = rng.normal(size=3)
+        direction /= np.linalg.norm(direction)
+        peak = rng.uniform(30.0, 70.0) if falling else rng.uniform(12.0, 22.0)
+        # At least two samples wide, so low sample rates still see the peak
+        width = max(0.02, 1.0 / sample_rate)
+        acc += direction[:, None] * peak * _pulse(t, impact, width)[None, :]
+        spin = rng.normal(size=3)
+        gyro += (spin / np.linalg.norm(spin))[:, None] * rng.uniform(2.0, 5.0) * \
+            _pulse(t, onset + free_fall / 2, free_fall / 2 + 0.05)[None, :]
+    elif activity != 'still':
+        raise ValueError(f"Unknown activity: {activity}")
+
+    if gravity:
+        acc[2] += GRAVITY
+    return np.vstack((acc, gyro)).astype(np.float32)
+
+
+def make_dataset(count: int, seconds: float, sample_rate: int, rng, gravity: bool = False):
+    """Shuffled windows and labels (1 = fall), FALL_SHARE of them falls"""
+    falls = int(round(count * FALL_SHARE))
+    others = [a for a in ACTIVITIES if a != 'fall']
+    activities = ['fall'] * falls + [others[i % len(others)] for i in range(count - falls)]
+    rng.shuffle(activities)
+    windows = [synthetic_window(a, seconds, sample_rate, rng, gravity) for a in activities]
+    labels = np.array([a == 'fall' for a in activities])
+    return windows, labels, activities
+
+
+def to_sensor_json(matrix: np.ndarray) -> dict:
+    """The JSON 'sensor_data' form devices send"""
+    sensor_data = {'accelerometer': {}, 'gyroscope': {}}
+    for row, (sensor, axis) in enumerate(AXES):
+        sensor_data[sensor][axis] = matrix[row].tolist()
+    return sensor_data
+
+
+def load_fall_model(model_dir: str, version: str = None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        from models import FallDetectionModel
+        from model_registry import resolve_version
+        version, path = resolve_version(model_dir, version)
+        model = FallDetectionModel(model_path=path)
+        model.version = version
+        model.load_model()
+    return model
+
+
+def fit_synthetic_model(model, count: int, seconds: float, sample_rate: int, gravity: bool):
+    """Train a demo RF + scaler on synthetic windows (separate seed)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    windows, labels, _ = make_dataset(count, seconds, sample_rate, np.random.default_rng(12345), gravity)
+    features = np.array([extract_features(w) for w in windows])
+    model.scaler = StandardScaler().fit(features)
+    model.rf_model = RandomForestClassifier(n_estimators=100, random_state=0).fit(
+        model.scaler.transform(features), labels.astype(int))
+    model.version = 'synthetic-fit'
+    model.is_loaded = True
+
+
+def run_pipeline(name: str, windows, model=None):
+    """Predictions and per-window latency (ms) of one pipeline"""
+    if name == 'preprocess':
+        inputs = [to_sensor_json(w) for w in windows]
+        step = lambda data: extract_features(stack_sensor_data(data)) is None
+    elif name == 'rule_based':
+        inputs = windows
+        step = lambda matrix: rule_based_decision(stack_sensor_data(matrix))[0]
+    else:
+        inputs = windows
+        def step(matrix):
+            result = model.fall_probability(extract_features(stack_sensor_data(matrix)), strategy=name)
+            return result['probability'] is not None and result['probability'] > FALL_THRESHOLD
+
+    step(inputs[0])  # Warm-up
+    predictions = np.empty(len(inputs), dtype=bool)
+    latencies = np.empty(len(inputs))
+    for i, data in enumerate(inputs):
+        start = time.perf_counter()
+        predictions[i] = step(data)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return predictions, latencies
+
+
+def score(predictions, labels, activities, latencies, samples: int) -> dict:
+    tp = int(np.sum(predictions & labels))
+    fp = int(np.sum(predictions & ~labels))
+    fn = int(np.sum(~predictions & labels))
+    activities = np.array(activities)
+    false_alarms = {a: float(predictions[activities == a].mean()) for a in ACTIVITIES if a != 'fall'}
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'samples_per_second': samples * len(latencies) / (latencies.sum() / 1000),
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'false_alarm_rate': false_alarms
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float, max_drop: float):
+    """Regressions of results against a baseline, as printable strings"""
+    problems = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                problems.append(f"{key}: {metric} {before:.3f} -> {after:.3f} ms (+{(after / before - 1) * 100:.0f}%)")
+        if key.endswith('/preprocess'):
+            continue
+        for metric in ('precision', 'recall'):
+            if current[metric] < previous[metric] - max_drop:
+                problems.append(f"{key}: {metric} {previous[metric]:.3f} -> {current[metric]:.3f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fall detection evaluation harness')
+    parser.add_argument('--sample-rates', type=int, nargs='+', default=[50, 100])
+    parser.add_argument('--seconds', type=float, default=3.0, help='Window length')
+    parser.add_argument('--windows', type=int, default=400, help='Windows per sample rate')
+    parser.add_argument('--gravity', action='store_true', help='Include gravity in acceleration')
+    parser.add_argument('--model-dir', default=os.path.join(ROOT, 'models', 'fall'))
+    parser.add_argument('--model-version', help='Version directory to evaluate (default: newest)')
+    parser.add_argument('--fit-synthetic', type=int, metavar='N',
+                        help='Train a demo RF on N synthetic windows when no RF model is loaded')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--baseline', metavar='FILE')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency increase (fraction)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.02, help='Ignore smaller latency changes')
+    parser.add_argument('--max-drop', type=float, default=0.02, help='Allowed precision/recall drop')
+    args = parser.parse_args()
+
+    model = load_fall_model(args.model_dir, args.model_version)
+    if args.fit_synthetic and model.rf_model is None:
+        fit_synthetic_model(model, args.fit_synthetic, args.seconds, args.sample_rates[0], args.gravity)
+    strategies = [s for s, needs in STRATEGY_MODELS.items()
+                  if all(getattr(model, attr) is not None for attr in needs)]
+    pipelines = ['preprocess', 'rule_based'] + strategies
+    results = {}
+    print(f"Model version: {model.version} (RF {'loaded' if model.rf_model is not None else 'missing'}, "
+          f"CNN {'loaded' if model.cnn_model is not None else 'missing'})")
+    skipped = [s for s in STRATEGY_MODELS if s not in strategies]
+    if skipped:
+        print(f"Skipped (model not loaded): {', '.join(skipped)}")
+
+    header = (f"{'rate':>5} {'pipeline':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'samples/s':>11} {'precision':>9} {'recall':>7}  false alarms")
+    for sample_rate in args.sample_rates:
+        rng = np.random.default_rng(args.seed)
+        windows, labels, activities = make_dataset(args.windows, args.seconds, sample_rate, rng, args.gravity)
+
+        print()
+        print(header)
+        print('-' * len(header))
+        for name in pipelines:
+            predictions, latencies = run_pipeline(name, windows, model)
+            result = score(predictions, labels, activities, latencies, windows[0].shape[1])
+            results[f"{sample_rate}/{name}"] = result
+            accuracy = '' if name == 'preprocess' else \
+                f"{result['precision']:>9.3f} {result['recall']:>7.3f}  " + \
+                ' '.join(f"{a}={rate:.2f}" for a, rate in result['false_alarm_rate'].items())
+            print(f"{sample_rate:>5} {name:>10} {result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} "
+                  f"{result['p99_ms']:>8.3f} {result['samples_per_second']:>11.0f} {accuracy}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'model_version': model.version, 'results': results}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline['results'], args.tolerance, args.min_delta_ms, args.max_drop)
+        print(f"\nCompared with baseline (model version {baseline.get('model_version')}):")
+        if problems:
+            for problem in problems:
+                print(f"  REGRESSION {problem}")
+            sys.exit(1)
+        print("  no regressions")
+
+
+if __name__ == '__main__':
+    main()
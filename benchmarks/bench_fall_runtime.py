@@ -0,0 +1,118 @@
+"""
+Benchmark the CNN fall detector on every exported runtime
+
+Each runtime is measured in a fresh subprocess so load time and resident
+memory are not polluted by the other runtimes (or by TensorFlow).
+
+Usage:
+    python benchmarks/bench_fall_runtime.py [--model-dir models/fall] [--repeats 200]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 1024.0 if sys.platform != 'darwin' else peak / (1024.0 * 1024.0)
+
+
+def run_child(model_dir: str, runtime_name: str, quantization: str, repeats: int) -> dict:
+    """Load one runtime and measure it (runs inside the subprocess)"""
+    import numpy as np
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    from cnn_runtime import RUNTIME_CLASSES, RUNTIME_FILES, load_reference
+    runtime = RUNTIME_CLASSES[runtime_name](
+        os.path.join(model_dir, RUNTIME_FILES[(runtime_name, quantization)]), quantization
+    )
+    load_ms = (time.perf_counter() - start) * 1000.0
+
+    reference = load_reference(model_dir)
+    if reference is not None:
+        inputs = reference['inputs']
+    else:
+        shape = tuple(d or 1 for d in runtime.input_shape[1:])
+        inputs = np.random.default_rng(0).normal(size=(64,) + shape).astype(np.float32)
+
+    sample = inputs[:1]
+    runtime.predict(sample)
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        runtime.predict(sample)
+        timings.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    outputs = runtime.predict(inputs)
+    batch_ms = (time.perf_counter() - t0) * 1000.0
+
+    result = {
+        'runtime': runtime_name,
+        'quantization': quantization,
+        'load_ms': round(load_ms, 1),
+        'rss_delta_mb': round(_rss_mb() - rss_before, 1),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'batch_size': int(inputs.shape[0]),
+        'batch_ms': round(batch_ms, 3),
+    }
+    if reference is not None:
+        result['max_abs_error'] = float(np.max(np.abs(outputs - reference['outputs'])))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CNN fall detector runtime benchmark')
+    parser.add_argument('--model-dir', default=os.path.join(ROOT, 'models', 'fall'))
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--child', nargs=2, metavar=('RUNTIME', 'QUANTIZATION'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.model_dir, args.child[0], args.child[1], args.repeats)))
+        return
+
+    from cnn_runtime import RUNTIME_FILES
+
+    results = []
+    for (runtime_name, quantization), filename in RUNTIME_FILES.items():
+        if not os.path.exists(os.path.join(args.model_dir, filename)):
+            continue
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--model-dir', args.model_dir,
+             '--repeats', str(args.repeats), '--child', runtime_name, quantization],
+            capture_output=True, text=True
+        )
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"⚠️ {runtime_name} ({quantization}) failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    if not results:
+        print(f"No CNN runtime files found in {args.model_dir}. Run model_export.py first.")
+        return
+
+    header = f"{'runtime':<8} {'quant':<8} {'load ms':>9} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch ms':>9} {'max err':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        err = f"{r['max_abs_error']:.2e}" if 'max_abs_error' in r else 'n/a'
+        print(f"{r['runtime']:<8} {r['quantization']:<8} {r['load_ms']:>9} {r['rss_delta_mb']:>8} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['batch_ms']:>9} {err:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark batched health risk scoring against per-patient calls
+
+Generates a synthetic patient population (including out-of-range and
+missing vitals), checks that HealthRiskModel.predict_batch agrees with
+the per-patient rules, and times both.
+
+Usage:
+    python benchmarks/bench_health_risk.py [--patients 10 100 1000 10000 100000]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from models import HealthRiskModel
+
+FIELDS = HealthRiskModel.VITAL_FIELDS
+
+
+def health_score(vitals):
+    """calculate_health_score from the backend, for one vitals dict"""
+    scores = []
+    hr = vitals.get('heartRate', 80)
+    scores.append(100 if 60 <= hr <= 100 else max(0, 100 - abs(hr - 80)))
+    temp = vitals.get('temperature', 98.6)
+    scores.append(100 if 97 <= temp <= 99 else max(0, 100 - abs(temp - 98.6) * 10))
+    o2 = vitals.get('oxygen', 98)
+    scores.append(100 if 95 <= o2 <= 100 else max(0, o2))
+    sys_, dia = vitals.get('systolic', 120), vitals.get('diastolic', 80)
+    if 90 <= sys_ <= 120 and 60 <= dia <= 80:
+        scores.append(100)
+    else:
+        scores.append(max(0, 100 - (abs(sys_ - 120) / 2 + abs(dia - 80))))
+    return sum(scores) / len(scores)
+
+
+def triage(vitals):
+    """Vitals part of the backend's calculate_risk_level"""
+    hr, temp, oxygen = vitals.get('heartRate', 72), vitals.get('temperature', 98.6), vitals.get('oxygen', 98)
+    if hr > 100 or hr < 60 or temp > 100.4 or oxygen < 95:
+        return 'high'
+    if hr > 90 or hr < 65 or temp > 99.5 or oxygen < 97:
+        return 'medium'
+    return 'low'
+
+
+def make_population(count: int, rng):
+    matrix = np.stack([
+        rng.normal(80, 15, count).round(),
+        rng.normal(98.6, 1.0, count).round(1),
+        rng.normal(97, 2.5, count).round(),
+        rng.normal(125, 18, count).round(),
+        rng.normal(80, 10, count).round()
+    ])
+    matrix[rng.random(matrix.shape) < 0.05] = np.nan  # Unmeasured values
+    patients = [{field: float(matrix[row, i]) for row, field in enumerate(FIELDS)
+                 if not np.isnan(matrix[row, i])} for i in range(count)]
+    return matrix, patients
+
+
+def per_patient(model, patients):
+    return [(model._assess_risk_rule_based(v), triage(v), health_score(v)) for v in patients]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched health risk benchmark')
+    parser.add_argument('--patients', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    model = HealthRiskModel()
+    rng = np.random.default_rng(0)
+
+    matrix, patients = make_population(5000, rng)
+    batch = model.predict_batch(matrix)
+    for i, (risk, level, score) in enumerate(per_patient(model, patients)):
+        assert HealthRiskModel.RISK_LEVELS[batch['risk_level'][i]] == risk['riskLevel']
+        assert HealthRiskModel.factor_labels(int(batch['factors'][i])) == risk['factors']
+        assert HealthRiskModel.RISK_LEVELS[batch['triage_level'][i]] == level
+        assert abs(batch['health_score'][i] - score) < 1e-9
+    print("Batch results match per-patient rules on 5000 patients")
+
+    header = f"{'patients':>9} {'per-patient ms':>15} {'batch ms':>9} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+    for count in args.patients:
+        matrix, patients = make_population(count, rng)
+        start = time.perf_counter()
+        per_patient(model, patients)
+        loop_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        model.predict_batch(matrix)
+        batch_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>9} {loop_ms:>15.2f} {batch_ms:>9.2f} {loop_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
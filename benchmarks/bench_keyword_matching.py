@@ -0,0 +1,179 @@
+"""
+Benchmark keyword matching across the voice pipeline's rule-based paths
+
+One utterance goes through detect_intent, generate_ai_response, the
+Gemini fallback response and health-context analysis, and the mood
+model. The original implementations each lower-cased and re-scanned
+the text; the current ones share one memoized scan via text_matcher.
+
+The gain is memoization only: a text seen for the first time ('fresh')
+costs about what the original scans did, and repeated texts ('repeated':
+retries, the same utterance checked again) skip the scan. A single-pass
+regex (keywords merged into a trie-shaped alternation, run over the
+lower-cased text) is timed for reference.
+
+Usage:
+    python benchmarks/bench_keyword_matching.py [--lengths 100 1000 10000]
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import backend_template as backend
+    from gemini_integration import gemini_api
+    from models import model_manager
+from text_matcher import keyword_matcher, RESULT_CACHE_SIZE
+
+mood_model = model_manager.get_model('mood_analysis')
+
+FILLER = ("the patient said that yesterday they walked to the store and felt something "
+          "in their back after lunch with family today is sunny and warm outside").split()
+KEYWORDS = sorted(keyword_matcher.vocabulary)
+
+
+def legacy_pipeline(text, vitals):
+    """Original per-caller scans, kept for comparison"""
+    lower = text.lower()
+    results = []
+    intent = 'general'
+    for name, words in [('emergency', ['help', 'emergency', 'urgent']),
+                        ('medication', ['medicine', 'medication', 'pill']),
+                        ('pain', ['pain', 'hurt', 'ache']),
+                        ('appointment', ['doctor', 'appointment']),
+                        ('vitals', ['temperature', 'fever', 'vitals'])]:
+        if any(word in lower for word in words):
+            intent = name
+            break
+    results.append(intent)
+
+    lower = text.lower()
+    response = None
+    for words in (['help', 'emergency'], ['medicine', 'medication'], ['temperature'], ['doctor'], ['pain']):
+        if any(word in lower for word in words):
+            response = words[0]
+            break
+    results.append(response)
+
+    lower = text.lower()
+    checks = [('oxygen' in lower or 'o2' in lower), ('heart rate' in lower or 'pulse' in lower),
+              ('temperature' in lower or 'temp' in lower), ('blood pressure' in lower or 'bp' in lower),
+              ('remind' in lower or 'medication' in lower or 'medicine' in lower),
+              ('help' in lower or 'emergency' in lower), ('how' in lower and 'health' in lower)]
+    results.append(checks.index(True) if True in checks else None)
+
+    lower = text.lower()
+    health_intent = 'general_question'
+    if any(word in lower for word in ['oxygen', 'heart', 'temp', 'vital']):
+        health_intent = 'check_vitals'
+    elif any(word in lower for word in ['remind', 'medication']):
+        health_intent = 'medication_reminder'
+    elif any(word in lower for word in ['help', 'emergency']):
+        health_intent = 'emergency'
+    results.append(health_intent)
+
+    lower = text.lower()
+    results.append({emotion: sum(1 for keyword in keywords if keyword in lower)
+                    for emotion, keywords in mood_model.emotion_keywords.items()})
+    return results
+
+
+def current_pipeline(text, vitals):
+    backend.detect_intent(text)
+    backend.generate_ai_response(text)
+    gemini_api._get_fallback_response(text, {'vitals': vitals})
+    gemini_api._analyze_health_context_fallback(text, vitals)
+    return mood_model._analyze_text(text)['emotion_scores']
+
+
+def make_text(length: int, rng: random.Random) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(KEYWORDS) if rng.random() < 0.01 else rng.choice(FILLER))
+    return ' '.join(words).capitalize()
+
+
+def check_equivalence(rng: random.Random):
+    """Current functions must agree with the original scans"""
+    vitals = {'heartRate': 72, 'oxygen': 97}
+    for _ in range(2000):
+        words = [rng.choice(KEYWORDS + FILLER).upper() if rng.random() < 0.3 else rng.choice(FILLER)
+                 for _ in range(rng.randint(1, 8))]
+        text = rng.choice(['', ' ', 'x']).join(words)
+        assert legacy_pipeline(text, vitals)[4] == current_pipeline(text, vitals), text
+        legacy_intent = legacy_pipeline(text, vitals)[0]
+        assert backend.detect_intent(text) == legacy_intent, text
+        assert gemini_api._analyze_health_context_fallback(text, vitals)['intent'] == \
+            legacy_pipeline(text, vitals)[3], text
+
+
+def trie_pattern(keywords) -> str:
+    """Alternation of keywords with shared prefixes merged, so re tries one branch per next character"""
+    root = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(root)
+
+
+def time_ms(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keyword matching benchmark')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    check_equivalence(rng)
+    vitals = {'heartRate': 72, 'oxygen': 97}
+    # Lookahead, so overlapping and nested keywords are all found
+    alternation = re.compile('(?=(' + trie_pattern(KEYWORDS) + '))')
+
+    print(f"Vocabulary: {len(KEYWORDS)} keywords")
+    header = (f"{'chars':>7} {'legacy ms':>10} {'fresh ms':>9} {'speedup':>8} "
+              f"{'repeated ms':>12} {'speedup':>8} {'regex ms':>9}")
+    print(header)
+    print('-' * len(header))
+    for length in args.lengths:
+        # At most RESULT_CACHE_SIZE texts, so the repeated pass finds them all memoized
+        texts = [make_text(length, rng) for _ in range(min(args.repeats, RESULT_CACHE_SIZE))]
+        legacy = time_ms(lambda: [legacy_pipeline(t, vitals) for t in texts], 1) / len(texts)
+        # Fresh texts: the first caller scans, the other four reuse its result
+        keyword_matcher._results.clear()
+        fresh = time_ms(lambda: [current_pipeline(t, vitals) for t in texts], 1) / len(texts)
+        # Same texts again: retries and repeated utterances skip the scan
+        repeated = time_ms(lambda: [current_pipeline(t, vitals) for t in texts], 1) / len(texts)
+        regex = time_ms(lambda: [set(alternation.findall(t.lower())) for t in texts], 1) / len(texts)
+        print(f"{length:>7} {legacy:>10.3f} {fresh:>9.3f} {legacy / fresh:>7.1f}x "
+              f"{repeated:>12.3f} {legacy / repeated:>7.1f}x {regex:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
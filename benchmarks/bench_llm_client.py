@@ -0,0 +1,99 @@
+"""
+Benchmark Gemini calls: per-call requests.post vs the pooled LLMClient
+
+The local stand-in server (gemini_standin) answers generateContent
+after a fixed delay. The first configured model answers 404, as an
+unavailable model would.
+The original code opened a new connection per call and retried the
+missing model every time; the pooled client keeps one warm connection
+and remembers the 404.
+
+Plain HTTP on localhost has no TLS handshake and almost no round-trip
+time, so real savings against the Gemini API are larger than shown.
+
+Usage:
+    python benchmarks/bench_llm_client.py [--calls 200] [--delay-ms 5] [--threads 1 8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_client import LLMClient
+from gemini_standin import StandInServer
+
+MODELS = ['gemini-2.5-flash', 'gemini-pro']  # The stand-in answers 404 for the first
+
+
+def legacy_call(base_url: str, prompt: str) -> str:
+    """Original per-call loop: new connection, every model in order"""
+    for model in MODELS:
+        response = requests.post(f"{base_url}/{model}:generateContent?key=benchmark",
+                                 headers={'Content-Type': 'application/json'},
+                                 json={'contents': [{'parts': [{'text': prompt}]}]}, timeout=10)
+        if response.ok:
+            return response.json()['candidates'][0]['content']['parts'][0]['text']
+        if response.status_code in (404, 400):
+            continue
+        break
+    return ''
+
+
+def run(server: StandInServer, call, calls: int, threads: int):
+    server.connections = server.requests = 0
+    latencies = []
+
+    def timed(i):
+        start = time.perf_counter()
+        assert call(f"prompt {i}") == 'Stay hydrated.'
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'calls_per_second': calls / elapsed,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95)],
+        'requests': server.requests,
+        'connections': server.connections
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pooled LLM client benchmark')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--delay-ms', type=float, default=5.0, help='Stand-in model latency')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    server = StandInServer(args.delay_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1beta/models"
+
+    header = f"{'threads':>7} {'client':>8} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'requests':>9} {'connections':>12}"
+    print(header)
+    print('-' * len(header))
+    for threads in args.threads:
+        client = LLMClient('benchmark', MODELS, base_url=base_url, pool_size=max(threads, 1))
+        for name, call in (('legacy', lambda p: legacy_call(base_url, p)), ('pooled', client.generate)):
+            result = run(server, call, args.calls, threads)
+            print(f"{threads:>7} {name:>8} {result['calls_per_second']:>9.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p95_ms']:>8.2f} {result['requests']:>9} {result['connections']:>12}")
+        client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
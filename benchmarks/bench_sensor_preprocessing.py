@@ -0,0 +1,98 @@
+"""
+Benchmark fall detection preprocessing: JSON lists vs packed float32
+
+Compares the original per-axis preprocessing over JSON float lists with
+the vectorized fall_features path, fed either by JSON or by a binary
+(6 x N) float32 body decoded with np.frombuffer.
+
+Usage:
+    python benchmarks/bench_sensor_preprocessing.py [--windows 50 100 200 1000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fall_features import AXES, decode_sensor_payload, extract_features, stack_sensor_data
+
+
+def legacy_preprocess(sensor_data):
+    """Original preprocess_sensor_data implementation, kept for comparison"""
+    acc_x = sensor_data.get('accelerometer', {}).get('x', [])
+    acc_y = sensor_data.get('accelerometer', {}).get('y', [])
+    acc_z = sensor_data.get('accelerometer', {}).get('z', [])
+    gyro_x = sensor_data.get('gyroscope', {}).get('x', [])
+    gyro_y = sensor_data.get('gyroscope', {}).get('y', [])
+    gyro_z = sensor_data.get('gyroscope', {}).get('z', [])
+
+    acc_mag = np.sqrt(np.array(acc_x)**2 + np.array(acc_y)**2 + np.array(acc_z)**2)
+    return np.array([
+        np.mean(acc_mag), np.std(acc_mag), np.max(acc_mag),
+        np.mean(acc_x), np.mean(acc_y), np.mean(acc_z),
+        np.std(acc_x), np.std(acc_y), np.std(acc_z),
+        np.mean(gyro_x), np.mean(gyro_y), np.mean(gyro_z),
+        np.std(gyro_x), np.std(gyro_y), np.std(gyro_z)
+    ])
+
+
+def make_window(samples: int, rng) -> np.ndarray:
+    matrix = rng.normal(scale=2.0, size=(6, samples)).astype(np.float32)
+    matrix[2] += 9.81
+    return matrix
+
+
+def to_json_body(matrix: np.ndarray) -> bytes:
+    sensor_data = {'accelerometer': {}, 'gyroscope': {}}
+    for row, (sensor, axis) in enumerate(AXES):
+        sensor_data[sensor][axis] = [float(v) for v in matrix[row]]
+    return json.dumps({'sensor_data': sensor_data, 'patient_id': '1'}).encode()
+
+
+def time_per_call(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sensor preprocessing benchmark')
+    parser.add_argument('--windows', type=int, nargs='+', default=[50, 100, 200, 1000])
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    header = f"{'samples':>8} {'json bytes':>11} {'bin bytes':>10} {'legacy us':>10} {'json+vec us':>12} {'binary us':>10} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+
+    for samples in args.windows:
+        matrix = make_window(samples, rng)
+        json_body = to_json_body(matrix)
+        binary_body = matrix.astype('<f4').tobytes()
+
+        legacy = lambda: legacy_preprocess(json.loads(json_body)['sensor_data'])
+        vectorized = lambda: extract_features(stack_sensor_data(json.loads(json_body)['sensor_data']))
+        binary = lambda: extract_features(decode_sensor_payload(binary_body))
+
+        # Both paths must produce the same features
+        assert np.allclose(legacy(), vectorized(), rtol=1e-5, atol=1e-5)
+        assert np.allclose(vectorized(), binary(), rtol=1e-4, atol=1e-4)
+
+        legacy_us = time_per_call(legacy, args.repeats)
+        vectorized_us = time_per_call(vectorized, args.repeats)
+        binary_us = time_per_call(binary, args.repeats)
+        print(f"{samples:>8} {len(json_body):>11} {len(binary_body):>10} {legacy_us:>10.1f} "
+              f"{vectorized_us:>12.1f} {binary_us:>10.1f} {legacy_us / binary_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark single-flight coalescing of identical concurrent prompts
+
+Bursts of callers send the same prompt at the same moment, as a patient
+device and a caretaker asking the same thing, or a double-submitted
+request. Without coalescing every caller makes its own upstream
+request; with it, each burst makes one.
+
+Usage:
+    python benchmarks/bench_single_flight.py [--bursts 20] [--callers 8] [--delay-ms 50]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_llm_client import MODELS
+from gemini_standin import StandInServer
+from llm_client import LLMClient
+
+
+def run(server: StandInServer, call, bursts: int, callers: int):
+    server.requests = 0
+    latencies = []
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        for burst in range(bursts):
+            barrier = threading.Barrier(callers)
+
+            def caller(_):
+                barrier.wait()
+                start = time.perf_counter()
+                assert call(f"How is my blood pressure today? ({burst})") == 'Stay hydrated.'
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            list(pool.map(caller, range(callers)))
+    latencies.sort()
+    return {
+        'requests': server.requests,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-flight coalescing benchmark')
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--callers', type=int, default=8, help='Identical concurrent calls per burst')
+    parser.add_argument('--delay-ms', type=float, default=50.0, help='Stand-in model latency')
+    args = parser.parse_args()
+
+    server = StandInServer(args.delay_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = LLMClient('benchmark', MODELS, base_url=f"http://127.0.0.1:{server.server_address[1]}/v1beta/models",
+                       pool_size=args.callers)
+    client.generate('warm up')  # Learn the missing model before counting
+
+    header = f"{'client':>12} {'calls':>7} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8}"
+    print(header)
+    print('-' * len(header))
+    calls = args.bursts * args.callers
+    for name, call in (('independent', lambda p: client._generate(p, None, None)), ('coalesced', client.generate)):
+        result = run(server, call, args.bursts, args.callers)
+        print(f"{name:>12} {calls:>7} {result['requests']:>9} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}")
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
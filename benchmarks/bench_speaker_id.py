@@ -0,0 +1,93 @@
+"""
+Benchmark speaker matching as the number of enrolled voices grows
+
+Compares a per-profile Python loop with the vectorized profile matrix
+in SpeakerIdentifier.rank_speakers, and times in-place registration
+and removal.
+
+Usage:
+    python benchmarks/bench_speaker_id.py [--speakers 10 100 1000 10000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from speaker_identification import SpeakerIdentifier
+from voice_features import EMBEDDING_SIZE
+
+
+def loop_best_match(query, identifier):
+    """One profile at a time in Python, as identify_speaker used to do"""
+    best_match, best_score = None, -1.0
+    for user_id, profile in identifier.speaker_profiles.items():
+        score = float(np.dot(query, identifier._profile_vector(profile['features'])))
+        if score > best_score:
+            best_score, best_match = score, user_id
+    return best_match
+
+
+def random_features(rng):
+    embedding = rng.normal(size=EMBEDDING_SIZE)
+    return {'embedding': embedding / np.linalg.norm(embedding)}
+
+
+def time_per_call(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Speaker matching benchmark')
+    parser.add_argument('--speakers', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    header = f"{'speakers':>9} {'loop us':>10} {'matrix us':>10} {'speedup':>8} {'add us':>8} {'remove us':>10}"
+    print(header)
+    print('-' * len(header))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.speakers:
+            identifier = SpeakerIdentifier()
+            identifier.profiles_file = os.path.join(tmp, 'profiles.json')
+            identifier.speaker_profiles = {
+                f"user{i}": {'role': 'patient', 'features': random_features(rng)}
+                for i in range(count)
+            }
+            identifier._rebuild_matrix()
+            query = random_features(rng)
+
+            assert identifier.rank_speakers(query, top_k=1)[0]['user_id'] == \
+                loop_best_match(query['embedding'], identifier)
+
+            loop_us = time_per_call(lambda: loop_best_match(query['embedding'], identifier), args.repeats)
+            matrix_us = time_per_call(lambda: identifier.rank_speakers(query, top_k=5), args.repeats)
+
+            # Matrix maintenance only; register/remove also persist profiles to disk
+            start = time.perf_counter()
+            for i in range(args.repeats):
+                identifier._set_profile_row(f"new{i}", random_features(rng))
+            add_us = (time.perf_counter() - start) / args.repeats * 1e6
+            start = time.perf_counter()
+            for i in range(args.repeats):
+                identifier._delete_profile_row(f"new{i}")
+            remove_us = (time.perf_counter() - start) / args.repeats * 1e6
+
+            print(f"{count:>9} {loop_us:>10.1f} {matrix_us:>10.1f} {loop_us / matrix_us:>7.1f}x "
+                  f"{add_us:>8.1f} {remove_us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
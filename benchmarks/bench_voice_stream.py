@@ -0,0 +1,78 @@
+"""
+Benchmark time to first sentence: blocking generateContent vs streaming
+
+The stand-in server (gemini_standin) produces a three-sentence
+answer one piece per delay, as a model generates tokens. The blocking
+call returns after the whole answer; the stream hands over the first
+sentence as soon as it is complete, which is when TTS can start.
+
+Usage:
+    python benchmarks/bench_voice_stream.py [--calls 20] [--delay-ms 30]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')  # The module builds a global client on import
+
+from gemini_standin import StandInServer
+from gemini_integration import GeminiAPI
+
+PIECES = ['Your heart rate ', 'is 72 bpm, ', 'which is normal. ', 'Keep drinking ', 'water and ',
+          'rest well. ', 'Call your ', 'caretaker if ', 'anything changes.']
+CONTEXT = {'vitals': {'heartRate': 72}, 'mood': 'calm'}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming voice response benchmark')
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--delay-ms', type=float, default=30.0, help='Stand-in delay per answer piece')
+    args = parser.parse_args()
+
+    server = StandInServer(args.delay_ms / 1000, PIECES)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['GEMINI_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}/v1beta/models"
+    api = GeminiAPI('benchmark')
+    api.client.generate('warm up')  # Learn the missing model before timing
+
+    blocking, first_sentence, stream_total = [], [], []
+    for i in range(args.calls):
+        question = f"How am I doing today, check {i}?"  # Distinct, so the response cache misses
+
+        start = time.perf_counter()
+        full = api.generate_health_response(question, CONTEXT)
+        blocking.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        sentences = []
+        for sentence in api.stream_health_response(question + ' Stream.', CONTEXT):
+            if not sentences:
+                first_sentence.append((time.perf_counter() - start) * 1000)
+            sentences.append(sentence)
+        stream_total.append((time.perf_counter() - start) * 1000)
+        assert ' '.join(sentences) == full, (sentences, full)
+
+    header = f"{'path':>24} {'p50 ms':>8} {'p95 ms':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, values in (('blocking full answer', blocking), ('stream first sentence', first_sentence),
+                         ('stream full answer', stream_total)):
+        print(f"{name:>24} {percentile(values, 0.5):>8.1f} {percentile(values, 0.95):>8.1f}")
+    api.client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Local stand-in for the Gemini generateContent API
+
+Answers generateContent and streamGenerateContent (SSE) like the real
+API, with per-model latency distributions, error rates and missing
+(404) models, so LLM client changes can be measured offline. Point the
+backend at it with GEMINI_BASE_URL.
+
+Prompts asking for a JSON response (mood and health analysis) get a
+JSON answer; everything else gets the configured text.
+
+Usage:
+    python benchmarks/gemini_standin.py [--port 8765] [--latency-ms 300] [--sigma 0.4]
+        [--error-rate 0.02] [--missing gemini-2.5-flash] [--model-latency gemini-pro=500]
+    GEMINI_BASE_URL=http://127.0.0.1:8765/v1beta/models python backend_template.py
+"""
+
+import math
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+
+ANSWER = ('Stay hydrated.',)
+JSON_ANSWER = json.dumps({'mood': 'neutral', 'sentiment': 0.1, 'stress_level': 'normal',
+                          'emotional_tags': ['calm'], 'confidence': 0.8,
+                          'intent': 'general_question', 'risk_level': 'low',
+                          'suggested_action': 'Continue monitoring', 'requires_followup': False})
+
+
+class ModelBehaviour:
+    """
+    How one stand-in model responds
+
+    Args:
+        latency_ms: Median latency of a whole answer (per piece when streaming)
+        sigma: Log-normal shape of the latency; 0 for a fixed latency
+        error_rate: Share of requests answered 503
+        missing: Answer every request 404, as an unavailable model does
+    """
+
+    def __init__(self, latency_ms: float = 0.0, sigma: float = 0.0, error_rate: float = 0.0,
+                 missing: bool = False):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.missing = missing
+
+    def delay(self, rng: random.Random) -> float:
+        """Seconds to wait before answering"""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.latency_ms / 1000
+        return rng.lognormvariate(math.log(self.latency_ms), self.sigma) / 1000
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Args:
+        delay: Fixed seconds per answer (per piece when streaming), if
+            no default behaviour is given
+        pieces: Answer text, split as a stream would deliver it
+        models: Behaviour per model name
+        default: Behaviour of models not in models
+        missing: Model names answering 404
+        port: 0 picks a free port
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, pieces: Iterable[str] = ANSWER,
+                 models: Optional[Dict[str, ModelBehaviour]] = None,
+                 default: Optional[ModelBehaviour] = None,
+                 missing: Iterable[str] = ('gemini-2.5-flash',), port: int = 0, seed: int = 0):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.default = default or ModelBehaviour(latency_ms=delay * 1000)
+        self.pieces = list(pieces)
+        self.models = dict(models or {})
+        for name in missing:
+            self.models[name] = ModelBehaviour(missing=True)
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def count(self, field: str):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def behaviour(self, model: str) -> ModelBehaviour:
+        return self.models.get(model) or self.default
+
+    def roll(self, behaviour: ModelBehaviour):
+        """(delay seconds, failed) for one request"""
+        with self.lock:
+            return behaviour.delay(self.rng), self.rng.random() < behaviour.error_rate
+
+    def counted(self, status: int):
+        with self.lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1beta/models"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; without this, Nagle
+        # and delayed ACKs add ~40 ms per keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count('connections')
+
+    def do_POST(self):
+        self.server.count('requests')
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        model, method = self.path.rsplit('/', 1)[-1].split('?', 1)[0].split(':', 1)
+        behaviour = self.server.behaviour(model)
+        if behaviour.missing:
+            self.reply(404, b'{"error": {"code": 404, "status": "NOT_FOUND"}}')
+            return
+
+        delay, failed = self.server.roll(behaviour)
+        if failed:
+            time.sleep(delay)
+            self.reply(503, b'{"error": {"code": 503, "status": "UNAVAILABLE"}}')
+            return
+
+        pieces = [JSON_ANSWER] if b'JSON' in body else self.server.pieces
+        if method == 'streamGenerateContent':
+            self.stream(pieces, delay)
+        else:
+            time.sleep(delay * len(pieces))
+            self.reply(200, json.dumps(candidate(''.join(pieces))).encode())
+
+    def reply(self, status: int, body: bytes):
+        self.server.counted(status)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, pieces, delay: float):
+        """Server-sent events, one answer piece per delay, chunked encoding"""
+        self.server.counted(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for piece in pieces:
+            time.sleep(delay)
+            event = f"data: {json.dumps(candidate(piece))}\r\n\r\n".encode()
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def candidate(text: str) -> dict:
+    return {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini API stand-in server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Median answer latency')
+    parser.add_argument('--sigma', type=float, default=0.4, help='Log-normal latency shape (0: fixed)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered 503')
+    parser.add_argument('--missing', action='append', default=None,
+                        help='Model answering 404 (repeatable; default gemini-2.5-flash)')
+    parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=MS',
+                        help='Median latency for one model')
+    args = parser.parse_args()
+
+    models = {}
+    for spec in args.model_latency:
+        name, latency = spec.split('=', 1)
+        models[name] = ModelBehaviour(float(latency), args.sigma, args.error_rate)
+    missing = args.missing if args.missing is not None else ['gemini-2.5-flash']
+    server = StandInServer(models=models, default=ModelBehaviour(args.latency_ms, args.sigma, args.error_rate),
+                           missing=missing, port=args.port)
+    print(f"Gemini stand-in on {server.base_url} (missing: {', '.join(missing) or 'none'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Load test /api/voice at a target request rate
+
+Starts the Gemini stand-in (gemini_standin) and the backend in-process,
+then sends voice turns open-loop: requests go out on schedule whether
+or not earlier ones have finished, and latency is measured from the
+scheduled send time, so queueing in the backend shows in the tail.
+GEMINI_MOCK_MODE skips HTTP entirely; the stand-in exercises the real
+client path (pooling, hedging, circuit breaker, single-flight).
+
+Turns are a mix of simple vitals/medication questions (fast path) and
+open-ended questions (Gemini path). No turn contains emergency words,
+so the run writes no alerts.
+
+Usage:
+    python benchmarks/load_voice.py [--qps 20] [--duration 30] [--fast-share 0.3]
+        [--latency-ms 300] [--sigma 0.4] [--error-rate 0.02]
+    python benchmarks/load_voice.py --url http://127.0.0.1:5000 --qps 10   # Running backend
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_standin import ModelBehaviour, StandInServer
+
+FAST_TURNS = ['What is my heart rate?', 'How is my blood pressure?', 'What is my temperature?',
+              'Check my oxygen level', 'When is my next medicine?']
+LLM_TURNS = ['I did not sleep well last night, what can I do?', 'Can you suggest a light exercise for today?',
+             'I feel a bit lonely this afternoon', 'What should I eat for dinner to stay healthy?',
+             'My knees ache when I climb the stairs', 'Tell me something nice about my week']
+USERS = ['1', '2', '3']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def serve_backend():
+    """Serve the backend app on a free port; returns (url, server)"""
+    from werkzeug.serving import make_server
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):  # Module banners
+        from backend_template import app
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def run(url: str, qps: float, duration: float, fast_share: float, workers: int, seed: int):
+    """Open-loop load; returns (results, elapsed seconds)"""
+    rng = random.Random(seed)
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+    results = []
+    lock = threading.Lock()
+
+    def send(scheduled: float, text: str, user_id: str):
+        try:
+            reply = session.post(f"{url}/api/voice", json={'text': text, 'user_id': user_id}, timeout=30)
+            body = reply.json() if reply.ok else {}
+            outcome = (reply.status_code, body.get('route', 'error'))
+        except requests.RequestException as e:
+            outcome = (0, type(e).__name__)
+        with lock:
+            results.append(((time.perf_counter() - scheduled) * 1000,) + outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(int(qps * duration)):
+            scheduled = start + i / qps
+            pause = scheduled - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+            if rng.random() < fast_share:
+                text = rng.choice(FAST_TURNS)
+            else:
+                text = f"{rng.choice(LLM_TURNS)} ({i})"  # Distinct, so the response cache misses
+            pool.submit(send, scheduled, text, rng.choice(USERS))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/api/voice load test')
+    parser.add_argument('--url', default=None, help='Running backend (default: start one in-process)')
+    parser.add_argument('--qps', type=float, default=20.0, help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of load')
+    parser.add_argument('--fast-share', type=float, default=0.3, help='Share of fast-path questions')
+    parser.add_argument('--workers', type=int, default=64, help='Maximum concurrent requests')
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Stand-in median model latency')
+    parser.add_argument('--sigma', type=float, default=0.4, help='Stand-in log-normal latency shape')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Stand-in share of 503 answers')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    standin = backend = None
+    url = args.url
+    if url is None:
+        standin = StandInServer(default=ModelBehaviour(args.latency_ms, args.sigma, args.error_rate), seed=args.seed)
+        threading.Thread(target=standin.serve_forever, daemon=True).start()
+        os.environ['GEMINI_BASE_URL'] = standin.base_url
+        os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+        url, backend = serve_backend()
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):  # Per-turn backend logging
+        results, elapsed = run(url.rstrip('/'), args.qps, args.duration, args.fast_share, args.workers, args.seed)
+
+    latencies = [r[0] for r in results if r[1] == 200]
+    routes = {}
+    for _, _, route in results:
+        routes[route] = routes.get(route, 0) + 1
+    errors = sum(1 for r in results if r[1] != 200)
+
+    print(f"target {args.qps:.1f} req/s for {args.duration:.0f}s, {len(results)} requests in {elapsed:.1f}s")
+    print(f"throughput {len(latencies) / elapsed:.1f} ok/s, errors {errors}")
+    header = f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print('-' * len(header))
+    print(f"{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+          f"{percentile(latencies, 0.99):>8.1f} {max(latencies, default=0.0):>8.1f}")
+    print('routes: ' + ', '.join(f"{route} {count}" for route, count in sorted(routes.items())))
+    if standin:
+        statuses = ', '.join(f"{status} {count}" for status, count in sorted(standin.status_counts.items()))
+        print(f"stand-in: {standin.requests} requests ({statuses})")
+        backend.shutdown()
+        standin.shutdown()
+
+
+if __name__ == '__main__':
+    main()
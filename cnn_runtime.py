@@ -0,0 +1,272 @@
+"""
+============================================
+CNN RUNTIME SELECTION MODULE
+============================================
+Runs the CNN fall detector on the lightest available CPU runtime
+(ONNX Runtime, TFLite or full Keras) behind a Keras-like predict()
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+CNN_BASENAME = 'cnn_fall_detector'
+
+# Runtime files produced by model_export.py, keyed by (runtime, quantization)
+RUNTIME_FILES = {
+    ('onnx', 'none'): f'{CNN_BASENAME}.onnx',
+    ('tflite', 'none'): f'{CNN_BASENAME}.tflite',
+    ('tflite', 'float16'): f'{CNN_BASENAME}_fp16.tflite',
+    ('tflite', 'int8'): f'{CNN_BASENAME}_int8.tflite',
+    ('keras', 'none'): f'{CNN_BASENAME}.h5',
+}
+REFERENCE_FILE = f'{CNN_BASENAME}_reference.npz'
+
+# Maximum absolute deviation from the Keras reference probabilities
+AGREEMENT_TOLERANCE = {
+    'none': 1e-4,
+    'float16': 1e-2,
+    'int8': 5e-2,
+}
+
+
+class CNNRuntime:
+    """Base adapter exposing the subset of the Keras model API we use"""
+
+    name = 'base'
+
+    def __init__(self, path: str, quantization: str = 'none'):
+        self.path = path
+        self.quantization = quantization
+        self.input_shape = None
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        """Run inference on a batch and return the raw model output"""
+        raise NotImplementedError("Subclasses must implement predict()")
+
+    def describe(self) -> Dict[str, Any]:
+        """Short description used in logs and stats"""
+        return {
+            'runtime': self.name,
+            'quantization': self.quantization,
+            'path': self.path
+        }
+
+
+class KerasRuntime(CNNRuntime):
+    """Reference runtime: full TensorFlow/Keras"""
+
+    name = 'keras'
+
+    def __init__(self, path: str, quantization: str = 'none', model=None):
+        super().__init__(path, quantization)
+        if model is None:
+            from tensorflow import keras
+            model = keras.models.load_model(path)
+        self.model = model
+        self.input_shape = tuple(model.input_shape)
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        return np.asarray(self.model.predict(features, verbose=verbose))
+
+
+class TFLiteRuntime(CNNRuntime):
+    """TFLite interpreter, preferring the standalone tflite_runtime package"""
+
+    name = 'tflite'
+
+    def __init__(self, path: str, quantization: str = 'none'):
+        super().__init__(path, quantization)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=path, num_threads=1)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self.input_shape = (None,) + tuple(int(d) for d in self._input['shape'][1:])
+        # The interpreter owns mutable tensors, so calls must be serialized
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size: int):
+        shape = [batch_size] + list(self._input['shape'][1:])
+        self.interpreter.resize_tensor_input(self._input['index'], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float32)
+        with self._lock:
+            if features.shape[0] != self._batch_size:
+                self._resize(features.shape[0])
+
+            # Integer-quantized models take and return int8 tensors
+            scale, zero_point = self._input.get('quantization', (0.0, 0))
+            if self._input['dtype'] != np.float32 and scale:
+                features = np.round(features / scale + zero_point).astype(self._input['dtype'])
+
+            self.interpreter.set_tensor(self._input['index'], features)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index'])
+
+            scale, zero_point = self._output.get('quantization', (0.0, 0))
+            if self._output['dtype'] != np.float32 and scale:
+                output = (output.astype(np.float32) - zero_point) * scale
+            return np.array(output, dtype=np.float32)
+
+
+class ONNXRuntime(CNNRuntime):
+    """ONNX Runtime CPU execution provider"""
+
+    name = 'onnx'
+
+    def __init__(self, path: str, quantization: str = 'none'):
+        super().__init__(path, quantization)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.input_shape = tuple(d if isinstance(d, int) else None for d in model_input.shape)
+        if self.input_shape:
+            self.input_shape = (None,) + self.input_shape[1:]
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float32)
+        return self.session.run(None, {self._input_name: features})[0]
+
+
+RUNTIME_CLASSES = {
+    'keras': KerasRuntime,
+    'tflite': TFLiteRuntime,
+    'onnx': ONNXRuntime,
+}
+
+
+def load_reference(model_dir: str) -> Optional[Dict[str, np.ndarray]]:
+    """Load the Keras reference inputs/outputs written by model_export.py"""
+    path = os.path.join(model_dir, REFERENCE_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {'inputs': data['inputs'], 'outputs': data['outputs']}
+
+
+def _median_latency_ms(runtime: CNNRuntime, sample: np.ndarray, repeats: int = 20) -> float:
+    """Median single-sample latency after one warm-up call"""
+    runtime.predict(sample)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        runtime.predict(sample)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def select_runtime(model_dir: str, preferred: Optional[str] = None) -> Optional[CNNRuntime]:
+    """
+    Load every available CNN runtime in model_dir and return the fastest
+    one whose outputs agree with the Keras reference
+
+    Args:
+        model_dir: Directory holding the exported model files
+        preferred: 'auto' (default), 'onnx', 'tflite' or 'keras'. Can also
+            be set with the FALL_CNN_RUNTIME environment variable. Without
+            reference outputs (no .npz and no Keras), exported runtimes
+            cannot be verified and are only used when named here
+
+    Returns:
+        The selected runtime, or None if no CNN model is available.
+        Details of the selection are stored in runtime.selection
+    """
+    preferred = (preferred or os.getenv('FALL_CNN_RUNTIME', 'auto')).lower()
+    reference = load_reference(model_dir)
+    keras_path = os.path.join(model_dir, RUNTIME_FILES[('keras', 'none')])
+
+    candidates: List[CNNRuntime] = []
+    keras_runtime = None
+    for (runtime_name, quantization), filename in RUNTIME_FILES.items():
+        if runtime_name == 'keras':
+            continue
+        if preferred not in ('auto', runtime_name):
+            continue
+        path = os.path.join(model_dir, filename)
+        if not os.path.exists(path):
+            continue
+        try:
+            candidates.append(RUNTIME_CLASSES[runtime_name](path, quantization))
+        except Exception as e:
+            print(f"⚠️ CNN runtime {runtime_name} ({quantization}) unavailable: {e}")
+
+    # Without stored reference outputs, Keras is needed to verify the others
+    need_keras = preferred == 'keras' or not candidates or reference is None
+    if need_keras and os.path.exists(keras_path):
+        try:
+            keras_runtime = KerasRuntime(keras_path)
+        except Exception as e:
+            print(f"⚠️ Keras CNN runtime unavailable: {e}")
+
+    if keras_runtime is not None and reference is None:
+        inputs = np.random.default_rng(0).normal(
+            size=(16,) + tuple(d or 1 for d in keras_runtime.input_shape[1:])
+        ).astype(np.float32)
+        reference = {'inputs': inputs, 'outputs': keras_runtime.predict(inputs)}
+
+    if preferred == 'keras' or not candidates:
+        if keras_runtime is not None:
+            keras_runtime.selection = {'selected': keras_runtime.describe(), 'candidates': []}
+        return keras_runtime
+
+    results = []
+    for runtime in candidates:
+        info = runtime.describe()
+        try:
+            if reference is not None:
+                outputs = runtime.predict(reference['inputs'])
+                error = float(np.max(np.abs(outputs - reference['outputs'])))
+                info['max_abs_error'] = error
+                info['agrees'] = error <= AGREEMENT_TOLERANCE.get(runtime.quantization, 1e-4)
+                sample = reference['inputs'][:1]
+            else:
+                info['agrees'] = None
+                sample = np.zeros((1,) + tuple(d or 1 for d in runtime.input_shape[1:]), dtype=np.float32)
+            info['latency_ms'] = _median_latency_ms(runtime, sample)
+        except Exception as e:
+            info['agrees'] = False
+            info['error'] = str(e)
+        results.append((runtime, info))
+
+    # Unverified runtimes only when explicitly requested
+    forced = preferred != 'auto'
+    if reference is None:
+        if forced:
+            print(f"⚠️ No Keras reference outputs; using the {preferred} CNN runtime unverified (FALL_CNN_RUNTIME)")
+        else:
+            print(f"⚠️ No Keras reference outputs ({REFERENCE_FILE} or Keras) to verify the exported CNN runtimes; "
+                  f"not using them. Re-export with model_export.py or set FALL_CNN_RUNTIME to force one")
+    usable = [(rt, info) for rt, info in results
+              if info.get('agrees') or (forced and info.get('agrees') is None)]
+    if not usable:
+        if reference is not None:
+            print("⚠️ No CNN runtime agrees with the Keras reference")
+        if keras_runtime is not None:
+            keras_runtime.selection = {'selected': keras_runtime.describe(),
+                                       'candidates': [info for _, info in results]}
+        return keras_runtime
+
+    runtime, info = min(usable, key=lambda item: item[1].get('latency_ms', float('inf')))
+    runtime.selection = {'selected': info, 'candidates': [i for _, i in results]}
+    print(f"✅ CNN runtime selected: {info['runtime']} ({info['quantization']}), "
+          f"{info.get('latency_ms', 0):.2f} ms/sample")
+    return runtime
@@ -91,12 +91,15 @@ class ContextMemory:
     def _update_context(self, user_id: str):
         """Update context based on recent conversation"""
         history = self.get_recent_history(user_id, n=self.max_history)
+        previous = self.current_context.get(user_id, {})
         
         context = {
             'recent_topics': [],
             'mentioned_entities': set(),
             'active_intents': [],
-            'emotional_state': None,
+            # Set by update_emotional_state, kept across exchanges
+            'emotional_state': previous.get('emotional_state'),
+            'emotional_trends': previous.get('emotional_trends', []),
             'conversation_flow': []
         }
         
@@ -130,6 +133,18 @@ class ContextMemory:
         
         self.current_context[user_id] = context
     
+    def update_emotional_state(self, user_id: str, state: Dict):
+        """
+        Record the mood analysed from the user's latest turn
+        
+        Args:
+            user_id: User identifier
+            state: 'mood', plus optional 'stress_level' and 'emotional_tags'
+        """
+        context = self.get_context(user_id)
+        context['emotional_state'] = state.get('mood')
+        context['emotional_trends'] = (context.get('emotional_trends', []) + [state.get('mood')])[-self.max_history:]
+    
     def clear_context(self, user_id: str):
         """Clear conversation context for a user"""
         if user_id in self.conversations:
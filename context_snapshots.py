@@ -0,0 +1,138 @@
+"""
+============================================
+CONTEXT SNAPSHOTS MODULE
+============================================
+Per-user voice context (vitals, reminders, alerts, mood and history)
+kept ready between turns. Code that changes a user's data refreshes
+the affected section; a voice turn reads the prepared snapshot instead
+of scanning the reminder and alert lists and the conversation memory.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+CONTEXT_SNAPSHOT_USERS = int(os.getenv('CONTEXT_SNAPSHOT_USERS', '1024'))
+
+Builder = Callable[[str], Dict[str, Any]]
+
+
+class Snapshot(NamedTuple):
+    fields: Dict[str, Any]  # Context fields of all sections, merged
+    sections: Dict[str, Dict[str, Any]]  # Fields per section
+    built: Dict[str, float]  # time.monotonic() each section was built
+    expires: float  # When the first section with a max age goes stale
+
+
+class ContextSnapshots:
+    """
+    Voice context per user, updated section by section
+
+    Each section has a builder returning its context fields for one
+    user. A snapshot is built on a user's first read; after that,
+    writers call refresh() for the sections whose data they changed,
+    and reads return the prepared fields without building anything.
+    Sections with a max age (conversation history expires by time) are
+    rebuilt on the first read after it.
+
+    Args:
+        max_users: Snapshots kept before the least recently read is dropped
+    """
+
+    def __init__(self, max_users: int = CONTEXT_SNAPSHOT_USERS):
+        self.max_users = max_users
+        self._builders: Dict[str, Tuple[Builder, Optional[float]]] = {}
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        # Serialises builds, so a refresh never races a first build
+        # into storing fields read before the change
+        self._build_lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.refreshes = 0
+        self.expired = 0
+
+    def register(self, section: str, builder: Builder, max_age: Optional[float] = None):
+        """
+        Add a section
+
+        Args:
+            builder: Context fields of the section for a user id
+            max_age: Seconds after which a read rebuilds the section
+        """
+        self._builders[section] = (builder, max_age)
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Context fields for a user; shared between readers, so do not modify"""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and now < snapshot.expires:
+                self._snapshots.move_to_end(user_id)
+                self.hits += 1
+                return snapshot.fields
+
+        if snapshot is None:
+            return self._rebuild(user_id, None, 'builds')
+        stale = [section for section, (_, max_age) in self._builders.items()
+                 if max_age is not None and now - snapshot.built[section] >= max_age]
+        return self._rebuild(user_id, stale, 'expired')
+
+    def refresh(self, user_id: str, *sections: str):
+        """
+        Rebuild sections after their data changed for a user (all
+        sections if none are named); nothing to do without a snapshot
+        """
+        self._rebuild(user_id, sections or None, 'refreshes', only_existing=True)
+
+    def _rebuild(self, user_id: str, sections: Optional[Iterable[str]], counter: str,
+                 only_existing: bool = False) -> Optional[Dict[str, Any]]:
+        with self._build_lock:
+            with self._lock:
+                snapshot = self._snapshots.get(user_id)
+            if snapshot is None:
+                if only_existing:
+                    return None
+                sections = self._builders
+            by_section = dict(snapshot.sections) if snapshot else {}
+            built = dict(snapshot.built) if snapshot else {}
+            for section in sections:
+                by_section[section] = self._builders[section][0](user_id)
+                built[section] = time.monotonic()
+
+            fields = {}
+            for section in self._builders:
+                fields.update(by_section[section])
+            expires = min((built[section] + max_age for section, (_, max_age) in self._builders.items()
+                           if max_age is not None), default=float('inf'))
+
+            with self._lock:
+                self._snapshots[user_id] = Snapshot(fields, by_section, built, expires)
+                self._snapshots.move_to_end(user_id)
+                while len(self._snapshots) > self.max_users:
+                    self._snapshots.popitem(last=False)
+                setattr(self, counter, getattr(self, counter) + 1)
+            return fields
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot reads served as prepared, builds and section refreshes"""
+        with self._lock:
+            reads = self.hits + self.builds + self.expired
+            return {
+                'users': len(self._snapshots),
+                'hits': self.hits,
+                'builds': self.builds,
+                'refreshes': self.refreshes,
+                'expired': self.expired,
+                'hit_rate': self.hits / reads if reads else 0.0
+            }
+
+
+# Global instance; the backend registers the section builders
+context_snapshots = ContextSnapshots()
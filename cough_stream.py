@@ -0,0 +1,206 @@
+"""
+============================================
+STREAMING COUGH DETECTION MODULE
+============================================
+Analyzes raw PCM chunks as they arrive for each recording session,
+carrying the unfinished tail across chunk boundaries so overnight
+monitoring never holds the full recording in memory
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from audio_features import (DEFAULT_SAMPLE_RATE, FRAME_MS, HOP_MS, MAX_EVENT_SECONDS,
+                            NOISE_PERCENTILE, THRESHOLD_RATIO, MIN_RMS,
+                            frame_signal, frame_features, detect_active_runs,
+                            merge_gap_frames, describe_runs)
+
+NOISE_HISTORY_SECONDS = 30  # Frame energies kept for the adaptive noise floor
+
+
+class CoughSession:
+    """Carry-over samples and counters for one recording session"""
+
+    def __init__(self, patient_id: str, sample_rate: int):
+        self.patient_id = patient_id
+        self.sample_rate = sample_rate
+        self.carry = np.zeros(0, dtype=np.float32)  # Samples from the first unfinished frame on
+        self.pending_byte = b''  # Odd trailing byte of a 16-bit sample split across chunks
+        self.frame_offset = 0  # Stream frame index of carry[0]
+        self.noise_history = np.zeros(int(NOISE_HISTORY_SECONDS * 1000 / HOP_MS), dtype=np.float32)
+        self.noise_frames = 0  # Finalized frames written to noise_history
+        self.overlong = False  # The run continuing into the next chunk is too long to be a cough
+        self.total_samples = 0
+        self.cough_count = 0
+        self.started_at = time.time()
+        self.last_seen = self.started_at
+        self.lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate
+
+
+class CoughStreamDetector:
+    """
+    Per-session incremental cough detector
+
+    Each chunk is framed together with the carried tail of the previous
+    one, so frames and events spanning a boundary are seen whole. Events
+    are only reported once the signal has been quiet long enough after
+    them that a later chunk cannot extend them.
+
+    Args:
+        classifier: Callable mapping an event dict to (detected, confidence)
+        sample_rate: Default sample rate of incoming PCM
+        max_idle_seconds: Sessions without chunks for this long are dropped
+    """
+
+    def __init__(self, classifier: Callable, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 max_idle_seconds: int = 600):
+        self.classifier = classifier
+        self.sample_rate = sample_rate
+        self.max_idle_seconds = max_idle_seconds
+        self.sessions: Dict[str, CoughSession] = {}
+        self._lock = threading.Lock()
+        self._last_eviction = time.time()
+
+    def _session(self, session_id: str, patient_id: str, sample_rate: Optional[int]) -> CoughSession:
+        with self._lock:
+            self._evict_idle()
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = CoughSession(patient_id, sample_rate or self.sample_rate)
+                self.sessions[session_id] = session
+            return session
+
+    def push_pcm(self, session_id: str, patient_id: str, data: bytes,
+                 sample_rate: Optional[int] = None) -> List[Dict]:
+        """
+        Append little-endian 16-bit PCM bytes to a session
+
+        Chunks do not have to be sample aligned; a split sample is
+        completed by the next chunk.
+
+        Returns:
+            Coughs finalized while consuming the chunk
+        """
+        session = self._session(session_id, patient_id, sample_rate)
+        with session.lock:
+            data = session.pending_byte + data
+            usable = len(data) - len(data) % 2
+            session.pending_byte = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+            return self._consume(session, samples, final=False)
+
+    def push(self, session_id: str, patient_id: str, samples: np.ndarray,
+             sample_rate: Optional[int] = None) -> List[Dict]:
+        """Append float samples in [-1, 1] to a session"""
+        session = self._session(session_id, patient_id, sample_rate)
+        with session.lock:
+            return self._consume(session, samples.astype(np.float32, copy=False), final=False)
+
+    def finish(self, session_id: str) -> Dict:
+        """
+        Flush the carried tail and close a session
+
+        Returns:
+            Final coughs and the session summary
+        """
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return {'events': [], 'summary': None}
+        with session.lock:
+            events = self._consume(session, np.zeros(0, dtype=np.float32), final=True)
+            return {'events': events, 'summary': self._summary(session)}
+
+    def _consume(self, session: CoughSession, samples: np.ndarray, final: bool) -> List[Dict]:
+        session.last_seen = time.time()
+        session.total_samples += len(samples)
+
+        sample_rate = session.sample_rate
+        frame_length = int(sample_rate * FRAME_MS / 1000)
+        hop_length = int(sample_rate * HOP_MS / 1000)
+        buffer = np.concatenate((session.carry, samples)) if len(session.carry) else samples
+        frames = frame_signal(buffer, frame_length, hop_length)
+        n_frames = len(frames)
+        if n_frames == 0:
+            session.carry = buffer.copy()
+            return []
+
+        features = frame_features(frames, sample_rate)
+        rms = features['rms']
+        history = session.noise_history[:min(session.noise_frames, len(session.noise_history))]
+        floor = float(np.percentile(np.concatenate((history, rms)), NOISE_PERCENTILE))
+        threshold = max(floor * THRESHOLD_RATIO, MIN_RMS)
+
+        merge_gap = merge_gap_frames(sample_rate, hop_length)
+        runs = detect_active_runs(rms, threshold, merge_gap)
+
+        # A run leading into the carried frames continues an overlong one
+        if session.overlong and len(runs) and runs[0, 0] == 0:
+            runs = runs[1:]
+        session.overlong = False
+
+        # Runs near the end may still grow with the next chunk
+        next_frame = n_frames
+        if not final and len(runs) and runs[-1, 1] > n_frames - merge_gap:
+            open_start = int(runs[-1, 0])
+            runs = runs[:-1]
+            max_frames = int(MAX_EVENT_SECONDS * sample_rate / hop_length)
+            if n_frames - open_start > max_frames:
+                # Keep only enough to see where it ends; it can never be a cough
+                session.overlong = True
+                open_start = max(n_frames - merge_gap, 0)
+            next_frame = open_start
+
+        candidates = describe_runs(runs, features, buffer, sample_rate,
+                                   hop_length, frame_length, session.frame_offset)
+        coughs = []
+        for event in candidates:
+            detected, confidence = self.classifier(event)
+            if detected:
+                coughs.append(dict(event, confidence=confidence))
+        session.cough_count += len(coughs)
+        self._remember_noise(session, rms[:next_frame])
+
+        # Copy so the carry does not pin the whole chunk in memory
+        session.carry = buffer[next_frame * hop_length:].copy()
+        session.frame_offset += next_frame
+        return coughs
+
+    def _remember_noise(self, session: CoughSession, rms: np.ndarray):
+        """Add finalized frame energies to the session's noise ring"""
+        size = len(session.noise_history)
+        rms = rms[-size:]
+        positions = (session.noise_frames + np.arange(len(rms))) % size
+        session.noise_history[positions] = rms
+        session.noise_frames += len(rms)
+
+    def _summary(self, session: CoughSession) -> Dict:
+        minutes = session.duration / 60.0
+        return {
+            'patient_id': session.patient_id,
+            'cough_count': session.cough_count,
+            'duration': session.duration,
+            'coughs_per_minute': session.cough_count / minutes if minutes else 0.0,
+            'buffered_samples': len(session.carry)
+        }
+
+    def session_stats(self, session_id: str) -> Optional[Dict]:
+        """Running totals of an open session"""
+        session = self.sessions.get(session_id)
+        return self._summary(session) if session else None
+
+    def _evict_idle(self):
+        now = time.time()
+        if now - self._last_eviction < 60:
+            return
+        self._last_eviction = now
+        for session_id in [sid for sid, s in self.sessions.items()
+                           if now - s.last_seen > self.max_idle_seconds]:
+            del self.sessions[session_id]
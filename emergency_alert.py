@@ -38,7 +38,32 @@ class EmergencyAlertSystem:
         Returns:
             Alert information dictionary
         """
-        alert_id = f"emergency_{user_id}_{int(time.time())}"
+        alert = self.create_alert(user_id, alert_type, message, severity)
+        
+        # Trigger local alert
+        self._trigger_local_alert(alert)
+        
+        # Start acknowledgment timeout
+        self._start_acknowledgment_timer(alert['id'])
+        
+        return alert
+    
+    def create_alert(self, user_id: str, alert_type: str, message: str,
+                     severity: str = 'medium', metadata: Optional[Dict] = None) -> Dict:
+        """
+        Record an alert for the caregiver without sounding or escalating it
+        
+        Args:
+            user_id: User identifier
+            alert_type: Type of alert
+            message: Alert message
+            severity: 'low', 'medium', 'high', 'critical'
+            metadata: Extra fields stored with the alert (source, etc.)
+        
+        Returns:
+            Alert information dictionary
+        """
+        alert_id = f"{alert_type}_{user_id}_{int(time.time())}"
         
         alert = {
             'id': alert_id,
@@ -51,17 +76,12 @@ class EmergencyAlertSystem:
             'acknowledged_by': None,
             'acknowledged_at': None,
             'escalated': False,
-            'escalated_at': None
+            'escalated_at': None,
+            **(metadata or {})
         }
         
         self.active_alerts[alert_id] = alert
         
-        # Trigger local alert
-        self._trigger_local_alert(alert)
-        
-        # Start acknowledgment timeout
-        self._start_acknowledgment_timer(alert_id)
-        
         # Log alert
         self._log_alert(alert)
         
@@ -0,0 +1,125 @@
+"""
+============================================
+FALL DETECTION FEATURE MODULE
+============================================
+Decodes accelerometer/gyroscope windows and extracts the statistical
+features used by the fall detection models
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Row order of the stacked (6, N) sensor matrix
+AXES = (
+    ('accelerometer', 'x'), ('accelerometer', 'y'), ('accelerometer', 'z'),
+    ('gyroscope', 'x'), ('gyroscope', 'y'), ('gyroscope', 'z'),
+)
+SENSOR_CHANNELS = len(AXES)
+FEATURE_COUNT = 15
+
+# Rule-based thresholds (adjust based on your needs)
+IMPACT_THRESHOLD = 25.0  # m/s^2 (about 2.5g)
+STILLNESS_THRESHOLD = 2.0  # m/s^2
+
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+
+
+def decode_sensor_payload(payload: bytes) -> np.ndarray:
+    """
+    Decode a packed little-endian float32 payload without copying
+
+    The payload holds 6 rows of N samples each, row-major:
+    acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z
+
+    Returns:
+        Read-only (6, N) float32 view over the payload buffer
+    """
+    row_bytes = SENSOR_CHANNELS * 4
+    if not payload or len(payload) % row_bytes:
+        raise ValueError(f"Binary sensor payload must be a non-empty multiple of {row_bytes} bytes")
+    return np.frombuffer(payload, dtype='<f4').reshape(SENSOR_CHANNELS, -1)
+
+
+def stack_sensor_data(sensor_data: Any) -> np.ndarray:
+    """
+    Return sensor data as a (6, N) matrix
+
+    Args:
+        sensor_data: Either an existing (6, N) array or the JSON format
+            {'accelerometer': {'x': [...], ...}, 'gyroscope': {...}}.
+            Missing gyroscope axes are filled with zeros.
+    """
+    if isinstance(sensor_data, np.ndarray):
+        if sensor_data.ndim != 2 or sensor_data.shape[0] != SENSOR_CHANNELS:
+            raise ValueError(f"Sensor matrix must have shape ({SENSOR_CHANNELS}, N)")
+        return sensor_data
+
+    accelerometer = sensor_data.get('accelerometer', {})
+    length = len(accelerometer.get('x', []))
+    if length == 0 or any(len(accelerometer.get(axis, [])) != length for axis in 'yz'):
+        raise ValueError('Invalid accelerometer data')
+
+    matrix = np.zeros((SENSOR_CHANNELS, length), dtype=np.float64)
+    for row, (sensor, axis) in enumerate(AXES):
+        values = sensor_data.get(sensor, {}).get(axis)
+        if values:
+            if len(values) != length:
+                raise ValueError(f"{sensor}.{axis} length does not match accelerometer data")
+            matrix[row] = values
+    return matrix
+
+
+def acceleration_magnitude(matrix: np.ndarray) -> np.ndarray:
+    """Per-sample accelerometer magnitude of a (6, N) matrix"""
+    acc = matrix[:3]
+    return np.sqrt(np.einsum('ij,ij->j', acc, acc, dtype=np.float64))
+
+
+def extract_features(matrix: np.ndarray) -> np.ndarray:
+    """
+    Compute the 15 model features in one vectorized pass
+
+    Feature order matches the models' training data:
+    magnitude mean/std/max, accelerometer means, accelerometer stds,
+    gyroscope means, gyroscope stds
+    """
+    magnitude = acceleration_magnitude(matrix)
+    means = matrix.mean(axis=1, dtype=np.float64)
+    stds = matrix.std(axis=1, dtype=np.float64)
+
+    features = np.empty(FEATURE_COUNT, dtype=np.float64)
+    features[0] = magnitude.mean()
+    features[1] = magnitude.std()
+    features[2] = magnitude.max()
+    features[3:6] = means[:3]
+    features[6:9] = stds[:3]
+    features[9:12] = means[3:]
+    features[12:15] = stds[3:]
+    return features
+
+
+def summarize_impact(matrix: np.ndarray) -> Dict[str, float]:
+    """Max/mean/std of the acceleration magnitude used by the rule-based detector"""
+    magnitude = acceleration_magnitude(matrix)
+    return {
+        'max_acceleration': float(magnitude.max()),
+        'mean_acceleration': float(magnitude.mean()),
+        'std_acceleration': float(magnitude.std())
+    }
+
+
+def rule_based_decision(matrix: np.ndarray) -> Tuple[bool, float, Dict[str, float]]:
+    """
+    Impact-then-stillness fall rule on one window
+
+    Returns:
+        Tuple of (is_fall, confidence, impact summary)
+    """
+    analysis = summarize_impact(matrix)
+    # High impact spike, followed by low movement (person lying still)
+    is_fall = (analysis['max_acceleration'] > IMPACT_THRESHOLD and
+               analysis['mean_acceleration'] < STILLNESS_THRESHOLD)
+    # Confidence grows with how far the impact is above the threshold
+    confidence = min(0.95, (analysis['max_acceleration'] / IMPACT_THRESHOLD) * 0.8) if is_fall else 0.2
+    return is_fall, confidence, analysis
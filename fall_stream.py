@@ -0,0 +1,262 @@
+"""
+============================================
+STREAMING FALL DETECTION MODULE
+============================================
+Keeps a ring buffer per patient so wearables can push small sample
+chunks instead of whole windows, and fires a fall alert as soon as the
+impact-then-stillness pattern (or the model score) completes
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from fall_features import (SENSOR_CHANNELS, IMPACT_THRESHOLD, STILLNESS_THRESHOLD,
+                           acceleration_magnitude, extract_features)
+
+
+class RunningWindow:
+    """Sum and sum of squares over the last `size` values of a ring buffer"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.count = 0
+
+    def add(self, value: float, leaving: Optional[float] = None):
+        self.total += value
+        self.total_sq += value * value
+        if leaving is None:
+            self.count += 1
+        else:
+            self.total -= leaving
+            self.total_sq -= leaving * leaving
+
+    def reset(self, values: np.ndarray):
+        """Recompute from scratch to cancel floating-point drift"""
+        self.total = float(values.sum())
+        self.total_sq = float(np.dot(values, values))
+        self.count = len(values)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return 0.0
+        mean = self.mean
+        return max(self.total_sq / self.count - mean * mean, 0.0) ** 0.5
+
+
+class PatientStream:
+    """Ring buffer and detector state for one patient"""
+
+    def __init__(self, window_size: int, stillness_samples: int):
+        self.samples = np.zeros((SENSOR_CHANNELS, window_size), dtype=np.float32)
+        self.magnitude = np.zeros(window_size, dtype=np.float64)
+        self.window = RunningWindow(window_size)
+        self.stillness = RunningWindow(stillness_samples)
+        self.total_samples = 0
+        self.impact_at = None  # Sample index of a pending impact
+        self.impact_peak = 0.0
+        self.last_alert_at = None
+        self.next_score_at = window_size
+        self.last_seen = time.time()
+        self.lock = threading.Lock()
+
+    def recent_magnitude(self, count: int) -> np.ndarray:
+        """Last `count` magnitudes in chronological order"""
+        size = len(self.magnitude)
+        count = min(count, self.total_samples, size)
+        indices = np.arange(self.total_samples - count, self.total_samples) % size
+        return self.magnitude[indices]
+
+    def window_samples(self) -> np.ndarray:
+        """Current full window as a (6, window_size) matrix in chronological order"""
+        start = self.total_samples % self.samples.shape[1]
+        return np.concatenate((self.samples[:, start:], self.samples[:, :start]), axis=1)
+
+
+class FallStreamDetector:
+    """
+    Per-patient streaming fall detector
+
+    Windows are measured in samples so the detector behaves the same
+    offline; the defaults assume a 50 Hz wearable.
+
+    Args:
+        window_size: Samples per sliding window used for model scoring
+        stillness_samples: Samples after an impact that must stay still
+        hop: Samples between model scoring runs
+        cooldown_samples: Samples after an alert during which no new
+            alert is raised for the patient (overlapping windows)
+        scorer: Optional callable mapping a feature vector to a fall
+            probability, or None when no model is available
+        score_threshold: Probability above which the model raises an alert
+    """
+
+    def __init__(self, window_size: int = 100, stillness_samples: int = 50, hop: int = 25,
+                 cooldown_samples: int = 1500, scorer: Optional[Callable] = None,
+                 score_threshold: float = 0.7, max_idle_seconds: int = 600):
+        if stillness_samples > window_size:
+            raise ValueError("stillness_samples cannot exceed window_size")
+        self.window_size = window_size
+        self.stillness_samples = stillness_samples
+        self.hop = hop
+        self.cooldown_samples = cooldown_samples
+        self.scorer = scorer
+        self.score_threshold = score_threshold
+        self.max_idle_seconds = max_idle_seconds
+        self.streams: Dict[str, PatientStream] = {}
+        self._lock = threading.Lock()
+        self._last_eviction = time.time()
+
+    def push(self, patient_id: str, chunk: np.ndarray) -> List[Dict]:
+        """
+        Append a (6, n) chunk of samples for a patient
+
+        Returns:
+            Events raised while consuming the chunk. At most one event per
+            fall has 'alert': True; repeats within the cooldown are dropped.
+        """
+        with self._lock:
+            self._evict_idle()
+            stream = self.streams.get(patient_id)
+            if stream is None:
+                stream = PatientStream(self.window_size, self.stillness_samples)
+                self.streams[patient_id] = stream
+
+        events = []
+        # Streams are independent, so only same-patient pushes serialize
+        with stream.lock:
+            stream.last_seen = time.time()
+            # Consume at most one hop at a time so scoring sees every window
+            for start in range(0, chunk.shape[1], self.hop):
+                events.extend(self._consume(stream, chunk[:, start:start + self.hop]))
+        return events
+
+    def _consume(self, stream: PatientStream, chunk: np.ndarray) -> List[Dict]:
+        events = []
+        size = self.window_size
+        magnitudes = acceleration_magnitude(chunk)
+
+        for offset, value in enumerate(magnitudes.tolist()):
+            index = stream.total_samples
+            position = index % size
+
+            leaving_window = stream.magnitude[position] if index >= size else None
+            leaving_still = None
+            if index >= self.stillness_samples:
+                leaving_still = stream.magnitude[(index - self.stillness_samples) % size]
+
+            stream.samples[:, position] = chunk[:, offset]
+            stream.magnitude[position] = value
+            stream.window.add(value, leaving_window)
+            stream.stillness.add(value, leaving_still)
+            stream.total_samples = index + 1
+
+            if position == size - 1:
+                stream.window.reset(stream.magnitude)
+                stream.stillness.reset(stream.recent_magnitude(self.stillness_samples))
+
+            event = self._check_impact(stream, index, value)
+            if event:
+                events.append(event)
+
+        if self.scorer is not None and stream.total_samples >= stream.next_score_at:
+            stream.next_score_at = stream.total_samples + self.hop
+            event = self._score_window(stream)
+            if event:
+                events.append(event)
+
+        return events
+
+    def _in_cooldown(self, stream: PatientStream, index: int) -> bool:
+        return stream.last_alert_at is not None and index - stream.last_alert_at < self.cooldown_samples
+
+    def _check_impact(self, stream: PatientStream, index: int, value: float) -> Optional[Dict]:
+        """Impact-then-stillness state machine, advanced one sample at a time"""
+        if value > IMPACT_THRESHOLD:
+            # A new spike restarts the stillness period
+            if not self._in_cooldown(stream, index):
+                if stream.impact_at is None:
+                    stream.impact_peak = 0.0
+                stream.impact_at = index
+                stream.impact_peak = max(value, stream.impact_peak)
+            return None
+
+        if stream.impact_at is None or index - stream.impact_at < self.stillness_samples:
+            return None
+
+        # The stillness window now covers exactly the samples after the impact
+        peak = stream.impact_peak
+        stream.impact_at = None
+        stream.impact_peak = 0.0
+        if stream.stillness.mean >= STILLNESS_THRESHOLD:
+            return None
+
+        stream.last_alert_at = index
+        return {
+            'type': 'impact_stillness',
+            'alert': True,
+            'sample_index': index,
+            'probability': min(0.95, (peak / IMPACT_THRESHOLD) * 0.8),
+            'analysis': {
+                'max_acceleration': peak,
+                'stillness_mean': float(stream.stillness.mean),
+                'stillness_std': float(stream.stillness.std)
+            }
+        }
+
+    def _score_window(self, stream: PatientStream) -> Optional[Dict]:
+        index = stream.total_samples - 1
+        if self._in_cooldown(stream, index):
+            return None
+        try:
+            probability = self.scorer(extract_features(stream.window_samples()))
+        except Exception as e:
+            print(f"⚠️ Streaming fall scorer error: {e}")
+            return None
+        if probability is None or probability <= self.score_threshold:
+            return None
+
+        stream.last_alert_at = index
+        return {
+            'type': 'model',
+            'alert': True,
+            'sample_index': index,
+            'probability': float(probability)
+        }
+
+    def window_stats(self, patient_id: str) -> Dict:
+        """Incrementally maintained statistics of the current window"""
+        stream = self.streams.get(patient_id)
+        if stream is None:
+            return {'buffered_samples': 0}
+        return {
+            'buffered_samples': min(stream.total_samples, self.window_size),
+            'total_samples': stream.total_samples,
+            'mean_acceleration': float(stream.window.mean),
+            'std_acceleration': float(stream.window.std),
+            'max_acceleration': float(stream.recent_magnitude(self.window_size).max()),
+            'impact_pending': stream.impact_at is not None
+        }
+
+    def reset(self, patient_id: str):
+        """Drop the buffered samples of a patient"""
+        with self._lock:
+            self.streams.pop(patient_id, None)
+
+    def _evict_idle(self):
+        now = time.time()
+        if now - self._last_eviction < 60:
+            return
+        self._last_eviction = now
+        for patient_id in [pid for pid, s in self.streams.items()
+                           if now - s.last_seen > self.max_idle_seconds]:
+            del self.streams[patient_id]
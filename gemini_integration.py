@@ -3,14 +3,132 @@
 # ============================================
 
 import os
+import re
 import json
-from typing import Dict, Optional, Any
-import requests
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Any, Iterable, Iterator, Tuple
 from dotenv import load_dotenv
 
+from llm_client import LLMClient, LLMError, DEFAULT_BASE_URL
+from prompt_builder import PromptBuilder, PromptContext
+from text_matcher import keyword_matcher
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Keywords of the rule-based fallbacks, registered once with the shared matcher
+FALLBACK_KEYWORDS = (
+    'oxygen', 'o2', 'heart rate', 'pulse', 'temperature', 'temp', 'blood pressure', 'bp',
+    'remind', 'medication', 'medicine', 'help', 'emergency', 'how', 'health',
+    'heart', 'vital'
+)
+keyword_matcher.add(FALLBACK_KEYWORDS)
+
+# Turns with these words are never answered from the response cache
+EMERGENCY_KEYWORDS = frozenset({'help', 'emergency', 'urgent'})
+keyword_matcher.add(EMERGENCY_KEYWORDS)
+
+# Keywords of the rule-based mood analysis, strongest first
+MOOD_KEYWORDS = (
+    ('anxious', frozenset({'anxious', 'worried', 'nervous', 'scared', 'afraid', 'panic', 'stress'})),
+    ('sad', frozenset({'sad', 'lonely', 'depressed', 'down', 'unhappy', 'miss'})),
+    ('angry', frozenset({'angry', 'annoyed', 'frustrated', 'upset'})),
+    ('tired', frozenset({'tired', 'exhausted', 'sleepy', 'weak'})),
+    ('happy', frozenset({'happy', 'good', 'great', 'better', 'wonderful', 'thank'}))
+)
+MOOD_SENTIMENT = {'anxious': -0.5, 'sad': -0.6, 'angry': -0.5, 'tired': -0.2, 'happy': 0.6, 'neutral': 0.0}
+keyword_matcher.add(k for _, keywords in MOOD_KEYWORDS for k in keywords)
+
+RESPONSE_CACHE_SIZE = int(os.getenv('GEMINI_CACHE_SIZE', '256'))
+RESPONSE_CACHE_TTL = float(os.getenv('GEMINI_CACHE_TTL', '300'))
+
+
+class ResponseCache:
+    """
+    LRU cache of Gemini responses with a time-to-live
+    
+    Args:
+        max_entries: Responses kept before the least recently used is dropped
+        ttl: Seconds a response stays valid
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def bypass(self):
+        """Count a turn that skipped the cache"""
+        with self._lock:
+            self.bypassed += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'ttl_seconds': self.ttl
+        }
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, drop punctuation and apostrophes, collapse whitespace"""
+    return ' '.join(re.sub(r"[^\w\s]", '', text.lower()).split())
+
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def sentence_chunks(pieces: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed text pieces into whole sentences"""
+    buffer = ''
+    for piece in pieces:
+        buffer += piece
+        *sentences, buffer = SENTENCE_END.split(buffer)
+        for sentence in sentences:
+            if sentence.strip():
+                yield sentence.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
 class GeminiAPI:
     """Backend integration with Google Gemini API for natural language understanding"""
     
@@ -29,17 +147,27 @@ class GeminiAPI:
             'gemini-2.5-flash',
             'gemini-pro'
         ]
-        self.base_url = 'https://generativelanguage.googleapis.com/v1beta/models'
+        # GEMINI_BASE_URL can point at a local stand-in server for testing
+        self.base_url = os.getenv('GEMINI_BASE_URL', DEFAULT_BASE_URL)
+        self.client = LLMClient(self.api_key, self.models, self.base_url)
+        self.response_cache = ResponseCache()
+        self.prompt_builder = PromptBuilder()
         self.enabled = True
         print(f"✅ Gemini API initialized with provided key")
 
-    def generate_health_response(self, user_text: str, context: Dict[str, Any] = None) -> str:
+    def generate_health_response(self, user_text: str, context: Dict[str, Any] = None,
+                                 deadline: Optional[float] = None,
+                                 on_model_answer: Optional[Callable[[], None]] = None) -> str:
         """
         Generate health-aware response using Gemini API
         
         Args:
             user_text: User's input text
             context: Health context (vitals, reminders, mood, etc.)
+            deadline: time.monotonic() by which the answer is needed; the
+                fallback response is returned if Gemini cannot make it
+            on_model_answer: Called if a model produced the response (not
+                for cached, mock or fallback responses)
         
         Returns:
             AI-generated response
@@ -56,72 +184,102 @@ class GeminiAPI:
                 print(f"⚠️ Mock Gemini response error: {e}")
                 return self._get_fallback_response(user_text, context)
 
-        # Production: attempt real network call
+        # Production: pooled call to the first available model, unless the
+        # same question was answered for the same prompt context recently
         try:
-            prompt = self._build_health_prompt(user_text, context or {})
-
-            # Try each model in order
-            response = None
-            for model in self.models:
-                try:
-                    print(f"🔄 Trying model: {model}")
-                    response = requests.post(
-                        f"{self.base_url}/{model}:generateContent?key={self.api_key}",
-                        headers={'Content-Type': 'application/json'},
-                        json={
-                            'contents': [{
-                                'parts': [{
-                                    'text': prompt
-                                }]
-                            }]
-                        },
-                        timeout=10
-                    )
-                    
-                    if response.ok:
-                        print(f"✅ {model} response received")
-                        data = response.json()
-                        if data.get('candidates') and data['candidates'][0].get('content'):
-                            return data['candidates'][0]['content']['parts'][0]['text'].strip()
-                        break
-                    
-                    # If 404 or 400, try next model
-                    if response.status_code in [404, 400]:
-                        print(f"⚠️ Model {model} not available, trying next model")
-                        continue
-                    # Other errors: break
-                    print(f"⚠️ Error with {model}: {response.status_code}")
-                    break
-                except Exception as e:
-                    print(f"⚠️ Error with {model}: {e}")
-                    continue
-
+            prompt_context = self.prompt_builder.build(context or {})
+            cache_key, cached = self._cache_lookup(user_text, prompt_context)
+            if cached is not None:
+                return cached
+            
+            response = self.client.generate(self._build_health_prompt(user_text, prompt_context),
+                                            deadline=deadline).strip()
+            if cache_key is not None:
+                self.response_cache.put(cache_key, response)
+            if on_model_answer:
+                on_model_answer()
+            return response
+        except LLMError as e:
+            print(f"⚠️ Gemini unavailable: {e}")
             return self._get_fallback_response(user_text, context)
         except Exception as e:
             print(f"⚠️ Gemini API error: {e}")
             return self._get_fallback_response(user_text, context)
     
-    def _build_health_prompt(self, user_text: str, context: Dict[str, Any]) -> str:
-        """Build prompt with health context"""
-        vitals = context.get('vitals', {})
-        reminders = context.get('reminders', [])
-        mood = context.get('mood', 'neutral')
-        recent_history = context.get('recentHistory', [])
+    def stream_health_response(self, user_text: str, context: Dict[str, Any] = None,
+                               deadline: Optional[float] = None,
+                               on_model_answer: Optional[Callable[[], None]] = None) -> Iterator[str]:
+        """
+        Generate a health-aware response sentence by sentence
+        
+        Uses the streaming endpoint so the first sentence can be spoken
+        while the rest is generated. Cached, mock and fallback responses
+        are split into sentences the same way.
+        
+        Args:
+            user_text: User's input text
+            context: Health context (vitals, reminders, mood, etc.)
+            deadline: time.monotonic() by which streaming must have started
+            on_model_answer: Called when a model's first sentence arrives
+        
+        Yields:
+            Response sentences
+        """
+        if not self.enabled or os.getenv('GEMINI_MOCK_MODE', '0') == '1':
+            yield from sentence_chunks([self.generate_health_response(user_text, context, deadline)])
+            return
+        
+        prompt_context = self.prompt_builder.build(context or {})
+        cache_key, cached = self._cache_lookup(user_text, prompt_context)
+        if cached is not None:
+            yield from sentence_chunks([cached])
+            return
         
+        sentences = []
+        try:
+            prompt = self._build_health_prompt(user_text, prompt_context)
+            for sentence in sentence_chunks(self.client.generate_stream(prompt, deadline=deadline)):
+                if not sentences and on_model_answer:
+                    on_model_answer()
+                sentences.append(sentence)
+                yield sentence
+        except LLMError as e:
+            print(f"⚠️ Gemini stream unavailable: {e}")
+            if not sentences:
+                yield from sentence_chunks([self._get_fallback_response(user_text, context)])
+            return
+        
+        if sentences and cache_key is not None:
+            self.response_cache.put(cache_key, ' '.join(sentences))
+    
+    def _cache_lookup(self, user_text: str, prompt_context: PromptContext) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (cache key, cached response); the key is None for emergency turns
+        
+        The key is the normalized question plus the fingerprint of the
+        rendered context block, so a cached response is only reused for
+        an identical prompt.
+        """
+        if keyword_matcher.any(user_text, EMERGENCY_KEYWORDS):
+            self.response_cache.bypass()
+            return None, None
+        cache_key = f"{normalize_text(user_text)}|{prompt_context.fingerprint}"
+        return cache_key, self.response_cache.get(cache_key)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Response cache hit/miss counters"""
+        return self.response_cache.stats()
+    
+    def prompt_stats(self) -> Dict[str, Any]:
+        """Prompt context size and trimming statistics"""
+        return self.prompt_builder.stats()
+    
+    def _build_health_prompt(self, user_text: str, prompt_context: PromptContext) -> str:
+        """Build prompt around the budgeted context block"""
         prompt = f"""You are a Virtual Nurse AI assistant, providing compassionate, accurate healthcare guidance.
 You are speaking with a patient who needs health support.
 
-Current Patient Context:
-- Heart Rate: {vitals.get('heartRate', 'N/A')} bpm
-- Blood Pressure: {vitals.get('systolic', 'N/A')}/{vitals.get('diastolic', 'N/A')} mmHg
-- Temperature: {vitals.get('temperature', 'N/A')}°F
-- Oxygen Level: {vitals.get('oxygen', 'N/A')}%
-- Mood: {mood}
-
-Upcoming Medications: {', '.join([f"{r.get('medicine', '')} at {r.get('time', '')}" for r in reminders[:3]]) if reminders else 'None'}
-
-Recent Conversation:
-{chr(10).join([f"Patient: {h.get('user', '')}\nNurse: {h.get('assistant', '')}" for h in recent_history[-3:]])}
+{prompt_context.text}
 
 Patient says: "{user_text}"
 
@@ -135,39 +293,39 @@ Response:"""
     
     def _get_fallback_response(self, user_text: str, context: Dict[str, Any] = None) -> str:
         """Fallback rule-based responses"""
-        text = user_text.lower()
+        hits = keyword_matcher.find(user_text)
         vitals = (context or {}).get('vitals', {})
         
-        if 'oxygen' in text or 'o2' in text:
+        if hits & {'oxygen', 'o2'}:
             oxygen = vitals.get('oxygen', 97)
             status = 'You\'re doing well.' if oxygen >= 95 else 'Please monitor this closely.'
             return f"Your oxygen level is currently {oxygen}%. {status}"
         
-        if 'heart rate' in text or 'pulse' in text:
+        if hits & {'heart rate', 'pulse'}:
             heart_rate = vitals.get('heartRate', 72)
             return f"Your heart rate is {heart_rate} beats per minute. This is within normal range."
         
-        if 'temperature' in text or 'temp' in text:
+        if hits & {'temperature', 'temp'}:
             temp = vitals.get('temperature', 98.6)
             status = 'This is normal.' if temp < 99.5 else 'You may have a slight fever. Please rest and hydrate.'
             return f"Your temperature is {temp}°F. {status}"
         
-        if 'blood pressure' in text or 'bp' in text:
+        if hits & {'blood pressure', 'bp'}:
             systolic = vitals.get('systolic', 120)
             diastolic = vitals.get('diastolic', 80)
             return f"Your blood pressure is {systolic}/{diastolic} mmHg. This looks good."
         
-        if 'remind' in text or 'medication' in text or 'medicine' in text:
+        if hits & {'remind', 'medication', 'medicine'}:
             reminders = (context or {}).get('reminders', [])
             if reminders:
                 next_reminder = reminders[0]
                 return f"I'll remind you to take {next_reminder.get('medicine', 'your medication')} at {next_reminder.get('time', 'the scheduled time')}. Is there anything else you need?"
             return "I'll set that reminder for you. What medication and what time?"
         
-        if 'help' in text or 'emergency' in text:
+        if hits & {'help', 'emergency'}:
             return "I understand you need help. Emergency services are being notified. Please stay calm, help is on the way."
         
-        if 'how' in text and 'health' in text:
+        if {'how', 'health'} <= hits:
             return f"Your vitals are looking good. Heart rate: {vitals.get('heartRate', 72)} bpm, Oxygen: {vitals.get('oxygen', 97)}%. Continue monitoring and stay hydrated."
         
         return f"I heard: '{user_text}'. How can I assist you with your health today?"
@@ -196,72 +354,105 @@ Provide a JSON response with:
 
 Response:"""
 
-            # Try each model in order
-            response = None
-            for model in self.models:
+            text_response = self.client.generate(prompt)
+            # Try to parse JSON from response
+            json_match = re.search(r'\{[\s\S]*\}', text_response)
+            if json_match:
                 try:
-                    print(f"🔄 Trying model: {model}")
-                    response = requests.post(
-                        f"{self.base_url}/{model}:generateContent?key={self.api_key}",
-                        headers={'Content-Type': 'application/json'},
-                        json={
-                            'contents': [{
-                                'parts': [{
-                                    'text': prompt
-                                }]
-                            }]
-                        },
-                        timeout=10
-                    )
-                    
-                    if response.ok:
-                        print(f"✅ {model} response received")
-                        data = response.json()
-                        if data.get('candidates') and data['candidates'][0].get('content'):
-                            text_response = data['candidates'][0]['content']['parts'][0]['text']
-                            # Try to parse JSON from response
-                            try:
-                                import re
-                                json_match = re.search(r'\{[\s\S]*\}', text_response)
-                                if json_match:
-                                    return json.loads(json_match.group())
-                            except:
-                                pass
-                        break
-                    
-                    # If 404 or 400, try next model
-                    if response.status_code in [404, 400]:
-                        print(f"⚠️ Model {model} not available, trying next model")
-                        continue
-                    # Other errors: break
-                    print(f"⚠️ Error with {model}: {response.status_code}")
-                    break
-                except Exception as e:
-                    print(f"⚠️ Error with {model}: {e}")
-                    continue
-            
+                    return json.loads(json_match.group())
+                except ValueError:
+                    pass
+            return self._analyze_health_context_fallback(text, vitals)
+        except LLMError as e:
+            print(f"⚠️ Gemini unavailable: {e}")
             return self._analyze_health_context_fallback(text, vitals)
         except Exception as e:
             print(f"⚠️ Gemini analysis error: {e}")
             return self._analyze_health_context_fallback(text, vitals)
 
+    def analyze_user_state(self, text: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Analyze the patient's mood and stress from what they said
+        
+        Args:
+            text: User's input text
+            deadline: time.monotonic() by which the analysis is needed
+        
+        Returns:
+            Dict with mood, sentiment (-1 to 1), stress_level ("normal" |
+            "moderate" | "high"), emotional_tags and confidence
+        """
+        fallback = self._analyze_user_state_fallback(text)
+        if not self.enabled or os.getenv('GEMINI_MOCK_MODE', '0') == '1':
+            return fallback
+        
+        try:
+            prompt = f"""Analyze the emotional state of this patient statement:
+
+Patient said: "{text}"
+
+Provide a JSON response with:
+- mood: "happy" | "neutral" | "sad" | "anxious" | "angry" | "tired"
+- sentiment: number from -1 (very negative) to 1 (very positive)
+- stress_level: "normal" | "moderate" | "high"
+- emotional_tags: list of short emotion words
+- confidence: number from 0 to 1
+
+Response:"""
+
+            text_response = self.client.generate(prompt, deadline=deadline)
+            json_match = re.search(r'\{[\s\S]*\}', text_response)
+            if json_match:
+                try:
+                    analysis = json.loads(json_match.group())
+                    return {key: analysis.get(key, value) for key, value in fallback.items()}
+                except ValueError:
+                    pass
+            return fallback
+        except LLMError as e:
+            print(f"⚠️ Gemini unavailable: {e}")
+            return fallback
+        except Exception as e:
+            print(f"⚠️ Gemini mood analysis error: {e}")
+            return fallback
+
+    def _analyze_user_state_fallback(self, text: str) -> Dict[str, Any]:
+        """Fallback keyword mood analysis (low confidence, so it never raises stress alerts)"""
+        hits = keyword_matcher.find(text)
+        tags = [mood for mood, keywords in MOOD_KEYWORDS if hits & keywords]
+        mood = tags[0] if tags else 'neutral'
+        
+        stress_level = 'normal'
+        if hits & EMERGENCY_KEYWORDS or len(hits & MOOD_KEYWORDS[0][1]) >= 2:
+            stress_level = 'high'
+        elif mood in ('anxious', 'angry', 'sad'):
+            stress_level = 'moderate'
+        
+        return {
+            'mood': mood,
+            'sentiment': MOOD_SENTIMENT[mood],
+            'stress_level': stress_level,
+            'emotional_tags': tags,
+            'confidence': 0.4 if tags else 0.2
+        }
+
     def _analyze_health_context_fallback(self, text: str, vitals: Dict[str, Any] = None) -> Dict[str, Any]:
         """Fallback health context analysis"""
-        lower_text = text.lower()
+        hits = keyword_matcher.find(text)
         
         intent = 'general_question'
-        if any(word in lower_text for word in ['oxygen', 'heart', 'temp', 'vital']):
+        if hits & {'oxygen', 'heart', 'temp', 'vital'}:
             intent = 'check_vitals'
-        elif any(word in lower_text for word in ['remind', 'medication']):
+        elif hits & {'remind', 'medication'}:
             intent = 'medication_reminder'
-        elif any(word in lower_text for word in ['help', 'emergency']):
+        elif hits & {'help', 'emergency'}:
             intent = 'emergency'
         
         risk_level = 'low'
         if vitals:
             if vitals.get('heartRate', 0) > 100 or vitals.get('oxygen', 100) < 95 or vitals.get('temperature', 98) > 100:
                 risk_level = 'medium'
-        if 'emergency' in lower_text or 'help' in lower_text:
+        if hits & {'emergency', 'help'}:
             risk_level = 'high'
         
         return {
@@ -0,0 +1,138 @@
+"""
+============================================
+INFERENCE RESULT CACHE MODULE
+============================================
+Remembers detection results by payload content so retried uploads get
+the original answer without re-running inference or raising the same
+alert twice
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+INFERENCE_CACHE_SIZE = int(os.getenv('INFERENCE_CACHE_SIZE', '512'))
+ALERT_DEDUP_SECONDS = float(os.getenv('ALERT_DEDUP_SECONDS', '120'))
+# Capped at the alert window, so a repeated fall is not answered from the
+# cache after the window in which its alert is de-duplicated
+INFERENCE_CACHE_SECONDS = float(os.getenv('INFERENCE_CACHE_SECONDS', str(ALERT_DEDUP_SECONDS)))
+
+
+def payload_digest(payload: Any) -> bytes:
+    """
+    SHA-256 of a sensor or audio payload
+
+    Bytes and strings are hashed as sent; arrays by dtype, shape and raw
+    buffer; JSON structures in canonical form, so key order does not matter.
+    """
+    digest = hashlib.sha256()
+    if isinstance(payload, bytes):
+        digest.update(payload)
+    elif isinstance(payload, str):
+        digest.update(payload.encode('utf-8'))
+    elif hasattr(payload, 'tobytes'):
+        digest.update(f"{payload.dtype}{payload.shape}".encode('ascii'))
+        digest.update(payload.tobytes())
+    else:
+        digest.update(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return digest.digest()
+
+
+class InferenceCache:
+    """
+    Bounded LRU of detection results plus an alert de-duplication window
+
+    Results are keyed by endpoint kind, patient, model version and the
+    payload hash, so a new model version never serves stale answers.
+
+    Args:
+        max_entries: Results kept before the least recently used is dropped
+        alert_window: Seconds during which a second alert for the same
+            payload (same cache key) is suppressed
+        ttl: Seconds a result is served from the cache (at most alert_window)
+    """
+
+    def __init__(self, max_entries: int = INFERENCE_CACHE_SIZE,
+                 alert_window: float = ALERT_DEDUP_SECONDS,
+                 ttl: float = INFERENCE_CACHE_SECONDS):
+        self.max_entries = max_entries
+        self.alert_window = alert_window
+        self.ttl = min(ttl, alert_window)
+        self._results = OrderedDict()
+        self._last_alert: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.alerts_suppressed = 0
+
+    @staticmethod
+    def key(kind: str, patient_id: Any, model_version: Any, payload: Any, *extra: Any) -> tuple:
+        """Cache key for one request; extra holds parameters that change the result"""
+        return (kind, str(patient_id), str(model_version), extra, payload_digest(payload))
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        """Previous result for key stored within the TTL, or None"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and time.monotonic() - entry[1] >= self.ttl:
+                del self._results[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, result: Dict):
+        with self._lock:
+            self._results[key] = (result, time.monotonic())
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def claim_alert(self, key: tuple) -> bool:
+        """
+        Whether an alert may be raised now for a payload
+
+        Args:
+            key: Cache key of the payload (see key()), so only a retried,
+                identical upload is suppressed; any new payload alerts
+
+        Returns False (and counts a suppressed alert) if an alert was raised
+        for the same key within the window. Check and update happen under
+        one lock, so concurrent retries raise at most one alert.
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_alert.get(key)
+            if last is not None and now - last < self.alert_window:
+                self.alerts_suppressed += 1
+                return False
+            self._last_alert[key] = now
+            if len(self._last_alert) > self.max_entries:
+                # Drop expired entries so the table stays bounded
+                self._last_alert = {k: t for k, t in self._last_alert.items()
+                                    if now - t < self.alert_window}
+            return True
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and suppressed alerts"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._results),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'ttl_seconds': self.ttl,
+            'alerts_suppressed': self.alerts_suppressed,
+            'alert_window_seconds': self.alert_window
+        }
+
+
+# Global instance shared by the detection endpoints
+inference_cache = InferenceCache()
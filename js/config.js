@@ -21,6 +21,7 @@ window.GOOGLE_CONFIG = GOOGLE_CONFIG;
 // API Endpoints
 const API_ENDPOINTS = {
     voice: `${API_BASE_URL}/api/voice`,
+    voiceStream: `${API_BASE_URL}/api/voice/stream`,
     respond: `${API_BASE_URL}/api/respond`,
     vitals: `${API_BASE_URL}/api/vitals`,
     vitalsUpdate: `${API_BASE_URL}/api/vitals/update`,
@@ -3,9 +3,14 @@
 // ============================================
 
 (function(){
+    // The server decodes WAV/PCM only, so clips are captured as raw
+    // samples through Web Audio and sent as 16-bit mono WAV
     let mediaStream = null;
-    let mediaRecorder = null;
+    let audioContext = null;
+    let sourceNode = null;
+    let processorNode = null;
     let chunks = [];
+    let recording = false;
     let monitorInterval = null;
     let isActive = false;
 
@@ -27,10 +32,14 @@
         const stream = await initMicrophone();
         if (!stream) return;
 
-        const options = getRecorderOptions();
-        mediaRecorder = new MediaRecorder(stream, options);
-        mediaRecorder.ondataavailable = (e) => { if (e.data && e.data.size > 0) chunks.push(e.data); };
-        mediaRecorder.onstop = onClipReady;
+        audioContext = new (window.AudioContext || window.webkitAudioContext)();
+        sourceNode = audioContext.createMediaStreamSource(stream);
+        processorNode = audioContext.createScriptProcessor(4096, 1, 1);
+        processorNode.onaudioprocess = (e) => {
+            if (recording) chunks.push(new Float32Array(e.inputBuffer.getChannelData(0)));
+        };
+        sourceNode.connect(processorNode);
+        processorNode.connect(audioContext.destination);
 
         isActive = true;
         scheduleNextClip();
@@ -41,23 +50,43 @@
     function stopMonitoring() {
         isActive = false;
         if (monitorInterval) { clearTimeout(monitorInterval); monitorInterval = null; }
-        if (mediaRecorder && mediaRecorder.state !== 'inactive') {
-            try { mediaRecorder.stop(); } catch(e){}
-        }
+        recording = false;
+        chunks = [];
+        try {
+            if (sourceNode) sourceNode.disconnect();
+            if (processorNode) processorNode.disconnect();
+            if (audioContext) audioContext.close();
+        } catch(e){}
+        audioContext = sourceNode = processorNode = null;
         updateUI(false);
         log('⚠️ Cough detection monitoring stopped');
     }
 
-    function getRecorderOptions() {
-        const types = [
-            { mimeType: 'audio/webm;codecs=opus' },
-            { mimeType: 'audio/webm' },
-            { mimeType: '' }
-        ];
-        for (const t of types) {
-            if (!t.mimeType || MediaRecorder.isTypeSupported(t.mimeType)) return t;
+    function encodeWav(samples, sampleRate) {
+        // 44-byte RIFF header followed by 16-bit little-endian PCM
+        const buffer = new ArrayBuffer(44 + samples.length * 2);
+        const view = new DataView(buffer);
+        const writeText = (offset, text) => {
+            for (let i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i));
+        };
+        writeText(0, 'RIFF');
+        view.setUint32(4, 36 + samples.length * 2, true);
+        writeText(8, 'WAVE');
+        writeText(12, 'fmt ');
+        view.setUint32(16, 16, true);
+        view.setUint16(20, 1, true);              // PCM
+        view.setUint16(22, 1, true);              // Mono
+        view.setUint32(24, sampleRate, true);
+        view.setUint32(28, sampleRate * 2, true); // Byte rate
+        view.setUint16(32, 2, true);              // Block align
+        view.setUint16(34, 16, true);             // Bits per sample
+        writeText(36, 'data');
+        view.setUint32(40, samples.length * 2, true);
+        for (let i = 0; i < samples.length; i++) {
+            const s = Math.max(-1, Math.min(1, samples[i]));
+            view.setInt16(44 + i * 2, s < 0 ? s * 0x8000 : s * 0x7fff, true);
         }
-        return {};
+        return new Blob([view], { type: 'audio/wav' });
     }
 
     function scheduleNextClip() {
@@ -69,19 +98,24 @@
 
     function startClip(durationMs) {
         try {
+            if (audioContext.state === 'suspended') audioContext.resume();
             chunks = [];
-            mediaRecorder.start();
+            recording = true;
             setTimeout(() => {
-                try { mediaRecorder.stop(); } catch(e){}
+                recording = false;
+                onClipReady();
             }, durationMs);
         } catch (e) {
-            console.warn('MediaRecorder start failed', e);
+            console.warn('Audio capture start failed', e);
         }
     }
 
     function onClipReady() {
-        if (chunks.length === 0) return;
-        const blob = new Blob(chunks, { type: chunks[0].type || 'audio/webm' });
+        if (chunks.length === 0 || !audioContext) return;
+        const samples = new Float32Array(chunks.reduce((n, c) => n + c.length, 0));
+        let offset = 0;
+        for (const c of chunks) { samples.set(c, offset); offset += c.length; }
+        const blob = encodeWav(samples, audioContext.sampleRate);
         const reader = new FileReader();
         reader.onloadend = () => {
             const base64 = reader.result; // data:... base64
@@ -352,8 +352,17 @@ class VoiceAssistant {
                 }
             }
 
-            // If Gemini didn't work, use backend (which also uses Gemini)
+            // If Gemini didn't work, use backend (which also uses Gemini),
+            // streamed so speaking starts with the first sentence
             if (!aiResponse) {
+                try {
+                    if (await this.streamBackendResponse(transcript)) {
+                        return;
+                    }
+                } catch (streamError) {
+                    console.warn('Streaming response failed, using /api/voice:', streamError);
+                }
+
                 const response = await fetch(API_ENDPOINTS.voice, {
                     method: 'POST',
                     ...FETCH_OPTIONS,
@@ -386,6 +395,83 @@ class VoiceAssistant {
         }
     }
 
+    async streamBackendResponse(transcript) {
+        // Speak each sentence as /api/voice/stream sends it. Returns the
+        // full response, or null if nothing arrived (caller falls back)
+        const response = await fetch(API_ENDPOINTS.voiceStream, {
+            method: 'POST',
+            ...FETCH_OPTIONS,
+            body: JSON.stringify({
+                text: transcript,
+                user_id: '1'
+            })
+        });
+        if (!response.ok || !response.body) {
+            throw new Error('Backend stream error');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const sentences = [];
+        let buffer = '';
+        let finalResponse = null;
+
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // Events are separated by a blank line
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                for (const raw of events) {
+                    const event = this.parseServerEvent(raw);
+                    if (event.name === 'sentence') {
+                        if (!sentences.length) {
+                            this.updateStatus('responding', 'Responding...');
+                        }
+                        sentences.push(event.data.text);
+                        this.responseText.textContent = sentences.join(' ');
+                        this.speak(event.data.text);
+                    } else if (event.name === 'done') {
+                        finalResponse = event.data.response;
+                    }
+                }
+            }
+        } catch (readError) {
+            // Keep what was already spoken; only fail if nothing was
+            if (!sentences.length) throw readError;
+            console.warn('Voice stream interrupted:', readError);
+        }
+
+        if (!sentences.length) {
+            if (!finalResponse) return null;
+            // No sentence events (e.g. empty model output): speak the final response
+            this.updateStatus('responding', 'Responding...');
+            this.responseText.textContent = finalResponse;
+            this.speak(finalResponse);
+        }
+        this.updateStatus('ready', 'Ready');
+        return finalResponse || sentences.join(' ');
+    }
+
+    parseServerEvent(raw) {
+        const event = { name: 'message', data: null };
+        const dataLines = [];
+        for (const line of raw.split('\n')) {
+            if (line.startsWith('event:')) {
+                event.name = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        }
+        if (dataLines.length) {
+            event.data = JSON.parse(dataLines.join('\n'));
+        }
+        return event;
+    }
+
     async getHealthContext() {
         // Get health context for Gemini API
         const context = {
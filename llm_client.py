@@ -0,0 +1,498 @@
+"""
+============================================
+LLM CLIENT MODULE
+============================================
+Shared HTTP client for Gemini generateContent calls: one pooled
+keep-alive session and a per-model availability table, so the common
+path is a warm connection to a model known to work. Calls respect an
+end-to-end deadline, can hedge slow requests to a second model, and
+are not sent at all while the circuit breaker is open. Identical
+concurrent prompts share one upstream request.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta/models'
+POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '8'))
+# Seconds before a model that answered 404 is tried again
+UNAVAILABLE_RETRY_SECONDS = float(os.getenv('LLM_UNAVAILABLE_RETRY_SECONDS', '600'))
+# Seconds a model is skipped after a timeout, connection error, 429 or 5xx
+ERROR_RETRY_SECONDS = float(os.getenv('LLM_ERROR_RETRY_SECONDS', '30'))
+# Failed calls in a row that open the circuit breaker, and seconds it
+# stays open before a single probe call is let through
+BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+# Hedging: if the first model has not answered within this percentile of
+# recent latencies, the same request also goes to the next model
+HEDGE_ENABLED = os.getenv('LLM_HEDGE', '0') == '1'
+HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+
+
+class LLMError(Exception):
+    """No model produced a response"""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open; no request was sent"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed, calls go through. After `failures` failed calls in a row it
+    opens and rejects calls for `reset_seconds`, then turns half-open and
+    lets one probe through: a successful probe closes it, a failed one
+    opens it again.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (counts a rejection if not)"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failures:
+                if self.state != 'open':
+                    print(f"🔌 LLM circuit open for {self.reset_seconds:.0f}s after "
+                          f"{self.consecutive_failures} failed call(s)")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = self.reset_seconds - (time.monotonic() - self.opened_at) if self.state == 'open' else 0.0
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected': self.rejected,
+                'retry_in': round(max(retry_in, 0.0), 1)
+            }
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls
+
+    The first caller for a key runs the call; callers arriving while it
+    is in flight wait for the same result (or exception) instead of
+    making their own. Nothing is kept once the call completes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, call, deadline: Optional[float] = None):
+        """
+        Result of call(), shared with concurrent callers using the same key
+
+        Raises:
+            LLMError: If a waiting caller's deadline passes first
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=remaining(deadline))
+            except FuturesTimeout:
+                raise LLMError("Deadline exceeded waiting for an identical request")
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'in_flight': len(self._calls), 'leaders': self.leaders, 'coalesced': self.coalesced}
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until a time.monotonic() deadline (None: no deadline)"""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class LLMClient:
+    """
+    Pooled client for a list of interchangeable generateContent models
+
+    Models are tried in order of preference: the last one that answered
+    first, then the rest in configured order. A model that answers 404
+    is skipped for UNAVAILABLE_RETRY_SECONDS; one that times out or
+    returns 429/5xx is skipped for ERROR_RETRY_SECONDS (or the server's
+    Retry-After). A 400 moves on to the next model without being
+    remembered, since it usually concerns the request, not the model.
+
+    Args:
+        api_key: Sent in the x-goog-api-key header (kept out of URLs and logs)
+        models: Model names in order of preference
+        base_url: Models endpoint; point it at a local stand-in for tests
+        timeout: Default per-request timeout in seconds
+        hedge: Also send a slow request to the next model (generate only)
+    """
+
+    def __init__(self, api_key: str, models: List[str], base_url: str = DEFAULT_BASE_URL,
+                 timeout: float = 10, pool_size: int = POOL_SIZE, hedge: bool = HEDGE_ENABLED):
+        self.api_key = api_key
+        self.models = list(models)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json', 'x-goog-api-key': api_key})
+        self.availability: Dict[str, Dict[str, Any]] = {
+            model: {'available': None, 'retry_at': 0.0, 'last_status': None,
+                    'successes': 0, 'failures': 0, 'last_latency_ms': None}
+            for model in self.models
+        }
+        self.preferred: Optional[str] = None
+        self.breaker = CircuitBreaker()
+        self.single_flight = SingleFlight()
+        self.hedge = hedge
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=200)  # Recent successful request latencies (ms)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-hedge') if hedge else None
+        self._lock = threading.Lock()
+
+    def candidate_models(self) -> List[str]:
+        """Models worth trying now, best first"""
+        now = time.monotonic()
+        usable = [m for m in self.models if self.availability[m]['retry_at'] <= now]
+        if self.preferred in usable:
+            usable.remove(self.preferred)
+            usable.insert(0, self.preferred)
+        return usable
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, deadline: Optional[float] = None) -> str:
+        """
+        Text of the first candidate answer for a single-turn prompt
+
+        Concurrent calls with the same prompt share one upstream request.
+
+        Args:
+            timeout: Per-request timeout (default self.timeout)
+            deadline: time.monotonic() by which the whole call must be done;
+                each request's timeout is cut to the time left
+
+        Raises:
+            CircuitOpenError: If the breaker is open (nothing was sent)
+            LLMError: If every model is unavailable, failed or returned no
+                text, or the deadline passed
+        """
+        fingerprint = hashlib.sha1(prompt.encode('utf-8')).hexdigest()
+        return self.single_flight.do(fingerprint, lambda: self._generate(prompt, timeout, deadline), deadline)
+
+    def _generate(self, prompt: str, timeout: Optional[float], deadline: Optional[float]) -> str:
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit open")
+        try:
+            candidates = self.candidate_models()
+            if not candidates:
+                raise LLMError("No model available (all in retry back-off)")
+            body = {'contents': [{'parts': [{'text': prompt}]}]}
+            hedge_delay = self.hedge_delay() if self.hedge and len(candidates) > 1 else None
+            if hedge_delay is None:
+                text = self._generate_in_order(candidates, body, timeout, deadline)
+            else:
+                text = self._generate_hedged(candidates, body, timeout, deadline, hedge_delay)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return text
+
+    def _generate_in_order(self, candidates: List[str], body: Dict, timeout: Optional[float],
+                           deadline: Optional[float]) -> str:
+        last_error = None
+        for model in candidates:
+            outcome, value = self._attempt(model, body, self._request_timeout(timeout, deadline))
+            if outcome == 'ok':
+                return value
+            last_error = value
+            if outcome == 'stop':
+                break
+        raise LLMError(f"No model answered ({last_error})")
+
+    def _generate_hedged(self, candidates: List[str], body: Dict, timeout: Optional[float],
+                         deadline: Optional[float], hedge_delay: float) -> str:
+        """
+        Send to the first model; if it has not answered after hedge_delay
+        seconds, send the same request to the second and take whichever
+        answers first. If the first fails quickly, go on in order.
+        """
+        first = self._hedge_pool.submit(self._attempt, candidates[0], body,
+                                        self._request_timeout(timeout, deadline))
+        try:
+            outcome, value = first.result(timeout=hedge_delay)
+        except FuturesTimeout:
+            pass
+        else:
+            if outcome == 'ok':
+                return value
+            if outcome == 'stop':
+                raise LLMError(f"No model answered ({value})")
+            return self._generate_in_order(candidates[1:], body, timeout, deadline)
+
+        with self._lock:
+            self.hedges += 1
+        second = self._hedge_pool.submit(self._attempt, candidates[1], body,
+                                         self._request_timeout(timeout, deadline))
+        last_error = None
+        try:
+            for future in as_completed((first, second), timeout=remaining(deadline)):
+                outcome, value = future.result()
+                if outcome == 'ok':
+                    if future is second:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return value
+                last_error = value
+        except FuturesTimeout:
+            raise LLMError("Deadline exceeded")
+        raise LLMError(f"No model answered ({last_error})")
+
+    def _request_timeout(self, timeout: Optional[float], deadline: Optional[float]) -> float:
+        """Per-request timeout, cut to what is left of the deadline"""
+        timeout = timeout or self.timeout
+        left = remaining(deadline)
+        if left is None:
+            return timeout
+        if left <= 0:
+            raise LLMError("Deadline exceeded")
+        return min(timeout, left)
+
+    def _attempt(self, model: str, body: Dict, timeout: float) -> Tuple[str, Any]:
+        """
+        One generateContent request
+
+        Returns:
+            ('ok', text), ('next', error) if the next model is worth
+            trying, or ('stop', error)
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.base_url}/{model}:generateContent", json=body, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"⚠️ Error with {model}: {e}")
+            self._mark_failed(model, None, ERROR_RETRY_SECONDS)
+            return 'next', e
+
+        if response.ok:
+            self._mark_ok(model, (time.perf_counter() - started) * 1000)
+            data = response.json()
+            if data.get('candidates') and data['candidates'][0].get('content'):
+                return 'ok', data['candidates'][0]['content']['parts'][0]['text']
+            return 'stop', f"{model} returned no text"
+
+        error = f"{model}: {response.status_code}"
+        return ('next', error) if self._try_next(model, response) else ('stop', error)
+
+    def generate_stream(self, prompt: str, timeout: Optional[float] = None,
+                        deadline: Optional[float] = None) -> Iterator[str]:
+        """
+        Text pieces of the first candidate answer as the model produces them
+        (streamGenerateContent with server-sent events)
+
+        Models are tried as in generate() until one starts streaming; once
+        text has been yielded there is no switching to another model. The
+        deadline bounds connecting and each read, not the whole stream.
+
+        Raises:
+            CircuitOpenError: If the breaker is open (nothing was sent)
+            LLMError: If no model started streaming, or the stream broke off
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit open")
+        settled = False
+        try:
+            for piece in self._stream_in_order(prompt, timeout, deadline):
+                if not settled:
+                    # Streaming started: the call counts as a success
+                    settled = True
+                    self.breaker.record_success()
+                yield piece
+        except Exception:
+            settled = True
+            self.breaker.record_failure()
+            raise
+        finally:
+            # Empty stream, or closed by the caller before any text
+            if not settled:
+                self.breaker.record_success()
+
+    def _stream_in_order(self, prompt: str, timeout: Optional[float], deadline: Optional[float]) -> Iterator[str]:
+        candidates = self.candidate_models()
+        if not candidates:
+            raise LLMError("No model available (all in retry back-off)")
+
+        body = {'contents': [{'parts': [{'text': prompt}]}]}
+        last_error = None
+        for model in candidates:
+            started = time.perf_counter()
+            try:
+                response = self.session.post(f"{self.base_url}/{model}:streamGenerateContent",
+                                             params={'alt': 'sse'}, json=body,
+                                             timeout=self._request_timeout(timeout, deadline), stream=True)
+            except requests.RequestException as e:
+                print(f"⚠️ Error with {model}: {e}")
+                self._mark_failed(model, None, ERROR_RETRY_SECONDS)
+                last_error = e
+                continue
+
+            if response.ok:
+                # Latency here is time to response headers, not to the last token
+                self._mark_ok(model, (time.perf_counter() - started) * 1000)
+                try:
+                    yield from self._sse_text(response)
+                except (requests.RequestException, ValueError) as e:
+                    self._mark_failed(model, None, ERROR_RETRY_SECONDS)
+                    raise LLMError(f"{model} stream broke off: {e}")
+                finally:
+                    response.close()
+                return
+
+            response.close()
+            last_error = f"{model}: {response.status_code}"
+            if not self._try_next(model, response):
+                break
+
+        raise LLMError(f"No model answered ({last_error})")
+
+    @staticmethod
+    def _sse_text(response: requests.Response) -> Iterator[str]:
+        """Text parts of the first candidate in each 'data:' event"""
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            data = json.loads(line[5:])
+            for candidate in data.get('candidates', [])[:1]:
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
+
+    def _try_next(self, model: str, response: requests.Response) -> bool:
+        """Record a failed status; True if the next model is worth trying"""
+        if response.status_code == 404:
+            print(f"⚠️ Model {model} not available, skipping it for {UNAVAILABLE_RETRY_SECONDS:.0f}s")
+            self._mark_failed(model, 404, UNAVAILABLE_RETRY_SECONDS)
+            return True
+        if response.status_code == 400:
+            print(f"⚠️ {model} rejected the request (400), trying next model")
+            return True
+
+        # Rate limits and server errors: back off and stop, as another
+        # model is unlikely to fare better right now
+        retry_after = response.headers.get('Retry-After', '')
+        back_off = float(retry_after) if retry_after.isdigit() else ERROR_RETRY_SECONDS
+        print(f"⚠️ Error with {model}: {response.status_code}")
+        self._mark_failed(model, response.status_code, back_off)
+        return False
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait before hedging: HEDGE_PERCENTILE of recent request
+        latencies, or None until HEDGE_MIN_SAMPLES requests have succeeded
+        """
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(int(len(ordered) * HEDGE_PERCENTILE / 100), len(ordered) - 1)
+        return ordered[index] / 1000
+
+    def _mark_ok(self, model: str, latency_ms: float):
+        with self._lock:
+            state = self.availability[model]
+            state.update(available=True, retry_at=0.0, last_status=200, last_latency_ms=round(latency_ms, 1))
+            state['successes'] += 1
+            self.preferred = model
+            self._latencies.append(latency_ms)
+
+    def _mark_failed(self, model: str, status: Optional[int], back_off: float):
+        with self._lock:
+            state = self.availability[model]
+            state.update(available=False if status == 404 else state['available'],
+                         retry_at=time.monotonic() + back_off, last_status=status)
+            state['failures'] += 1
+            if self.preferred == model:
+                self.preferred = None
+
+    def status(self) -> Dict[str, Any]:
+        """Availability table with seconds until each skipped model is retried"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'preferred': self.preferred,
+                'breaker': self.breaker.status(),
+                'single_flight': self.single_flight.status(),
+                'hedging': {'enabled': self.hedge, 'hedges': self.hedges, 'hedge_wins': self.hedge_wins},
+                'models': {
+                    model: dict({k: v for k, v in state.items() if k != 'retry_at'},
+                                retry_in=round(max(state['retry_at'] - now, 0.0), 1))
+                    for model, state in self.availability.items()
+                }
+            }
+
+    def close(self):
+        self.session.close()
+        if self._hedge_pool:
+            self._hedge_pool.shutdown(wait=False)
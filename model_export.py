@@ -0,0 +1,124 @@
+"""
+============================================
+MODEL EXPORT TOOL
+============================================
+Converts the Keras CNN fall detector to lighter CPU runtimes
+(TFLite with optional float16/int8 quantization, and ONNX)
+
+Usage:
+    python model_export.py models/fall/cnn_fall_detector.h5 --formats tflite onnx --quantize float16 int8
+"""
+
+import os
+import argparse
+from typing import List, Optional
+
+import numpy as np
+
+from cnn_runtime import RUNTIME_FILES, REFERENCE_FILE
+
+
+def _sample_inputs(model, count: int, calibration: Optional[str] = None) -> np.ndarray:
+    """Inputs used for int8 calibration and for the reference outputs"""
+    if calibration:
+        data = np.load(calibration).astype(np.float32)
+        return data[:count]
+    shape = tuple(d or 1 for d in model.input_shape[1:])
+    return np.random.default_rng(0).normal(size=(count,) + shape).astype(np.float32)
+
+
+def export_tflite(model, output_path: str, quantization: str = 'none',
+                  representative: Optional[np.ndarray] = None) -> str:
+    """
+    Convert a Keras model to TFLite
+
+    Args:
+        model: Loaded Keras model
+        output_path: Destination .tflite file
+        quantization: 'none', 'float16' or 'int8'
+        representative: Calibration inputs, required for int8
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if representative is None:
+            raise ValueError("int8 quantization requires representative inputs")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([row[np.newaxis]] for row in representative)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    return output_path
+
+
+def export_onnx(model, output_path: str, opset: int = 13) -> str:
+    """Convert a Keras model to ONNX using tf2onnx"""
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+    return output_path
+
+
+def save_reference(model, output_path: str, inputs: np.ndarray) -> str:
+    """Store Keras outputs so runtimes can be verified without loading TensorFlow"""
+    outputs = np.asarray(model.predict(inputs, verbose=0), dtype=np.float32)
+    np.savez(output_path, inputs=inputs, outputs=outputs)
+    return output_path
+
+
+def export_all(keras_path: str, formats: List[str], quantizations: List[str],
+               samples: int = 64, calibration: Optional[str] = None) -> List[str]:
+    """Export the requested formats next to the Keras model"""
+    from tensorflow import keras
+
+    model = keras.models.load_model(keras_path)
+    model_dir = os.path.dirname(os.path.abspath(keras_path))
+    inputs = _sample_inputs(model, samples, calibration)
+    written = []
+
+    if 'tflite' in formats:
+        for quantization in ['none'] + [q for q in quantizations if q != 'none']:
+            path = os.path.join(model_dir, RUNTIME_FILES[('tflite', quantization)])
+            try:
+                written.append(export_tflite(model, path, quantization, inputs))
+                print(f"✅ TFLite ({quantization}) written to {path}")
+            except Exception as e:
+                print(f"⚠️ TFLite ({quantization}) export failed: {e}")
+
+    if 'onnx' in formats:
+        path = os.path.join(model_dir, RUNTIME_FILES[('onnx', 'none')])
+        try:
+            written.append(export_onnx(model, path))
+            print(f"✅ ONNX written to {path}")
+        except Exception as e:
+            print(f"⚠️ ONNX export failed: {e}")
+
+    written.append(save_reference(model, os.path.join(model_dir, REFERENCE_FILE), inputs))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the CNN fall detector to lighter runtimes')
+    parser.add_argument('keras_model', help='Path to cnn_fall_detector.h5')
+    parser.add_argument('--formats', nargs='+', default=['tflite', 'onnx'], choices=['tflite', 'onnx'])
+    parser.add_argument('--quantize', nargs='*', default=[], choices=['none', 'float16', 'int8'],
+                        help='Extra TFLite quantized variants')
+    parser.add_argument('--samples', type=int, default=64,
+                        help='Number of reference/calibration inputs')
+    parser.add_argument('--calibration', help='Optional .npy file of real model inputs')
+    args = parser.parse_args()
+
+    export_all(args.keras_model, args.formats, args.quantize, args.samples, args.calibration)
+
+
+if __name__ == '__main__':
+    main()
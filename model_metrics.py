@@ -0,0 +1,183 @@
+"""
+============================================
+MODEL METRICS MODULE
+============================================
+Call counters, latency histograms and input size distributions for
+model calls, labelled by model and execution path (real model,
+rule-based fallback, error), so silent fallbacks show up in stats
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Upper bucket bounds; one more bucket counts everything above the last
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = tuple(4 ** i for i in range(13))  # 1 .. 16M elements
+
+# Paths that mean the real model did not produce the answer
+FALLBACK_PATHS = frozenset({'fallback', 'threshold', 'unavailable', 'none'})
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate quantiles"""
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {
+                (f"<={bound:g}" if i < len(self.bounds) else f">{self.bounds[-1]:g}"): bucket_count
+                for i, (bound, bucket_count) in enumerate(zip(self.bounds + (None,), self.counts))
+                if bucket_count
+            }
+        }
+
+
+def input_size(data: Any) -> Optional[int]:
+    """
+    Size of a model input in elements: bytes or characters for binary
+    and text, values for arrays, summed over dicts and nested lists
+    """
+    if data is None:
+        return None
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    if hasattr(data, 'size') and hasattr(data, 'shape'):
+        return int(data.size)
+    if isinstance(data, dict):
+        return sum(input_size(value) or 0 for value in data.values())
+    if isinstance(data, (list, tuple)):
+        if data and (isinstance(data[0], (dict, list, tuple)) or getattr(data[0], 'ndim', 0)):
+            return sum(input_size(item) or 0 for item in data)
+        return len(data)
+    return 1
+
+
+def execution_path(model: Any, result: Any) -> str:
+    """
+    How a call was answered
+
+    Results that report it ('method' of the fall fallbacks, 'stages' of
+    the fall cascade, 'error') win; otherwise 'model' when a trained
+    model is loaded, and 'fallback' when the model is not loaded or
+    answers with rule-based analysis (uses_fallback).
+    """
+    if model is None:
+        return 'unavailable'
+    if isinstance(result, dict):
+        if 'error' in result:
+            return 'error'
+        if 'method' in result:
+            return result['method']
+        if 'stages' in result:
+            return '+'.join(result['stages']) or 'none'
+    return 'model' if model.is_loaded and not model.uses_fallback else 'fallback'
+
+
+class ModelMetrics:
+    """Thread-safe per-model, per-path call statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self.started_at = time.time()
+
+    def observe(self, model_name: str, path: str, seconds: float, size: Optional[int] = None):
+        with self._lock:
+            series = self._paths.get((model_name, path))
+            if series is None:
+                series = self._paths[(model_name, path)] = {'calls': 0, 'latency': Histogram(LATENCY_BUCKETS_MS)}
+            series['calls'] += 1
+            series['latency'].observe(seconds * 1000)
+            if size is not None:
+                sizes = self._sizes.get(model_name)
+                if sizes is None:
+                    sizes = self._sizes[model_name] = Histogram(SIZE_BUCKETS)
+                sizes.observe(size)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per model: call count, fallback and error rates, and per path
+        calls, share and latency (ms); plus the input size distribution
+        """
+        with self._lock:
+            models: Dict[str, Dict[str, Any]] = {}
+            for (model_name, path), series in sorted(self._paths.items()):
+                entry = models.setdefault(model_name, {'calls': 0, 'paths': {}})
+                entry['calls'] += series['calls']
+                entry['paths'][path] = {'calls': series['calls'], 'latency_ms': series['latency'].snapshot()}
+            for model_name, entry in models.items():
+                calls = entry['calls']
+                fallback = sum(p['calls'] for name, p in entry['paths'].items() if name in FALLBACK_PATHS)
+                errors = entry['paths'].get('error', {}).get('calls', 0)
+                for path in entry['paths'].values():
+                    path['share'] = path['calls'] / calls
+                entry['fallback_rate'] = fallback / calls
+                entry['error_rate'] = errors / calls
+                sizes = self._sizes.get(model_name)
+                entry['input_size'] = sizes.snapshot() if sizes else None
+        return {'since': self.started_at, 'models': models}
+
+    def reset(self):
+        with self._lock:
+            self._paths.clear()
+            self._sizes.clear()
+            self.started_at = time.time()
+
+
+def instrumented(model_name: str) -> Callable:
+    """
+    Decorator for ModelManager methods: times the call and records it
+    under model_name with its execution path and first argument's size
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            model = kwargs.get('model') or self.models.get(model_name)
+            size = input_size(args[0]) if args else None
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:
+                self.metrics.observe(model_name, 'error', time.perf_counter() - start, size)
+                raise
+            self.metrics.observe(model_name, execution_path(model, result), time.perf_counter() - start, size)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,243 @@
+"""
+============================================
+MODEL REGISTRY MODULE
+============================================
+Versioned model directories (models/<kind>/<version>/) that can be
+loaded, warmed up and swapped into the model manager while the server
+keeps serving requests
+"""
+
+import os
+import re
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+MODELS_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+UNVERSIONED = 'unversioned'  # Model files directly in the model directory
+WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '10'))
+
+
+def version_key(version: str) -> Tuple:
+    """Sort key ordering 'v2' before 'v10' and dates chronologically"""
+    return tuple((0, int(part)) if part.isdigit() else (1, part)
+                 for part in re.split(r'(\d+)', version) if part)
+
+
+def list_versions(model_dir: str) -> List[str]:
+    """
+    Version subdirectories of a model directory, oldest first
+
+    Names starting with '.' or '_' are skipped, so a new version can be
+    copied into a staging directory and renamed into place when complete.
+    """
+    if not os.path.isdir(model_dir):
+        return []
+    versions = [name for name in os.listdir(model_dir)
+                if name[0] not in '._' and os.path.isdir(os.path.join(model_dir, name))]
+    return sorted(versions, key=version_key)
+
+
+def resolve_version(model_dir: str, version: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Directory of a model version
+
+    Args:
+        model_dir: Model kind directory (e.g. models/fall); every
+            subdirectory is taken as a version, so never pass the models
+            root itself (use version=UNVERSIONED for files there)
+        version: Version to load (default: newest, or the files directly
+            in model_dir when it has no version subdirectories)
+
+    Returns:
+        Tuple of (version, path)
+    """
+    if version and version != UNVERSIONED:
+        path = os.path.join(model_dir, version)
+        if not os.path.isdir(path):
+            raise ValueError(f"Unknown model version: {version}")
+        return version, path
+    versions = [] if version == UNVERSIONED else list_versions(model_dir)
+    if versions:
+        return versions[-1], os.path.join(model_dir, versions[-1])
+    return UNVERSIONED, model_dir
+
+
+def _signature(path: str) -> Tuple:
+    """Names, sizes and modification times of the files in a directory"""
+    entries = []
+    for name in sorted(os.listdir(path)):
+        stat = os.stat(os.path.join(path, name))
+        entries.append((name, stat.st_size, stat.st_mtime))
+    return tuple(entries)
+
+
+class ModelRegistry:
+    """
+    Loads model versions in the background and swaps them in atomically
+
+    A new version is loaded into a fresh model object and warmed up
+    before model_manager.models[name] is replaced, which is a single
+    reference assignment. Requests that already fetched the old model
+    finish on it; later requests get the new one. A version that fails
+    to load or warm up never replaces the active model.
+
+    Args:
+        manager: ModelManager whose models are swapped
+        root: Directory holding one subdirectory per model kind
+    """
+
+    def __init__(self, manager, root: str = MODELS_ROOT):
+        self.manager = manager
+        self.root = root
+        self.specs: Dict[str, Dict[str, Any]] = {}
+        self.loading: Dict[str, str] = {}
+        self.last_error: Dict[str, Optional[str]] = {}
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._seen: Dict[str, Tuple] = {}
+        self._rejected: Dict[str, Tuple] = {}
+
+    def register(self, name: str, factory: Callable, subdir: str):
+        """
+        Make a model hot-swappable
+
+        Args:
+            name: Key in model_manager.models (e.g. 'fall_detection')
+            factory: Called with a version directory, returns an unloaded model
+            subdir: Model kind directory under root (e.g. 'fall')
+        """
+        self.specs[name] = {'factory': factory, 'dir': os.path.join(self.root, subdir)}
+        self.history.setdefault(name, [])
+        self.last_error.setdefault(name, None)
+
+    def versions(self, name: str) -> List[str]:
+        """Versions available on disk for a registered model"""
+        return list_versions(self.specs[name]['dir'])
+
+    def active_version(self, name: str) -> Optional[str]:
+        model = self.manager.get_model(name)
+        return getattr(model, 'version', None)
+
+    def activate(self, name: str, version: Optional[str] = None, background: bool = True) -> Dict[str, Any]:
+        """
+        Load a version (default: newest), warm it up and swap it in
+
+        Returns:
+            Status dict; with background=True loading continues in a thread
+            and its outcome shows up in status()
+        """
+        if name not in self.specs:
+            raise ValueError(f"Model is not hot-swappable: {name}")
+        version, path = resolve_version(self.specs[name]['dir'], version)
+
+        with self._lock:
+            if name in self.loading:
+                raise RuntimeError(f"{name} version {self.loading[name]} is still loading")
+            self.loading[name] = version
+
+        if background:
+            threading.Thread(target=self._load_and_swap, args=(name, version, path),
+                             name=f"model-load-{name}", daemon=True).start()
+            return {'model': name, 'version': version, 'state': 'loading'}
+        return self._load_and_swap(name, version, path)
+
+    def _load_and_swap(self, name: str, version: str, path: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            model = self.specs[name]['factory'](path)
+            model.version = version
+            model.load_model()
+            if not model.is_loaded:
+                raise RuntimeError(f"no model files could be loaded from {path}")
+            load_ms = (time.perf_counter() - started) * 1000
+
+            warmup_ms = None
+            if hasattr(model, 'warm_up'):
+                warm_started = time.perf_counter()
+                model.warm_up()
+                warmup_ms = (time.perf_counter() - warm_started) * 1000
+
+            with self._lock:
+                previous = self.active_version(name)
+                self.manager.models[name] = model  # Atomic swap
+                record = {
+                    'version': version,
+                    'previous_version': previous,
+                    'activated_at': datetime.now().isoformat(),
+                    'load_ms': round(load_ms, 1),
+                    'warmup_ms': round(warmup_ms, 1) if warmup_ms is not None else None
+                }
+                self.history[name].append(record)
+                self.last_error[name] = None
+            print(f"✅ {name} switched to version {version} (was {previous})")
+            return dict(record, model=name, state='active')
+        except Exception as e:
+            self.last_error[name] = f"{version}: {e}"
+            print(f"⚠️ Could not activate {name} version {version}: {e}")
+            return {'model': name, 'version': version, 'state': 'failed', 'error': str(e)}
+        finally:
+            with self._lock:
+                self.loading.pop(name, None)
+
+    def status(self) -> Dict[str, Any]:
+        """Active and available versions of every registered model"""
+        return {
+            name: {
+                'active_version': self.active_version(name),
+                'available_versions': self.versions(name),
+                'loading': self.loading.get(name),
+                'last_error': self.last_error.get(name),
+                'history': self.history[name][-10:]
+            }
+            for name in self.specs
+        }
+
+    def watch(self, interval: float = WATCH_INTERVAL):
+        """Activate new version directories as they appear (polling thread)"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, args=(interval,),
+                                         name='model-watcher', daemon=True)
+        self._watcher.start()
+        print(f"👀 Watching {self.root} for new model versions")
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            for name in list(self.specs):
+                try:
+                    self.check_for_update(name)
+                except Exception as e:
+                    print(f"⚠️ Model watcher error for {name}: {e}")
+
+    def check_for_update(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Activate the newest version of a model if it is not active yet
+
+        The newest directory must look the same on two consecutive checks,
+        so a version that is still being copied is not loaded half-written.
+        A version that failed is retried only after its files change.
+        """
+        versions = self.versions(name)
+        if not versions or versions[-1] == self.active_version(name) or name in self.loading:
+            return None
+        version = versions[-1]
+        signature = (version, _signature(os.path.join(self.specs[name]['dir'], version)))
+        previous, self._seen[name] = self._seen.get(name), signature
+        if previous != signature or self._rejected.get(name) == signature:
+            return None
+
+        result = self.activate(name, version, background=False)
+        if result['state'] == 'failed':
+            self._rejected[name] = signature
+        return result
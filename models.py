@@ -14,6 +14,9 @@ import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from text_matcher import keyword_matcher
+from model_metrics import ModelMetrics, instrumented
+
 class ModelInterface:
     """Base class for all AI models"""
     
@@ -21,6 +24,10 @@ class ModelInterface:
         self.model_path = model_path
         self.model = None
         self.is_loaded = False
+        # True when a loaded model answers with rule-based analysis
+        # instead of a trained model (reported as 'fallback' in metrics)
+        self.uses_fallback = False
+        self.version = None
     
     def load_model(self):
         """Load the model from disk"""
@@ -178,6 +185,21 @@ class HealthRiskModel(ModelInterface):
     Predicts health risks based on vitals and history
     """
     
+    # Column order of batched vitals
+    VITAL_FIELDS = ('heartRate', 'temperature', 'oxygen', 'systolic', 'diastolic')
+    
+    # Risk factor bits, in the order the per-patient assessment lists them
+    RISK_FACTORS = (
+        (1, 'Abnormal heart rate'),
+        (2, 'Elevated temperature'),
+        (4, 'Low temperature'),
+        (8, 'Low oxygen saturation'),
+        (16, 'High blood pressure'),
+        (32, 'Low blood pressure')
+    )
+    RISK_LEVELS = ('low', 'medium', 'high')
+    RISK_CONFIDENCE = (0.95, 0.85, 0.90)
+    
     def load_model(self):
         """
         Load health risk prediction model
@@ -262,6 +284,102 @@ class HealthRiskModel(ModelInterface):
             'factors': risk_factors,
             'timestamp': datetime.now().isoformat()
         }
+    
+    @classmethod
+    def vitals_matrix(cls, vitals: Any):
+        """
+        Normalize batched vitals to a float (5, N) matrix in VITAL_FIELDS order
+        
+        Args:
+            vitals: (5, N) array, or dict of equal-length columns keyed by
+                field name; missing fields and NaN entries mean "not measured"
+                and take the same defaults as the per-patient rules
+        """
+        import numpy as np
+        
+        if isinstance(vitals, dict):
+            length = max((len(v) for v in vitals.values()), default=0)
+            columns = [vitals.get(field) for field in cls.VITAL_FIELDS]
+            return np.array([
+                np.full(length, np.nan) if column is None else np.asarray(column, dtype=np.float64)
+                for column in columns
+            ])
+        matrix = np.asarray(vitals, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[0] != len(cls.VITAL_FIELDS):
+            raise ValueError(f"Batched vitals must have shape ({len(cls.VITAL_FIELDS)}, N)")
+        return matrix
+    
+    def predict_batch(self, vitals: Any) -> Dict[str, Any]:
+        """
+        Vectorized rule-based assessment for N patients at once
+        
+        Applies the same rules as _assess_risk_rule_based, plus the
+        dashboard triage level and the 0-100 health score, to every
+        patient in one pass.
+        
+        Args:
+            vitals: Columnar vitals, see vitals_matrix
+        
+        Returns:
+            Dict of length-N arrays: risk_level (0 low, 1 medium, 2 high),
+            factors (RISK_FACTORS bitmask), confidence, triage_level
+            (0-2) and health_score
+        """
+        import numpy as np
+        
+        matrix = self.vitals_matrix(vitals)
+        missing = np.isnan(matrix)
+        value = lambda row, default: np.where(missing[row], default, matrix[row])
+        
+        # Risk factors (defaults as in _assess_risk_rule_based)
+        hr, temp, oxygen = value(0, 75), value(1, 98.6), value(2, 98)
+        systolic, diastolic = value(3, 120), value(4, 80)
+        high_bp = (systolic > 140) | (diastolic > 90)
+        low_bp = ~high_bp & ((systolic < 90) | (diastolic < 60))
+        bits = np.stack([
+            (hr > 100) | (hr < 60),
+            temp > 100.4,
+            temp < 97.0,
+            oxygen < 95,
+            high_bp,
+            low_bp
+        ])
+        weights = np.array([1, 1, 1, 2, 1, 1])
+        masks = np.array([bit for bit, _ in self.RISK_FACTORS], dtype=np.uint8)
+        factors = masks @ bits.astype(np.uint8)
+        risk_level = np.minimum(weights @ bits, 2).astype(np.int8)
+        
+        # Dashboard triage (vitals part of calculate_risk_level)
+        hr = value(0, 72)
+        triage = np.where(
+            (hr > 100) | (hr < 60) | (temp > 100.4) | (oxygen < 95), 2,
+            np.where((hr > 90) | (hr < 65) | (temp > 99.5) | (oxygen < 97), 1, 0)
+        ).astype(np.int8)
+        
+        # Health score (calculate_health_score)
+        hr = value(0, 80)
+        scores = np.stack([
+            np.where((hr >= 60) & (hr <= 100), 100, np.maximum(0, 100 - np.abs(hr - 80))),
+            np.where((temp >= 97) & (temp <= 99), 100, np.maximum(0, 100 - np.abs(temp - 98.6) * 10)),
+            np.where((oxygen >= 95) & (oxygen <= 100), 100, np.maximum(0, oxygen)),
+            np.where((systolic >= 90) & (systolic <= 120) & (diastolic >= 60) & (diastolic <= 80), 100,
+                     np.maximum(0, 100 - (np.abs(systolic - 120) / 2 + np.abs(diastolic - 80))))
+        ])
+        health_score = scores.mean(axis=0)
+        
+        return {
+            'risk_level': risk_level,
+            'factors': factors,
+            'confidence': np.array(self.RISK_CONFIDENCE)[risk_level],
+            'triage_level': triage,
+            'health_score': health_score
+        }
+    
+    @classmethod
+    def factor_labels(cls, mask: int) -> List[str]:
+        """Decode a risk factor bitmask into the per-patient factor strings"""
+        labels = [label for bit, label in cls.RISK_FACTORS if mask & bit]
+        return labels or ['All vitals within normal range']
 
 
 class CoughDetectionModel(ModelInterface):
@@ -276,16 +394,19 @@ class CoughDetectionModel(ModelInterface):
         # For now, use audio analysis
         print("⚠️ CoughDetectionModel: Using audio analysis (ML model not loaded)")
         self.is_loaded = True  # Enable analysis mode
+        self.uses_fallback = True
     
-    def predict(self, audio_data: bytes) -> Dict[str, Any]:
+    def predict(self, audio_data: bytes, sample_rate: Optional[int] = None) -> Dict[str, Any]:
         """
         Detect cough in audio
         
         Args:
-            audio_data: Audio bytes or file path
+            audio_data: WAV bytes, raw 16-bit PCM bytes or float samples
+            sample_rate: Sample rate of raw PCM / samples (default 16 kHz)
         
         Returns:
-            Detection result with confidence and frequency
+            Detection result with confidence, cough count ('frequency')
+            and the individual cough events
         """
         if not self.is_loaded:
             return {
@@ -297,16 +418,25 @@ class CoughDetectionModel(ModelInterface):
         
         try:
             # Analyze audio features
-            features = self._analyze_audio(audio_data)
+            analysis = self._analyze_audio(audio_data, sample_rate)
             
-            # Simple rule-based detection (replace with ML model)
-            detected, confidence = self._detect_from_features(features)
+            # Simple rule-based detection per event (replace with ML model)
+            coughs = []
+            confidence = 0.0
+            for event in analysis['events']:
+                detected, event_confidence = self.classify_event(event)
+                if detected:
+                    coughs.append(dict(event, confidence=event_confidence))
+                    confidence = max(confidence, event_confidence)
             
+            minutes = analysis['duration'] / 60.0
             return {
-                'detected': detected,
+                'detected': bool(coughs),
                 'confidence': confidence,
-                'frequency': features.get('frequency', 0),
-                'duration': features.get('duration', 0),
+                'frequency': len(coughs),  # Coughs in this clip
+                'coughs_per_minute': len(coughs) / minutes if minutes else 0.0,
+                'duration': sum(c['duration'] for c in coughs) / len(coughs) if coughs else 0,
+                'events': coughs,
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -315,29 +445,35 @@ class CoughDetectionModel(ModelInterface):
                 'detected': False,
                 'confidence': 0.0,
                 'frequency': 0,
+                'error': str(e),
                 'timestamp': datetime.now().isoformat()
             }
     
-    def _analyze_audio(self, audio_data: bytes) -> Dict:
-        """Analyze audio features"""
-        # TODO: Use librosa or similar for actual audio analysis
-        # For now, return simulated features
+    def _analyze_audio(self, audio_data: Any, sample_rate: Optional[int] = None) -> Dict:
+        """Decode audio and segment it into candidate events"""
+        import numpy as np
+        from audio_features import decode_audio, analyze_audio, DEFAULT_SAMPLE_RATE
         
-        import random
+        if isinstance(audio_data, np.ndarray):
+            samples, sample_rate = audio_data.astype(np.float32, copy=False), sample_rate or DEFAULT_SAMPLE_RATE
+        else:
+            samples, sample_rate = decode_audio(audio_data, sample_rate)
+        return analyze_audio(samples, sample_rate)
+    
+    def classify_event(self, event: Dict) -> tuple:
+        """
+        Classify one segmented audio event
         
-        # Simulate audio analysis
-        return {
-            'frequency': random.uniform(100, 500),  # Cough frequency range
-            'duration': random.uniform(0.1, 0.5),
-            'amplitude': random.uniform(0.3, 1.0),
-            'spectral_centroid': random.uniform(1000, 3000)
-        }
+        Returns:
+            (detected, confidence)
+        """
+        return self._detect_from_features(event)
     
     def _detect_from_features(self, features: Dict) -> tuple:
         """Detect cough from audio features"""
-        # Simple threshold-based detection
+        # Simple threshold-based detection on one audio event
         # Cough characteristics:
-        # - Frequency: 100-500 Hz
+        # - Frequency: 100-500 Hz (energy-weighted dominant frequency)
         # - Duration: 0.1-0.5 seconds
         # - Amplitude: Moderate to high
         
@@ -369,44 +505,67 @@ class FallDetectionModel(ModelInterface):
     Uses models from models/ directory
     """
     
+    # Cascade settings: the CNN only runs when the RF probability falls
+    # inside the uncertain band [CASCADE_LOW, CASCADE_HIGH]
+    CASCADE_LOW = float(os.getenv('FALL_CASCADE_LOW', '0.2'))
+    CASCADE_HIGH = float(os.getenv('FALL_CASCADE_HIGH', '0.8'))
+    RF_WEIGHT = float(os.getenv('FALL_RF_WEIGHT', '0.6'))
+
     def __init__(self, model_path: Optional[str] = None):
         super().__init__(model_path)
         self.cnn_model = None
         self.rf_model = None
         self.scaler = None
-    
+
     def load_model(self):
-        """Load fall detection models"""
+        """
+        Load fall detection models
+
+        Uses model_path when given (one version directory). Otherwise the
+        newest version under models/fall/ (or FALL_MODEL_VERSION), falling
+        back to files directly in models/fall/ or models/.
+        """
         try:
-            import joblib
-            import tensorflow as tf
             import os
-            
-            # Prefer models/fall/, fallback to models/
-            models_root = os.path.join(os.path.dirname(__file__), 'models')
-            candidate_dirs = [
-                os.path.join(models_root, 'fall'),
-                models_root,
-            ]
-            model_dir = next((p for p in candidate_dirs if os.path.isdir(p)), models_root)
-            
-            # Try to load CNN model
-            cnn_path = os.path.join(model_dir, 'cnn_fall_detector.h5')
-            if os.path.exists(cnn_path):
-                self.cnn_model = tf.keras.models.load_model(cnn_path)
-                print("✅ CNN fall detection model loaded")
-            
-            # Try to load Random Forest model
+
+            if self.model_path:
+                model_dir = self.model_path
+            else:
+                from model_registry import resolve_version, UNVERSIONED
+
+                # Prefer models/fall/, fallback to files directly in models/
+                # (whose subdirectories are other model kinds, not versions)
+                models_root = os.path.join(os.path.dirname(__file__), 'models')
+                fall_dir = os.path.join(models_root, 'fall')
+                if os.path.isdir(fall_dir):
+                    self.version, model_dir = resolve_version(fall_dir, os.getenv('FALL_MODEL_VERSION'))
+                else:
+                    self.version, model_dir = resolve_version(models_root, UNVERSIONED)
+
+            # Try to load CNN model on the fastest runtime that matches Keras
+            # (TensorFlow is only imported when no lighter runtime is usable)
+            try:
+                from cnn_runtime import select_runtime
+                self.cnn_model = select_runtime(model_dir)
+                if self.cnn_model is not None:
+                    print(f"✅ CNN fall detection model loaded ({self.cnn_model.name})")
+            except Exception as e:
+                print(f"⚠️ FallDetectionModel: Error loading CNN model: {e}")
+
             rf_path = os.path.join(model_dir, 'rf_fall_detector.joblib')
-            if os.path.exists(rf_path):
-                self.rf_model = joblib.load(rf_path)
-                print("✅ RF fall detection model loaded")
-            
-            # Try to load scaler
             scaler_path = os.path.join(model_dir, 'scaler.joblib')
-            if os.path.exists(scaler_path):
-                self.scaler = joblib.load(scaler_path)
-                print("✅ Scaler loaded")
+            if os.path.exists(rf_path) or os.path.exists(scaler_path):
+                import joblib
+
+                # Try to load Random Forest model
+                if os.path.exists(rf_path):
+                    self.rf_model = joblib.load(rf_path)
+                    print("✅ RF fall detection model loaded")
+
+                # Try to load scaler
+                if os.path.exists(scaler_path):
+                    self.scaler = joblib.load(scaler_path)
+                    print("✅ Scaler loaded")
             
             self.is_loaded = (self.cnn_model is not None or self.rf_model is not None)
             
@@ -457,13 +616,104 @@ class FallDetectionModel(ModelInterface):
                 'detected': prediction['detected'],
                 'confidence': prediction['confidence'],
                 'timestamp': datetime.now().isoformat(),
-                'method': 'ml_model'
+                'method': 'ml_model',
+                'model_version': self.version
             }
             
         except Exception as e:
             print(f"⚠️ Error in fall detection: {e}")
             return self._fallback_detection(sensor_data)
     
+    def fall_probability(self, features, strategy: str = 'cascade') -> Dict[str, Any]:
+        """
+        Fall probability for one window feature vector (see fall_features)
+
+        Args:
+            features: 1-D array of window features
+            strategy: 'cascade' (RF first, CNN only when the RF is unsure),
+                'ensemble' (always both), 'rf' or 'cnn'
+
+        Returns:
+            Dict with probability (None if no model could run), the stages
+            that ran and those that were skipped, and per-model probabilities
+        """
+        import numpy as np
+
+        features = np.asarray(features, dtype=np.float64)
+        stages = []
+        skipped = []
+        rf_prob = None
+        cnn_prob = None
+
+        if strategy in ('cascade', 'ensemble', 'rf'):
+            # The RF was trained on scaled features; without the scaler
+            # its probabilities are meaningless, so the CNN decides
+            if self.rf_model is not None and self.scaler is not None:
+                try:
+                    scaled = self.scaler.transform(features.reshape(1, -1))
+                    rf_prob = float(self.rf_model.predict_proba(scaled)[0][1])
+                    stages.append('random_forest')
+                except Exception as e:
+                    print(f"⚠️ Random Forest prediction error: {e}")
+            else:
+                skipped.append('random_forest')
+
+        run_cnn = strategy in ('ensemble', 'cnn') or (
+            strategy == 'cascade' and
+            (rf_prob is None or self.CASCADE_LOW <= rf_prob <= self.CASCADE_HIGH)
+        )
+        if run_cnn and self.cnn_model is not None:
+            try:
+                # CNN consumes the feature vector as a 1-channel sequence
+                if len(getattr(self.cnn_model, 'input_shape', ())) == 3:
+                    cnn_input = features.reshape(1, -1, 1)
+                else:
+                    cnn_input = features.reshape(1, -1)
+                cnn_prob = float(np.ravel(self.cnn_model.predict(cnn_input, verbose=0))[0])
+                stages.append('cnn')
+            except Exception as e:
+                print(f"⚠️ CNN prediction error: {e}")
+        elif strategy != 'rf':
+            skipped.append('cnn')
+
+        if rf_prob is not None and cnn_prob is not None:
+            probability = self.RF_WEIGHT * rf_prob + (1 - self.RF_WEIGHT) * cnn_prob
+        else:
+            probability = rf_prob if rf_prob is not None else cnn_prob
+
+        return {
+            'probability': probability,
+            'stages': stages,
+            'skipped': skipped,
+            'rf_probability': rf_prob,
+            'cnn_probability': cnn_prob,
+            'model_version': self.version
+        }
+
+    def warm_up(self, rounds: int = 3):
+        """
+        Run every loaded stage on synthetic windows before serving traffic
+
+        The first predictions pay for lazy initialization (runtime graph
+        setup, memory allocation); doing them here keeps that cost out of
+        the first real request after a model swap.
+
+        Raises:
+            RuntimeError: If a loaded model cannot produce a probability
+        """
+        import numpy as np
+        from fall_features import FEATURE_COUNT
+
+        size = getattr(self.scaler, 'n_features_in_', None) or getattr(self.rf_model, 'n_features_in_', None)
+        expected = [stage for stage, ready in (('random_forest', self.rf_model is not None and self.scaler is not None),
+                                               ('cnn', self.cnn_model is not None)) if ready]
+        rng = np.random.default_rng(0)
+        for _ in range(rounds):
+            result = self.fall_probability(rng.normal(size=size or FEATURE_COUNT), strategy='ensemble')
+            if result['stages'] != expected:
+                failed = sorted(set(expected) - set(result['stages']))
+                raise RuntimeError(f"warm-up prediction failed for {', '.join(failed)}")
+
     def _extract_features(self, sensor_data: Any):
         """Extract features from sensor data"""
         import numpy as np
@@ -594,6 +844,7 @@ class MoodAnalysisModel(ModelInterface):
         # TODO: Load actual sentiment analysis model
         print("⚠️ MoodAnalysisModel: Using rule-based analysis (ML model not loaded)")
         self.is_loaded = True  # Enable analysis mode
+        self.uses_fallback = True
         
         # Define emotion keywords
         self.emotion_keywords = {
@@ -605,6 +856,7 @@ class MoodAnalysisModel(ModelInterface):
             'pain': ['pain', 'hurt', 'ache', 'sore', 'uncomfortable', 'discomfort'],
             'tired': ['tired', 'exhausted', 'sleepy', 'fatigued', 'weary', 'drained']
         }
+        keyword_matcher.add(k for keywords in self.emotion_keywords.values() for k in keywords)
     
     def predict(self, text: str, voice_features: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -651,18 +903,17 @@ class MoodAnalysisModel(ModelInterface):
                 'mood': 'neutral',
                 'confidence': 0.0,
                 'emotions': [],
+                'error': str(e),
                 'timestamp': datetime.now().isoformat()
             }
     
     def _analyze_text(self, text: str) -> Dict:
         """Analyze text for emotion indicators"""
-        text_lower = text.lower()
-        emotion_scores = {}
-        
-        # Score each emotion based on keywords
-        for emotion, keywords in self.emotion_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            emotion_scores[emotion] = score
+        # Score each emotion by how many of its keywords occur (one shared scan)
+        emotion_scores = {
+            emotion: keyword_matcher.count(text, keywords)
+            for emotion, keywords in self.emotion_keywords.items()
+        }
         
         # Determine dominant emotion
         max_score = max(emotion_scores.values()) if emotion_scores.values() else 0
@@ -753,10 +1004,16 @@ class MoodAnalysisModel(ModelInterface):
 # ============================================
 
 class ModelManager:
-    """Central manager for all AI models"""
+    """
+    Central manager for all AI models
+    
+    Every model call is recorded in self.metrics with its latency, input
+    size and execution path (model, rule-based fallback or error).
+    """
     
     def __init__(self):
         self.models = {}
+        self.metrics = ModelMetrics()
         self.initialize_models()
     
     def initialize_models(self):
@@ -790,6 +1047,16 @@ class ModelManager:
         """Get a specific model"""
         return self.models.get(model_name)
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model call counts, execution paths, latencies and input sizes"""
+        stats = self.metrics.stats()
+        for name, model in self.models.items():
+            entry = stats['models'].setdefault(name, {'calls': 0, 'paths': {}})
+            entry['loaded'] = model.is_loaded
+            entry['version'] = model.version
+        return stats
+    
+    @instrumented('voice_to_text')
     def transcribe_audio(self, audio_data: bytes) -> str:
         """Transcribe audio to text"""
         model = self.get_model('voice_to_text')
@@ -797,6 +1064,7 @@ class ModelManager:
             return model.predict(audio_data)
         return ""
     
+    @instrumented('nlp_response')
     def generate_response(self, text: str, context: Optional[Dict] = None) -> str:
         """Generate AI response"""
         model = self.get_model('nlp_response')
@@ -804,6 +1072,7 @@ class ModelManager:
             return model.predict(text, context)
         return "I'm having trouble understanding. Can you rephrase that?"
     
+    @instrumented('text_to_voice')
     def synthesize_speech(self, text: str, output_path: str = "output.wav") -> Optional[str]:
         """Convert text to speech"""
         model = self.get_model('text_to_voice')
@@ -811,6 +1080,7 @@ class ModelManager:
             return model.predict(text, output_path)
         return None
     
+    @instrumented('health_risk')
     def assess_health_risk(self, vitals: Dict[str, float]) -> Dict[str, Any]:
         """Assess health risk from vitals"""
         model = self.get_model('health_risk')
@@ -818,6 +1088,24 @@ class ModelManager:
             return model.predict(vitals)
         return {'riskLevel': 'unknown', 'confidence': 0.0, 'factors': []}
     
+    @instrumented('health_risk')
+    def assess_health_risk_batch(self, vitals: Any) -> Optional[Dict[str, Any]]:
+        """
+        Assess health risk for many patients at once
+        
+        Args:
+            vitals: (5, N) array in HealthRiskModel.VITAL_FIELDS order, or
+                a dict of columns keyed by field name
+        
+        Returns:
+            Dict of length-N arrays (see HealthRiskModel.predict_batch)
+        """
+        model = self.get_model('health_risk')
+        if model:
+            return model.predict_batch(vitals)
+        return None
+    
+    @instrumented('fall_detection')
     def detect_fall(self, sensor_data: Any) -> Dict[str, Any]:
         """Detect fall from sensor data"""
         model = self.get_model('fall_detection')
@@ -825,13 +1113,34 @@ class ModelManager:
             return model.predict(sensor_data)
         return {'detected': False, 'confidence': 0.0, 'timestamp': datetime.now().isoformat()}
     
-    def detect_cough(self, audio_data: bytes) -> Dict[str, Any]:
+    @instrumented('fall_detection')
+    def fall_probability(self, features: Any, strategy: str = 'cascade',
+                         model: Optional['FallDetectionModel'] = None) -> Dict[str, Any]:
+        """
+        Fall probability for one window feature vector
+        
+        Args:
+            model: Fall model to use instead of the active one, so a request
+                can finish on the version it started with
+        
+        Returns:
+            See FallDetectionModel.fall_probability
+        """
+        model = model or self.get_model('fall_detection')
+        if model:
+            return model.fall_probability(features, strategy)
+        return {'probability': None, 'stages': [], 'skipped': [], 'rf_probability': None,
+                'cnn_probability': None, 'model_version': None}
+    
+    @instrumented('cough_detection')
+    def detect_cough(self, audio_data: bytes, sample_rate: Optional[int] = None) -> Dict[str, Any]:
         """Detect cough from audio"""
         model = self.get_model('cough_detection')
         if model:
-            return model.predict(audio_data)
+            return model.predict(audio_data, sample_rate)
         return {'detected': False, 'confidence': 0.0, 'timestamp': datetime.now().isoformat()}
     
+    @instrumented('mood_analysis')
     def analyze_mood(self, text: str, voice_features: Optional[Dict] = None) -> Dict[str, Any]:
         """Analyze mood from text and voice"""
         model = self.get_model('mood_analysis')
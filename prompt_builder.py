@@ -0,0 +1,256 @@
+"""
+============================================
+PROMPT BUILDER MODULE
+============================================
+Renders the health context of a voice turn into the Gemini prompt
+under a token budget: each section has its own budget, the oldest
+history and least important items go first, and whole low-priority
+sections are dropped if the total is still too large. Rendered
+sections are reused between turns while their data is unchanged.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from model_metrics import Histogram
+
+PROMPT_CONTEXT_TOKENS = int(os.getenv('PROMPT_CONTEXT_TOKENS', '600'))
+SECTION_CACHE_SIZE = int(os.getenv('PROMPT_SECTION_CACHE_SIZE', '256'))
+TOKEN_BUCKETS = (25, 50, 100, 200, 400, 800, 1600, 3200)
+
+# Per-section token budgets, in the order sections appear in the prompt
+SECTION_BUDGETS = {
+    'vitals': 80,
+    'alerts': 80,
+    'reminders': 60,
+    'profile': 60,
+    'metrics': 80,
+    'history': 250
+}
+# Most important first; sections are dropped from the end when the
+# context is over PROMPT_CONTEXT_TOKENS ('vitals' is always kept)
+SECTION_PRIORITY = ('vitals', 'alerts', 'reminders', 'history', 'profile', 'metrics')
+SEVERITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+MAX_METRIC_LINES = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about 4 characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+class Section(NamedTuple):
+    name: str
+    text: str
+    tokens: int
+    trimmed: int  # Items left out to fit the section budget
+
+
+class PromptContext(NamedTuple):
+    text: str
+    tokens: int
+    fingerprint: str  # SHA-1 of text, for response cache keys
+    sections: Dict[str, int]  # Tokens per included section
+    dropped: Tuple[str, ...]  # Sections left out to fit the total budget
+
+
+def _vitals_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    vitals = context.get('vitals', {})
+    lines = [
+        f"- Heart Rate: {vitals.get('heartRate', 'N/A')} bpm",
+        f"- Blood Pressure: {vitals.get('systolic', 'N/A')}/{vitals.get('diastolic', 'N/A')} mmHg",
+        f"- Temperature: {vitals.get('temperature', 'N/A')}°F",
+        f"- Oxygen Level: {vitals.get('oxygen', 'N/A')}%",
+        f"- Mood: {context.get('mood', 'neutral')}"
+    ]
+    return 'Current Patient Context', lines, False
+
+
+def _alert_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    # Most severe first, newest first within a severity
+    alerts = sorted(context.get('activeAlerts', []), key=lambda a: str(a.get('timestamp', '')), reverse=True)
+    alerts.sort(key=lambda a: SEVERITY_RANK.get(a.get('severity'), len(SEVERITY_RANK)))
+    lines = [f"- {a.get('severity', 'unknown')} {a.get('type', 'alert')}: {a.get('message', '')}" for a in alerts]
+    return 'Active Alerts', lines, False
+
+
+def _reminder_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    lines = []
+    for r in context.get('reminders', []):
+        dose = ' '.join(filter(None, (r.get('medicine', ''), r.get('dosage', ''))))
+        lines.append(f"- {dose} at {r.get('time', '')}")
+    return 'Upcoming Medications', lines, False
+
+
+def _profile_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    profile = context.get('patientProfile') or {}
+    lines = [f"- Recent concern: {concern}" for concern in reversed(profile.get('recentConcerns') or [])]
+    lines += [f"- Prefers {key}: {value}" for key, value in (profile.get('preferences') or {}).items()]
+    trends = profile.get('emotionalTrends') or []
+    if trends:
+        lines.append(f"- Emotional trend: {', '.join(str(t) for t in trends[-3:])}")
+    return 'Patient Profile', lines, False
+
+
+def _flatten(value: Any, prefix: str = '') -> List[str]:
+    """'path: value' lines for the scalar leaves of nested metrics"""
+    if isinstance(value, dict):
+        return [line for key, item in value.items() for line in _flatten(item, f"{prefix}{key}.")]
+    if isinstance(value, list):
+        # Newest records are usually last
+        return [line for i, item in enumerate(reversed(value)) for line in _flatten(item, f"{prefix}{i}.")]
+    return [f"- {prefix.rstrip('.')}: {value}"]
+
+
+def _metric_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    metrics = context.get('healthMetrics')
+    lines = _flatten(metrics)[:MAX_METRIC_LINES] if metrics else []
+    return 'Health Metrics (last 7 days)', lines, False
+
+
+def _history_lines(context: Dict[str, Any]) -> Tuple[str, List[str], bool]:
+    # Newest exchange first, so trimming drops the oldest; shown oldest first
+    lines = [f"Patient: {h.get('user', '')}\nNurse: {h.get('assistant', '')}"
+             for h in reversed(context.get('recentHistory', []))]
+    return 'Recent Conversation', lines, True
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, List[str], bool]]] = {
+    'vitals': _vitals_lines,
+    'alerts': _alert_lines,
+    'reminders': _reminder_lines,
+    'profile': _profile_lines,
+    'metrics': _metric_lines,
+    'history': _history_lines
+}
+# Context keys each section reads; their values are the section cache key
+SECTION_INPUTS = {
+    'vitals': ('vitals', 'mood'),
+    'alerts': ('activeAlerts',),
+    'reminders': ('reminders',),
+    'profile': ('patientProfile',),
+    'metrics': ('healthMetrics',),
+    'history': ('recentHistory',)
+}
+
+
+class PromptBuilder:
+    """
+    Builds the context block of the health prompt under a token budget
+
+    Args:
+        total_budget: Token budget for the whole context block
+        budgets: Token budget per section
+    """
+
+    def __init__(self, total_budget: int = PROMPT_CONTEXT_TOKENS, budgets: Optional[Dict[str, int]] = None):
+        self.total_budget = total_budget
+        self.budgets = dict(SECTION_BUDGETS, **(budgets or {}))
+        self._sections = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def build(self, context: Dict[str, Any]) -> PromptContext:
+        """Context block for a turn, trimmed to the budgets"""
+        sections = [self._section(name, context) for name in self.budgets]
+        sections = [section for section in sections if section.text]
+
+        total = sum(section.tokens for section in sections)
+        dropped = []
+        for name in reversed(SECTION_PRIORITY[1:]):
+            if total <= self.total_budget:
+                break
+            for section in sections:
+                if section.name == name:
+                    sections.remove(section)
+                    dropped.append(name)
+                    total -= section.tokens
+                    break
+
+        text = '\n\n'.join(section.text for section in sections)
+        result = PromptContext(text, estimate_tokens(text), hashlib.sha1(text.encode('utf-8')).hexdigest(),
+                               {section.name: section.tokens for section in sections}, tuple(dropped))
+        self._record(result, sections)
+        return result
+
+    def _section(self, name: str, context: Dict[str, Any]) -> Section:
+        """Rendered section, reused while its inputs are unchanged"""
+        inputs = json.dumps([context.get(key) for key in SECTION_INPUTS[name]], sort_keys=True, default=str)
+        key = (name, hashlib.sha1(inputs.encode('utf-8')).digest())
+        with self._lock:
+            section = self._sections.get(key)
+            if section is not None:
+                self._sections.move_to_end(key)
+                self.section_hits += 1
+                return section
+            self.section_misses += 1
+
+        section = self._render(name, context)
+        with self._lock:
+            self._sections[key] = section
+            while len(self._sections) > SECTION_CACHE_SIZE:
+                self._sections.popitem(last=False)
+        return section
+
+    def _render(self, name: str, context: Dict[str, Any]) -> Section:
+        """
+        Section text with as many items as fit its budget; items come
+        most important first and are shown in reverse if the renderer
+        asks for it (history: newest kept, shown oldest first)
+        """
+        title, lines, reverse = RENDERERS[name](context)
+        if not lines:
+            return Section(name, '', 0, 0)
+        budget = self.budgets[name] - estimate_tokens(title) - 1
+        kept = []
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        if reverse:
+            kept.reverse()
+        text = f"{title}:\n" + '\n'.join(kept) if kept else ''
+        return Section(name, text, estimate_tokens(text), len(lines) - len(kept))
+
+    def _record(self, result: PromptContext, sections: List[Section]):
+        with self._lock:
+            self.builds += 1
+            self.tokens.observe(result.tokens)
+            for section in sections:
+                stats = self.section_stats.setdefault(section.name, {'tokens': 0, 'included': 0, 'items_trimmed': 0})
+                stats['tokens'] += section.tokens
+                stats['included'] += 1
+                stats['items_trimmed'] += section.trimmed
+            for name in result.dropped:
+                self.sections_dropped[name] = self.sections_dropped.get(name, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.builds = 0
+            self.tokens = Histogram(TOKEN_BUCKETS)
+            self.section_stats: Dict[str, Dict[str, int]] = {}
+            self.sections_dropped: Dict[str, int] = {}
+            self.section_hits = 0
+            self.section_misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Context size distribution, per-section size and trimming, section cache hits"""
+        with self._lock:
+            lookups = self.section_hits + self.section_misses
+            return {
+                'builds': self.builds,
+                'budget_tokens': self.total_budget,
+                'context_tokens': self.tokens.snapshot(),
+                'sections': {
+                    name: dict(stats, mean_tokens=stats['tokens'] / stats['included'])
+                    for name, stats in self.section_stats.items()
+                },
+                'sections_dropped': dict(self.sections_dropped),
+                'section_cache_hit_rate': self.section_hits / lookups if lookups else 0.0
+            }
@@ -7,10 +7,26 @@ Identifies speakers (patient, doctor, caretaker) from voice characteristics
 
 import os
 import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Dict, Optional, List
 from datetime import datetime
 import numpy as np
 
+from voice_features import EMBEDDING_SIZE, audio_bytes, extract_embedding
+
+MATCH_DISTANCE = 0.5  # Embedding distance at which similarity reaches 0
+EMBEDDING_CACHE_SIZE = 256
+
+# Sticky sessions: a device keeps its identified speaker between turns
+SESSION_TTL_SECONDS = int(os.getenv('SPEAKER_SESSION_TTL', '600'))
+REVERIFY_SECONDS = int(os.getenv('SPEAKER_REVERIFY_SECONDS', '120'))
+VOICE_CHANGE_DISTANCE = 0.15  # Quick-check distance that counts as a different voice
+VOICE_CHECK_STRIDE = 4  # The quick check analyzes every 4th frame
+
+
 class SpeakerIdentifier:
     """
     Speaker identification system using voice characteristics
@@ -20,6 +36,21 @@ class SpeakerIdentifier:
         self.speaker_profiles = {}  # Store voice profiles
         self.current_speaker = None
         self.profiles_file = 'data/speaker_profiles.json'
+        # Unit-length profile embeddings as rows of one (capacity x size)
+        # matrix for vectorized matching
+        self.profile_matrix = np.empty((0, EMBEDDING_SIZE))
+        self.profile_ids: List[str] = []
+        self.profile_rows: Dict[str, int] = {}
+        self._matrix_lock = threading.Lock()
+        # Voice features by audio content hash, shared by every endpoint
+        self._embedding_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Device/session id -> last confident match and its embedding
+        self.sessions: Dict[str, Dict] = {}
+        self._session_lock = threading.Lock()
+        self.session_stats = {'sticky': 0, 'identified': 0, 'voice_changed': 0}
         self.load_profiles()
     
     def load_profiles(self):
@@ -31,6 +62,57 @@ class SpeakerIdentifier:
             except Exception as e:
                 print(f"⚠️ Error loading speaker profiles: {e}")
                 self.speaker_profiles = {}
+        self._rebuild_matrix()
+    
+    def _profile_vector(self, features: Dict) -> np.ndarray:
+        """Unit-length embedding of a feature set"""
+        vector = np.asarray(features['embedding'], dtype=np.float64)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _rebuild_matrix(self):
+        """Build the profile matrix from speaker_profiles"""
+        with self._matrix_lock:
+            # Profiles saved before voice embeddings existed cannot be matched
+            stale = [user_id for user_id, profile in self.speaker_profiles.items()
+                     if len(profile['features'].get('embedding', ())) != EMBEDDING_SIZE]
+            if stale:
+                print(f"⚠️ {len(stale)} speaker profile(s) need re-registration: {', '.join(stale)}")
+            self.profile_ids = [user_id for user_id in self.speaker_profiles if user_id not in stale]
+            self.profile_rows = {user_id: row for row, user_id in enumerate(self.profile_ids)}
+            matrix = np.empty((max(len(self.profile_ids), 16), EMBEDDING_SIZE))
+            for row, user_id in enumerate(self.profile_ids):
+                matrix[row] = self._profile_vector(self.speaker_profiles[user_id]['features'])
+            self.profile_matrix = matrix
+    
+    def _set_profile_row(self, user_id: str, features: Dict):
+        """Insert or overwrite one profile row, growing capacity geometrically"""
+        vector = self._profile_vector(features)
+        with self._matrix_lock:
+            row = self.profile_rows.get(user_id)
+            if row is None:
+                row = len(self.profile_ids)
+                if row == len(self.profile_matrix):
+                    grown = np.empty((2 * row, EMBEDDING_SIZE))
+                    grown[:row] = self.profile_matrix
+                    self.profile_matrix = grown
+                self.profile_ids.append(user_id)
+                self.profile_rows[user_id] = row
+            self.profile_matrix[row] = vector
+    
+    def _delete_profile_row(self, user_id: str):
+        """Remove one profile row by moving the last row into its place"""
+        with self._matrix_lock:
+            row = self.profile_rows.pop(user_id, None)
+            if row is None:
+                return
+            last = len(self.profile_ids) - 1
+            if row != last:
+                moved = self.profile_ids[last]
+                self.profile_matrix[row] = self.profile_matrix[last]
+                self.profile_ids[row] = moved
+                self.profile_rows[moved] = row
+            self.profile_ids.pop()
     
     def save_profiles(self):
         """Save speaker profiles to disk"""
@@ -41,26 +123,36 @@ class SpeakerIdentifier:
         except Exception as e:
             print(f"⚠️ Error saving speaker profiles: {e}")
     
-    def extract_voice_features(self, audio_data: bytes) -> Dict:
+    def extract_voice_features(self, audio_data) -> Dict:
         """
         Extract voice characteristics from audio
-        In production, this would use actual audio processing libraries
+        
+        Results are cached by audio content hash, so retries and the same
+        clip reaching several endpoints are only analyzed once.
+        
+        Args:
+            audio_data: WAV / 16-bit PCM as bytes, base64 or a data URL
+        
+        Returns:
+            Dict with pitch_mean, pitch_std, voiced_fraction,
+            spectral_centroid and the unit-length 'embedding'
         """
-        # TODO: Implement actual audio feature extraction
-        # - Pitch (fundamental frequency)
-        # - Formant frequencies
-        # - Spectral characteristics
-        # - Voice quality metrics
+        data = audio_bytes(audio_data)
+        key = hashlib.sha1(data).hexdigest()
+        with self._cache_lock:
+            features = self._embedding_cache.get(key)
+            if features is not None:
+                self._embedding_cache.move_to_end(key)
+                self.cache_hits += 1
+                return features
+            self.cache_misses += 1
         
-        # Placeholder: Return simulated features
-        return {
-            'pitch_mean': np.random.uniform(80, 300),
-            'pitch_std': np.random.uniform(5, 20),
-            'formant_1': np.random.uniform(400, 800),
-            'formant_2': np.random.uniform(1000, 2000),
-            'spectral_centroid': np.random.uniform(1000, 4000),
-            'voice_quality': 'normal'
-        }
+        features = extract_embedding(data)
+        with self._cache_lock:
+            self._embedding_cache[key] = features
+            if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return features
     
     def register_speaker(self, user_id: str, role: str, audio_samples: List[bytes]) -> bool:
         """
@@ -78,14 +170,15 @@ class SpeakerIdentifier:
             # Extract features from all samples
             features_list = [self.extract_voice_features(sample) for sample in audio_samples]
             
+            if not features_list:
+                raise ValueError("No audio samples provided")
+            
             # Compute average features
-            avg_features = {
-                'pitch_mean': np.mean([f['pitch_mean'] for f in features_list]),
-                'pitch_std': np.mean([f['pitch_std'] for f in features_list]),
-                'formant_1': np.mean([f['formant_1'] for f in features_list]),
-                'formant_2': np.mean([f['formant_2'] for f in features_list]),
-                'spectral_centroid': np.mean([f['spectral_centroid'] for f in features_list]),
-            }
+            keys = ('pitch_mean', 'pitch_std', 'voiced_fraction', 'spectral_centroid')
+            means = np.array([[f[key] for key in keys] for f in features_list]).mean(axis=0)
+            avg_features = dict(zip(keys, means.tolist()))
+            embedding = np.mean([f['embedding'] for f in features_list], axis=0)
+            avg_features['embedding'] = (embedding / np.linalg.norm(embedding)).tolist()
             
             # Store profile
             self.speaker_profiles[user_id] = {
@@ -95,6 +188,9 @@ class SpeakerIdentifier:
                 'samples_count': len(audio_samples)
             }
             
+            self._set_profile_row(user_id, avg_features)
+            self._forget_sessions(user_id)
+            
             self.save_profiles()
             return True
             
@@ -102,44 +198,63 @@ class SpeakerIdentifier:
             print(f"❌ Error registering speaker: {e}")
             return False
     
-    def identify_speaker(self, audio_data: bytes) -> Optional[Dict]:
+    def remove_speaker(self, user_id: str) -> bool:
+        """
+        Remove a registered speaker
+        
+        Returns:
+            True if the speaker existed
+        """
+        if self.speaker_profiles.pop(user_id, None) is None:
+            return False
+        self._delete_profile_row(user_id)
+        self._forget_sessions(user_id)
+        if self.current_speaker and self.current_speaker['user_id'] == user_id:
+            self.current_speaker = None
+        self.save_profiles()
+        return True
+    
+    def identify_speaker(self, audio_data: bytes, session_id: Optional[str] = None) -> Optional[Dict]:
         """
         Identify speaker from audio sample
         
         Args:
             audio_data: Audio sample to analyze
+            session_id: Device or conversation id; a confident match is
+                reused for later turns of the session until it expires,
+                is due for re-verification or the voice changes
         
         Returns:
             Dict with user_id, role, and confidence, or None if not identified
         """
-        if not self.speaker_profiles:
+        if not self.profile_ids:
             return None
         
         try:
+            if session_id:
+                sticky = self._sticky_match(session_id, audio_data)
+                if sticky:
+                    return sticky
+            
             # Extract features from audio
             features = self.extract_voice_features(audio_data)
             
-            best_match = None
-            best_score = 0.0
-            
-            # Compare with all registered speakers
-            for user_id, profile in self.speaker_profiles.items():
-                profile_features = profile['features']
-                
-                # Calculate similarity score (Euclidean distance in feature space)
-                score = self._calculate_similarity(features, profile_features)
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = {
-                        'user_id': user_id,
-                        'role': profile['role'],
-                        'confidence': min(score * 100, 100.0)  # Convert to percentage
-                    }
+            candidates = self.rank_speakers(features, top_k=1)
+            best_match = candidates[0] if candidates else None
+            self.session_stats['identified'] += 1
             
             # Only return if confidence is above threshold
             if best_match and best_match['confidence'] > 70.0:
                 self.current_speaker = best_match
+                if session_id:
+                    now = time.time()
+                    with self._session_lock:
+                        self.sessions[session_id] = {
+                            'match': best_match,
+                            'embedding': features['embedding'],
+                            'verified_at': now,
+                            'expires_at': now + SESSION_TTL_SECONDS
+                        }
                 return best_match
             
             return None
@@ -148,22 +263,86 @@ class SpeakerIdentifier:
             print(f"❌ Error identifying speaker: {e}")
             return None
     
-    def _calculate_similarity(self, features1: Dict, features2: Dict) -> float:
+    def _sticky_match(self, session_id: str, audio_data) -> Optional[Dict]:
         """
-        Calculate similarity between two feature sets
-        Returns value between 0 and 1
+        Reuse a session's match if it is fresh and the voice is unchanged
+        
+        The voice check runs on every VOICE_CHECK_STRIDE-th frame only,
+        a fraction of the cost of a full embedding.
         """
-        # Normalize features and compute similarity
-        # This is a simplified version - in production, use ML models
+        now = time.time()
+        with self._session_lock:
+            self._evict_sessions(now)
+            session = self.sessions.get(session_id)
+        if session is None or now - session['verified_at'] >= REVERIFY_SECONDS:
+            return None
         
-        pitch_diff = abs(features1['pitch_mean'] - features2['pitch_mean']) / 300.0
-        formant1_diff = abs(features1['formant_1'] - features2['formant_1']) / 800.0
-        formant2_diff = abs(features1['formant_2'] - features2['formant_2']) / 2000.0
+        quick = extract_embedding(audio_bytes(audio_data), frame_stride=VOICE_CHECK_STRIDE)
+        if np.linalg.norm(quick['embedding'] - session['embedding']) > VOICE_CHANGE_DISTANCE:
+            self.session_stats['voice_changed'] += 1
+            with self._session_lock:
+                self.sessions.pop(session_id, None)
+            return None
         
-        # Weighted average (lower differences = higher similarity)
-        similarity = 1.0 - (pitch_diff * 0.4 + formant1_diff * 0.3 + formant2_diff * 0.3)
+        session['expires_at'] = now + SESSION_TTL_SECONDS
+        self.session_stats['sticky'] += 1
+        self.current_speaker = session['match']
+        return dict(session['match'], sticky=True)
+    
+    def _evict_sessions(self, now: float):
+        for session_id in [sid for sid, s in self.sessions.items() if s['expires_at'] <= now]:
+            del self.sessions[session_id]
+    
+    def _forget_sessions(self, user_id: str):
+        """Drop sticky sessions bound to a speaker whose profile changed"""
+        with self._session_lock:
+            for session_id in [sid for sid, s in self.sessions.items()
+                               if s['match']['user_id'] == user_id]:
+                del self.sessions[session_id]
+    
+    def rank_speakers(self, features: Dict, top_k: int = 5) -> List[Dict]:
+        """
+        Best matching registered speakers for a feature set
+        
+        Scores every profile with one matrix-vector product (cosine
+        similarity of unit embeddings) and selects the top k with
+        argpartition.
+        
+        Returns:
+            Up to top_k matches, best first, with user_id, role and confidence
+        """
+        query = self._profile_vector(features)
+        with self._matrix_lock:
+            count = len(self.profile_ids)
+            if count == 0:
+                return []
+            cosine = self.profile_matrix[:count] @ query
+            # Euclidean distance between unit vectors
+            distances = np.sqrt(np.maximum(2.0 - 2.0 * cosine, 0.0))
+            k = min(top_k, count)
+            top = np.argpartition(distances, k - 1)[:k] if k < count else np.arange(count)
+            top = top[np.argsort(distances[top], kind='stable')]
+            user_ids = [self.profile_ids[row] for row in top]
         
-        return max(0.0, min(1.0, similarity))
+        similarities = np.clip(1.0 - distances[top] / MATCH_DISTANCE, 0.0, 1.0)
+        return [
+            {
+                'user_id': user_id,
+                'role': self.speaker_profiles[user_id]['role'],
+                'confidence': min(float(score) * 100, 100.0)  # Convert to percentage
+            }
+            for user_id, score in zip(user_ids, similarities)
+        ]
+    
+    def cache_stats(self) -> Dict:
+        """Embedding cache hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'entries': len(self._embedding_cache),
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0
+        }
     
     def get_current_speaker(self) -> Optional[Dict]:
         """Get the currently identified speaker"""
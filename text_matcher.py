@@ -0,0 +1,99 @@
+"""
+============================================
+KEYWORD MATCHING MODULE
+============================================
+One shared keyword scan per text for intent detection, rule-based
+responses and mood analysis, instead of every caller re-scanning it
+"""
+
+import threading
+from typing import Dict, FrozenSet, Iterable, Tuple
+
+RESULT_CACHE_SIZE = 128
+
+
+class KeywordMatcher:
+    """
+    Finds which keywords of a shared vocabulary occur in a text
+
+    Matching keeps the substring semantics of `keyword in text.lower()`
+    ('temp' matches 'temperature'). Callers register their keywords up
+    front, and the keywords found in a text are memoized, so several
+    callers looking at the same utterance share one scan.
+
+    Each keyword is searched with str's C substring search. Keywords
+    containing a shorter keyword are only searched when that keyword
+    was found ('heart rate' is skipped if 'heart' is absent). The first
+    scan of a text costs about what the callers' own scans did; the
+    saving is for repeated texts. A single-pass regex (trie-shaped
+    alternation) was slower on long texts in CPython (see
+    benchmarks/bench_keyword_matching.py).
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._results: Dict[str, FrozenSet[str]] = {}
+        self.vocabulary: FrozenSet[str] = frozenset()
+        self._roots: Tuple[str, ...] = ()
+        self._dependents: Tuple[Tuple[str, FrozenSet[str]], ...] = ()
+        self.add(keywords)
+
+    def add(self, keywords: Iterable[str]):
+        """Extend the vocabulary (clears memoized results)"""
+        with self._lock:
+            vocabulary = self.vocabulary | {k.lower() for k in keywords}
+            if vocabulary == self.vocabulary:
+                return
+            ordered = sorted(vocabulary, key=lambda k: (len(k), k))
+            roots, dependents = [], []
+            for i, keyword in enumerate(ordered):
+                contained = frozenset(other for other in ordered[:i] if other in keyword)
+                if contained:
+                    dependents.append((keyword, contained))
+                else:
+                    roots.append(keyword)
+            self._roots = tuple(roots)
+            self._dependents = tuple(dependents)  # Shorter first, so containment chains resolve
+            self.vocabulary = vocabulary
+            self._results = {}
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Keywords of the vocabulary that occur in text (case-insensitive)"""
+        results = self._results
+        found = results.get(text)
+        if found is not None:
+            return found
+
+        lower = text.lower()
+        hits = {keyword for keyword in self._roots if keyword in lower}
+        for keyword, contained in self._dependents:
+            if contained <= hits and keyword in lower:
+                hits.add(keyword)
+        found = frozenset(hits)
+
+        with self._lock:
+            if results is self._results:
+                if len(results) >= RESULT_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    del results[next(iter(results))]
+                results[text] = found
+        return found
+
+    def _found(self, text: str, keywords: Iterable[str]) -> FrozenSet[str]:
+        if not isinstance(keywords, frozenset):
+            keywords = frozenset(keywords)
+        if not keywords <= self.vocabulary:
+            self.add(keywords)
+        return self.find(text) & keywords
+
+    def any(self, text: str, keywords: Iterable[str]) -> bool:
+        """True if any of keywords occurs in text"""
+        return bool(self._found(text, keywords))
+
+    def count(self, text: str, keywords: Iterable[str]) -> int:
+        """Number of distinct keywords that occur in text"""
+        return len(self._found(text, keywords))
+
+
+# Global instance shared by the backend, models and Gemini fallbacks
+keyword_matcher = KeywordMatcher()
@@ -0,0 +1,161 @@
+"""
+============================================
+VOICE FEATURE MODULE
+============================================
+NumPy speaker embedding: autocorrelation pitch track and MFCC-style
+cepstral statistics, combined into one fixed-length unit vector
+"""
+
+import base64
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from audio_features import FRAME_MS, HOP_MS, decode_audio, frame_signal, _hann
+
+MEL_BANDS = 26
+CEPSTRAL_COEFFS = 12  # c1..c12; c0 (loudness) is dropped
+MIN_PITCH_HZ = 60.0
+MAX_PITCH_HZ = 400.0
+VOICING_THRESHOLD = 0.45  # Normalized autocorrelation peak of a voiced frame
+OCTAVE_RATIO = 0.85  # Shorter lags within this fraction of the best peak win
+ACTIVE_RATIO = 0.1  # Frames quieter than this fraction of the loudest are skipped
+PITCH_WEIGHT = 4.0  # Pitch statistics weigh more than any single cepstral statistic
+EMBEDDING_SIZE = 2 * CEPSTRAL_COEFFS + 3
+
+_filterbank_cache: Dict[Tuple[int, int], np.ndarray] = {}
+_dct_cache: Dict[int, np.ndarray] = {}
+_window_ac_cache: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def audio_bytes(audio_data: Union[str, bytes]) -> bytes:
+    """Raw bytes of an upload given as bytes, base64 or a base64 data URL"""
+    if isinstance(audio_data, bytes):
+        return audio_data
+    if audio_data.startswith('data:'):
+        audio_data = audio_data.split(',', 1)[1]
+    return base64.b64decode(audio_data)
+
+
+def mel_filterbank(n_fft: int, sample_rate: int, bands: int = MEL_BANDS) -> np.ndarray:
+    """Triangular mel filters as a (bands, n_fft // 2 + 1) matrix"""
+    key = (n_fft, sample_rate)
+    filters = _filterbank_cache.get(key)
+    if filters is not None:
+        return filters
+
+    to_mel = lambda hz: 2595.0 * np.log10(1.0 + hz / 700.0)
+    to_hz = lambda mel: 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+    edges = to_hz(np.linspace(to_mel(0.0), to_mel(sample_rate / 2), bands + 2))
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    filters = np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+    _filterbank_cache[key] = filters
+    return filters
+
+
+def dct_matrix(bands: int = MEL_BANDS) -> np.ndarray:
+    """Orthonormal DCT-II rows c1..c12 for log mel energies"""
+    matrix = _dct_cache.get(bands)
+    if matrix is None:
+        k = np.arange(1, CEPSTRAL_COEFFS + 1)[:, None]
+        n = np.arange(bands)[None, :]
+        matrix = np.sqrt(2.0 / bands) * np.cos(np.pi * k * (2 * n + 1) / (2 * bands))
+        matrix = _dct_cache[bands] = matrix.astype(np.float32)
+    return matrix
+
+
+def _window_autocorrelation(frame_length: int, n_fft: int) -> np.ndarray:
+    """Normalized autocorrelation of the analysis window, to undo its taper"""
+    key = (frame_length, n_fft)
+    ac = _window_ac_cache.get(key)
+    if ac is None:
+        spectrum = np.fft.rfft(_hann(frame_length), n=n_fft)
+        ac = np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft)[:frame_length]
+        ac = _window_ac_cache[key] = np.maximum(ac / ac[0], 1e-3)
+    return ac
+
+
+def voice_features(samples: np.ndarray, sample_rate: int, frame_stride: int = 1) -> Dict:
+    """
+    Pitch and cepstral statistics of an utterance
+
+    One zero-padded FFT per frame feeds both the mel filterbank and the
+    autocorrelation pitch estimate.
+
+    Args:
+        frame_stride: Analyze every n-th frame only; the statistics stay
+            comparable and the cost drops roughly n-fold
+
+    Returns:
+        Dict with pitch_mean, pitch_std (Hz), voiced_fraction,
+        spectral_centroid (Hz) and the unit-length 'embedding' array
+    """
+    frame_length = int(sample_rate * FRAME_MS / 1000)
+    hop_length = int(sample_rate * HOP_MS / 1000)
+    frames = frame_signal(samples.astype(np.float32, copy=False), frame_length, hop_length)[::frame_stride]
+    if len(frames) == 0:
+        raise ValueError("Audio is too short for voice analysis")
+
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_length)
+    frames = frames[rms >= max(rms.max() * ACTIVE_RATIO, 1e-4)]
+    if len(frames) == 0:
+        raise ValueError("No speech found in audio")
+
+    # Twice the frame length so the autocorrelation is not circular
+    n_fft = 1 << int(np.ceil(np.log2(2 * frame_length)))
+    power = np.abs(np.fft.rfft(frames * _hann(frame_length), n=n_fft, axis=1)) ** 2
+
+    mel = power @ mel_filterbank(n_fft, sample_rate).T
+    cepstra = np.log(mel + 1e-10) @ dct_matrix().T
+
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+    total = power.sum(axis=1)
+    centroid = float(np.mean(power @ freqs / np.maximum(total, 1e-12)))
+
+    ac = np.fft.irfft(power, n=n_fft, axis=1)[:, :frame_length]
+    ac = ac / np.maximum(ac[:, :1], 1e-12) / _window_autocorrelation(frame_length, n_fft)
+    min_lag = int(sample_rate / MAX_PITCH_HZ)
+    max_lag = min(int(sample_rate / MIN_PITCH_HZ), frame_length - 1)
+    search = ac[:, min_lag - 1:max_lag + 2]
+    inner = search[:, 1:-1]
+    peak = inner.max(axis=1, keepdims=True)
+    # First local maximum close to the global one, which avoids picking
+    # a multiple of the true period (octave errors)
+    candidates = (inner >= OCTAVE_RATIO * peak) & (inner >= search[:, :-2]) & (inner >= search[:, 2:])
+    lags = min_lag + np.argmax(candidates, axis=1)
+    strength = ac[np.arange(len(ac)), lags]
+    voiced = strength > VOICING_THRESHOLD
+    pitches = sample_rate / lags[voiced]
+
+    if len(pitches):
+        pitch_mean = float(np.median(pitches))
+        pitch_std = float(np.std(pitches))
+    else:
+        pitch_mean = pitch_std = 0.0
+    voiced_fraction = float(voiced.mean())
+
+    pitch_stats = np.array([
+        np.log2(pitch_mean / 100.0) if pitch_mean else 0.0,
+        pitch_std / pitch_mean if pitch_mean else 0.0,
+        voiced_fraction
+    ]) * PITCH_WEIGHT
+    embedding = np.concatenate((cepstra.mean(axis=0), cepstra.std(axis=0), pitch_stats))
+    norm = np.linalg.norm(embedding)
+
+    return {
+        'pitch_mean': pitch_mean,
+        'pitch_std': pitch_std,
+        'voiced_fraction': voiced_fraction,
+        'spectral_centroid': centroid,
+        'embedding': embedding / norm if norm else embedding
+    }
+
+
+def extract_embedding(audio_data: Union[str, bytes], sample_rate: int = None,
+                      frame_stride: int = 1) -> Dict:
+    """Decode an upload (bytes, base64 or data URL) and compute its voice features"""
+    samples, sample_rate = decode_audio(audio_bytes(audio_data), sample_rate)
+    return voice_features(samples, sample_rate, frame_stride)
@@ -0,0 +1,222 @@
+"""
+============================================
+VOICE FAST-PATH ROUTER MODULE
+============================================
+Answers simple vitals and medication questions ("what's my heart
+rate", "when is my next pill") from patient data with templates,
+ahead of the LLM, so only open-ended turns pay for a Gemini call
+"""
+
+import os
+import re
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+FAST_PATH_ENABLED = os.getenv('VOICE_FAST_PATH', '1') == '1'
+MAX_WORDS = 12
+
+# Phrases naming each vital; matched on whole words
+VITAL_TOPICS = {
+    'oxygen': ('oxygen', 'o2', 'spo2', 'oxygen saturation'),
+    'heart_rate': ('heart rate', 'pulse', 'heartbeat'),
+    'temperature': ('temperature', 'temp', 'fever'),
+    'blood_pressure': ('blood pressure', 'bp'),
+    'all_vitals': ('vitals', 'vital signs')
+}
+MEDICATION_WORDS = ('medicine', 'medicines', 'medication', 'medications', 'pill', 'pills',
+                    'tablet', 'tablets', 'dose', 'meds')
+NEXT_DOSE_CUES = ('next', 'when', 'what time', 'schedule')
+# A turn must open like a question or request for a reading
+QUESTION_STARTS = ('what', 'whats', 'how', 'hows', 'is', 'are', 'tell', 'check', 'show',
+                   'when', 'whens', 'read', 'give', 'do')
+# Anything emotional, symptomatic, urgent or interpretive goes to the LLM
+DECLINE_WORDS = ('why', 'should', 'worried', 'worry', 'scared', 'afraid', 'feel', 'feeling',
+                 'pain', 'hurt', 'hurts', 'dizzy', 'chest', 'breathe', 'breathing', 'sick',
+                 'help', 'emergency', 'urgent', 'mean', 'forgot', 'missed', 'can i', 'side effect',
+                 'side effects', 'remind me', 'was', 'were', 'yesterday', 'change', 'stop')
+
+# Readings outside these ranges are left to the LLM, which can respond
+# with the alerts and history in context
+NORMAL_RANGES = {
+    'heartRate': (60, 100),
+    'oxygen': (95, 100),
+    'temperature': (97.0, 99.5),
+    'systolic': (90, 130),
+    'diastolic': (60, 85)
+}
+
+
+def words_of(text: str) -> str:
+    """Lower-case words joined by single spaces and padded for phrase lookups"""
+    words = re.sub(r'[^\w\s]', '', text.lower()).split()
+    return f" {' '.join(words)} "
+
+
+def has_phrase(padded: str, phrases) -> bool:
+    return any(f" {phrase} " in padded for phrase in phrases)
+
+
+def in_range(vitals: Dict[str, Any], *fields: str) -> bool:
+    """True if every field is present, numeric and within its normal range"""
+    for field in fields:
+        value = vitals.get(field)
+        if not isinstance(value, (int, float)):
+            return False
+        low, high = NORMAL_RANGES[field]
+        if not low <= value <= high:
+            return False
+    return True
+
+
+def next_reminder(reminders: List[Dict[str, Any]], now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """The first reminder due after now (HH:MM times), wrapping to tomorrow's first"""
+    timed = []
+    for reminder in reminders:
+        try:
+            hour, minute = map(int, str(reminder.get('time', '')).split(':')[:2])
+        except ValueError:
+            continue
+        timed.append((hour * 60 + minute, reminder))
+    if not timed:
+        return None
+    now = now or datetime.now()
+    minutes = now.hour * 60 + now.minute
+    timed.sort(key=lambda item: item[0])
+    for at, reminder in timed:
+        if at >= minutes:
+            return reminder
+    return timed[0][1]
+
+
+class FastPathRouter:
+    """
+    Classifies a voice turn and answers high-confidence structured intents
+
+    A turn is answered locally only if it is short, opens like a question,
+    names exactly one topic, has none of DECLINE_WORDS, and the data it
+    asks about is present (and, for vitals, within normal range).
+    Everything else returns None and goes to the LLM.
+    """
+
+    def __init__(self, enabled: bool = FAST_PATH_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def route(self, text: str, vitals: Optional[Dict[str, Any]],
+              reminders: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Templated answer for a turn, or None if it should go to the LLM
+
+        Args:
+            text: Transcribed user turn
+            vitals: The patient's stored vitals (None if unknown)
+            reminders: The patient's active reminders
+
+        Returns:
+            {'intent': ..., 'response': ...} or None
+        """
+        start = time.perf_counter()
+        result = self._classify(text, vitals or {}, reminders) if self.enabled and text else None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.turns += 1
+            if result:
+                self.local += 1
+                self.local_ms += elapsed_ms
+                self.by_intent[result['intent']] = self.by_intent.get(result['intent'], 0) + 1
+        return result
+
+    def _classify(self, text: str, vitals: Dict[str, Any],
+                  reminders: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        padded = words_of(text)
+        words = padded.split()
+        if not words or len(words) > MAX_WORDS or words[0] not in QUESTION_STARTS:
+            return None
+        if has_phrase(padded, DECLINE_WORDS):
+            return None
+
+        topics = [topic for topic, phrases in VITAL_TOPICS.items() if has_phrase(padded, phrases)]
+        if has_phrase(padded, MEDICATION_WORDS):
+            topics.append('medication')
+        if len(topics) != 1:
+            return None
+        topic = topics[0]
+
+        if topic == 'medication':
+            return self._medication(padded, reminders)
+        return self._vitals(topic, vitals)
+
+    def _vitals(self, topic: str, vitals: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        if topic == 'oxygen' and in_range(vitals, 'oxygen'):
+            response = f"Your oxygen level is currently {vitals['oxygen']}%. You're doing well."
+        elif topic == 'heart_rate' and in_range(vitals, 'heartRate'):
+            response = f"Your heart rate is {vitals['heartRate']} beats per minute. This is within normal range."
+        elif topic == 'temperature' and in_range(vitals, 'temperature'):
+            response = f"Your temperature is {vitals['temperature']}°F. This is normal."
+        elif topic == 'blood_pressure' and in_range(vitals, 'systolic', 'diastolic'):
+            response = f"Your blood pressure is {vitals['systolic']}/{vitals['diastolic']} mmHg. This looks good."
+        elif topic == 'all_vitals' and in_range(vitals, *NORMAL_RANGES):
+            response = (f"Your vitals are looking good. Heart rate: {vitals['heartRate']} bpm, "
+                        f"blood pressure: {vitals['systolic']}/{vitals['diastolic']} mmHg, "
+                        f"temperature: {vitals['temperature']}°F, oxygen: {vitals['oxygen']}%.")
+        else:
+            return None
+        return {'intent': f"vitals:{topic}", 'response': response}
+
+    def _medication(self, padded: str, reminders: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        if not has_phrase(padded, NEXT_DOSE_CUES):
+            return None
+        if not reminders:
+            return {'intent': 'medication:next',
+                    'response': "You don't have any medications scheduled right now."}
+        reminder = next_reminder(reminders)
+        if reminder is None:
+            return None
+        dose = ' '.join(filter(None, (reminder.get('medicine'), reminder.get('dosage'))))
+        return {'intent': 'medication:next',
+                'response': f"Your next medication is {dose} at {reminder['time']}."}
+
+    def record_llm(self, seconds: float):
+        """Record the latency of a turn that went to the LLM"""
+        with self._lock:
+            self.llm_turns += 1
+            self.llm_ms += seconds * 1000
+
+    def reset(self):
+        with self._lock:
+            self.turns = 0
+            self.local = 0
+            self.local_ms = 0.0
+            self.llm_turns = 0
+            self.llm_ms = 0.0
+            self.by_intent: Dict[str, int] = {}
+            self.started_at = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Share of turns answered locally and the latency saved, estimated
+        as the mean LLM turn latency times the local turns, less the
+        time the local answers took
+        """
+        with self._lock:
+            llm_mean_ms = self.llm_ms / self.llm_turns if self.llm_turns else None
+            return {
+                'enabled': self.enabled,
+                'turns': self.turns,
+                'local': self.local,
+                'local_share': self.local / self.turns if self.turns else 0.0,
+                'by_intent': dict(self.by_intent),
+                'llm_turns': self.llm_turns,
+                'llm_mean_ms': llm_mean_ms,
+                'local_mean_ms': self.local_ms / self.local if self.local else None,
+                'latency_saved_ms': (self.local * llm_mean_ms - self.local_ms
+                                     if llm_mean_ms is not None else None),
+                'since': self.started_at
+            }
+
+
+# Global instance used by the voice endpoint
+voice_router = FastPathRouter()